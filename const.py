@@ -25,6 +25,7 @@ EVLOG_CARD_WWW_DIRECTORY        = 'www/icloud3'
 EVLOG_CARD_WWW_JS_PROG          = 'icloud3-event-log-card.js'
 WAZE_LOCATION_HISTORY_DATABASE  = 'icloud3.waze_location_history.db'
 SENSOR_WAZEHIST_TRACK_NAME      = 'icloud3_wazehist_track'
+SENSOR_LOOP_STATS_NAME          = 'icloud3_loop_stats'
 IC3LOGGER_FILENAME              = 'icloud3-debug.log'
 DEBUG_LOG_FILENAME              = 'icloud3-debug.log'
 
@@ -132,6 +133,17 @@ TRACKING_NORMAL  = 0
 TRACKING_PAUSED  = 1
 TRACKING_RESUMED = 2
 
+# 5-sec Loop Load Shedding Policy (CONF_LOAD_SHEDDING)
+LOAD_SHEDDING_OFF    = 'off'       # Never defer any tasks
+LOAD_SHEDDING_NORMAL = 'normal'    # Defer info msg refresh, nearby device msgs
+LOAD_SHEDDING_FULL   = 'full'      # Also defer monitored device updates
+
+# Zone Exit/Enter Hysteresis (CONF_ZONE_HYSTERESIS) - {'all' or zone: {band & dwell parameters}}
+HYST_ALL_ZONES   = 'all'
+HYST_EXIT_BAND   = 'exit_band'      # Meters outside the zone radius (+ gps accuracy) the exit is held
+HYST_ENTER_BAND  = 'enter_band'     # Meters inside the zone radius the enter is held
+HYST_DWELL_TIME  = 'dwell_time'     # Minutes a held exit/enter must continue before it is used
+
 # Config Parameter Range Index (used in RANGE_DEVICE_CONF, RANGE_GENERAL_CONF lists)
 MIN      = 0
 MAX      = 1
@@ -529,6 +541,7 @@ CONF_OLD_LOCATION_ADJUSTMENT    = 'old_location_adjustment'
 CONF_TRAVEL_TIME_FACTOR         = 'travel_time_factor'
 CONF_TFZ_TRACKING_MAX_DISTANCE  = 'tfz_tracking_max_distance'
 CONF_PASSTHRU_ZONE_TIME         = 'passthru_zone_time'
+CONF_LOAD_SHEDDING              = 'load_shedding'
 CONF_LOG_LEVEL                  = 'log_level'
 
 # inZone Parameters
@@ -538,6 +551,7 @@ CONF_CENTER_IN_ZONE             = 'center_in_zone'
 CONF_DISCARD_POOR_GPS_INZONE    = 'discard_poor_gps_inzone'
 CONF_DISTANCE_BETWEEN_DEVICES   = 'distance_between_devices'
 CONF_INZONE_INTERVALS           = 'inzone_intervals'
+CONF_ZONE_HYSTERESIS            = 'zone_hysteresis'
 
 # Waze Parameters
 CONF_DISTANCE_METHOD            = 'distance_method'
@@ -550,6 +564,10 @@ CONF_WAZE_REALTIME              = 'waze_realtime'
 CONF_WAZE_HISTORY_DATABASE_USED = 'waze_history_database_used'
 CONF_WAZE_HISTORY_MAX_DISTANCE  = 'waze_history_max_distance'
 CONF_WAZE_HISTORY_TRACK_DIRECTION= 'waze_history_track_direction'
+CONF_WAZE_HISTORY_MATCH_RADIUS  = 'waze_history_match_radius'
+CONF_WAZE_HISTORY_NEAREST_CNT   = 'waze_history_nearest_cnt'
+CONF_WAZE_ROUTE_CACHE_SIZE      = 'waze_route_cache_size'
+CONF_WAZE_ROUTE_CACHE_TIME      = 'waze_route_cache_time'
 
 # Stationary Zone Parameters
 CONF_STAT_ZONE_FNAME            = 'stat_zone_fname'
@@ -736,6 +754,7 @@ DEFAULT_GENERAL_CONF = {
         CONF_PASSTHRU_ZONE_TIME: .5,
         CONF_TRACK_FROM_BASE_ZONE: HOME,
         CONF_TRACK_FROM_HOME_ZONE: True,
+        CONF_LOAD_SHEDDING: LOAD_SHEDDING_NORMAL,
 
         # inZone Configuration Parameters
         CONF_CENTER_IN_ZONE: False,
@@ -749,6 +768,9 @@ DEFAULT_GENERAL_CONF = {
                 NO_IOSAPP: 15,
                 OTHER: 120,
                 },
+        CONF_ZONE_HYSTERESIS: {
+                HYST_ALL_ZONES: {HYST_EXIT_BAND: 0, HYST_ENTER_BAND: 0, HYST_DWELL_TIME: 1},
+                },
 
         # Waze Configuration Parameters
         CONF_WAZE_USED: True,
@@ -759,6 +781,10 @@ DEFAULT_GENERAL_CONF = {
         CONF_WAZE_HISTORY_DATABASE_USED: True,
         CONF_WAZE_HISTORY_MAX_DISTANCE: 20,
         CONF_WAZE_HISTORY_TRACK_DIRECTION: 'north_south',
+        CONF_WAZE_HISTORY_MATCH_RADIUS: 0,
+        CONF_WAZE_HISTORY_NEAREST_CNT: 1,
+        CONF_WAZE_ROUTE_CACHE_SIZE: 200,
+        CONF_WAZE_ROUTE_CACHE_TIME: 15,
 
         # Stationary Zone Configuration Parameters
         CONF_STAT_ZONE_FNAME: '[name]Zone',
@@ -797,6 +823,10 @@ RANGE_GENERAL_CONF = {
         CONF_WAZE_MIN_DISTANCE: [0, 1000, 5, 'km'],
         CONF_WAZE_MAX_DISTANCE: [0, 1000, 5, 'km'],
         CONF_WAZE_HISTORY_MAX_DISTANCE: [0, 1000, 5, 'km'],
+        CONF_WAZE_HISTORY_MATCH_RADIUS: [0, 250],
+        CONF_WAZE_HISTORY_NEAREST_CNT: [1, 5],
+        CONF_WAZE_ROUTE_CACHE_SIZE: [0, 2000],
+        CONF_WAZE_ROUTE_CACHE_TIME: [0, 240],
 
         # Stationary Zone Configuration Parameters
         CONF_STAT_ZONE_STILL_TIME: [0, 60],
@@ -60,13 +60,15 @@ from .helpers.time_util import ( time_now_secs, secs_to_time, secs_to_time_str,
                                 datetime_to_secs, secs_to_datetime, datetime_now,
                                 secs_to_age_str,  secs_to_time_age_str, )
 from .helpers.dist_util import (calc_distance_m, calc_distance_km, format_km_to_mi, m_to_ft_str,
-                                format_dist_km, format_dist_m, km_to_mi,)
+                                format_dist_km, format_dist_m, km_to_mi, calc_distance_tiered_m, )
 
 from homeassistant.components.device_tracker.config_entry import TrackerEntity
 from homeassistant.util import slugify
 import traceback
 import copy
 
+DEVICE_DIST_EXACT_WITHIN_M = 1000   # Use the geodesic distance between Devices within 1km of each other
+
 #<><><><><><><><><><><><><><><><><><><><><><><><><><><><><><><><><><><>
 class iCloud3_Device(TrackerEntity):
 
@@ -125,7 +127,6 @@ class iCloud3_Device(TrackerEntity):
         self.last_update_loc_zone         = ''      # Zone from the device tracker entity update
         self.passthru_zone                = ''
         self.passthru_zone_expire_secs    = 0
-        self.selected_zone_results        = []      # ZoneSelected, zone_selected, zone_selected_dist_m, zones_distance_list
 
         # Trigger & Update variables
         self.trigger                      = 'iCloud3'
@@ -175,9 +176,7 @@ class iCloud3_Device(TrackerEntity):
         self.data_source             = ''
         self.offline_secs            = 0        # Time the device went offline
         self.pending_secs            = 0        # Time the device went into a pending status (checked after authentication)
-        self.dist_to_other_devices   = {}       # A dict of other devices distances
-                                                # {devicename: [distance_m, gps_accuracy_factor, location_old_flag]}
-        self.dist_to_other_devices_datetime = DATETIME_ZERO
+        self.dist_to_other_devices_datetime = DATETIME_ZERO     # Distances are in Gb.DeviceDistances
 
         self.last_iosapp_msg         = ''
         self.last_device_monitor_msg = ''
@@ -1161,6 +1160,16 @@ class iCloud3_Device(TrackerEntity):
         distance = 0 if distance < .2 else distance
         return distance
 
+    def distance_m_tiered(self, to_latitude, to_longitude):
+        '''
+        Distance (meters) to the location, the geodesic distance when it is within 1km,
+        the equirectangular approximation when it is further away
+        '''
+        to_gps = (to_latitude, to_longitude)
+        distance = calc_distance_tiered_m(self.loc_data_gps, to_gps, DEVICE_DIST_EXACT_WITHIN_M)
+        distance = 0 if distance < .2 else distance
+        return distance
+
     def distance_km(self, to_latitude, to_longitude):
         to_gps = (to_latitude, to_longitude)
         distance = calc_distance_km(self.loc_data_gps, to_gps)
@@ -1494,48 +1503,10 @@ class iCloud3_Device(TrackerEntity):
 #<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>
     def update_distance_to_other_devices(self):
         '''
-        Cycle through all devices and update this device's and the other device's
-        dist_to_other_device_info field
-
-        {devicename: [distance_m, gps_accuracy_factor, display_text]}
+        Update this device's row (and column) of the device distance matrix. The
+        distance sensor values are built from it when the sensors are written.
         '''
-
-        # for _Device in Gb.Devices:
-        for _devicename, _Device in Gb.Devices_by_devicename_tracked.items():
-            if _Device is self:
-                continue
-
-            if self.sensor_zone == _Device.sensor_zone and self.is_inzone:
-                is_location_old = False
-            else:
-                is_location_old = ((secs_since(_Device.loc_data_secs) > _Device.old_loc_threshold_secs * 1.5)
-                                        or (secs_since(self.loc_data_secs) > self.old_loc_threshold_secs * 1.5))
-            if is_location_old:
-                continue
-
-            dist_apart_m        = _Device.distance_m(self.loc_data_latitude, self.loc_data_longitude)
-            min_gps_accuracy    = (min(self.loc_data_gps_accuracy, _Device.loc_data_gps_accuracy))
-            gps_accuracy_factor = round(min_gps_accuracy * dist_apart_m / NEAR_DEVICE_DISTANCE)
-
-            if dist_apart_m > 500:
-                display_text = f"{dist_apart_m/1000:.1f}km/±{min_gps_accuracy}m"
-            else:
-                display_text = f"{dist_apart_m}m/±{min_gps_accuracy}m"
-
-            distance_apart_data = [dist_apart_m, gps_accuracy_factor, display_text]
-
-            if (_devicename not in self.dist_to_other_devices
-                    or self.devicename not in _Device.dist_to_other_devices
-                    or _Device.dist_to_other_devices[self.devicename] != distance_apart_data
-                    or self.dist_to_other_devices[_devicename] != distance_apart_data):
-                before_s = self.dist_to_other_devices.get(_devicename)
-
-                self.dist_to_other_devices[_devicename] = distance_apart_data
-                self.dist_to_other_devices_datetime = datetime_now()
-                _Device.dist_to_other_devices[self.devicename] = distance_apart_data
-
-                Gb.dist_to_other_devices_update_sensor_list.add(self.devicename)
-                Gb.dist_to_other_devices_update_sensor_list.add(_devicename)
+        Gb.DeviceDistances.update_device(self)
 
 #<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>
 #
@@ -128,11 +128,11 @@ class iCloud3_DeviceFmZone():
 
     @property
     def distance_km(self):
-        return calc_distance_km(self.Device.loc_data_gps, self.FromZone.gps)
+        return self.FromZone.distance_km(*self.Device.loc_data_gps)
 
     @property
     def distance_km_iosapp(self):
-        return calc_distance_km(self.Device.iosapp_data_gps, self.FromZone.gps)
+        return self.FromZone.distance_km(*self.Device.iosapp_data_gps)
 
     @property
     def is_going_towards(self):
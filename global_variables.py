@@ -35,13 +35,14 @@ from .const          import (DEVICENAME_IOSAPP, VERSION, NOT_SET, HOME_FNAME, HO
                             CONF_WAZE_REGION, CONF_WAZE_MAX_DISTANCE, CONF_WAZE_MIN_DISTANCE,
                             CONF_WAZE_REALTIME,
                             CONF_WAZE_HISTORY_DATABASE_USED, CONF_WAZE_HISTORY_MAX_DISTANCE ,
-                            CONF_WAZE_HISTORY_TRACK_DIRECTION,
+                            CONF_WAZE_HISTORY_TRACK_DIRECTION, CONF_WAZE_ROUTE_CACHE_SIZE, CONF_WAZE_ROUTE_CACHE_TIME,
+                            CONF_WAZE_HISTORY_MATCH_RADIUS, CONF_WAZE_HISTORY_NEAREST_CNT,
                             CONF_STAT_ZONE_FNAME,
                             CONF_STAT_ZONE_BASE_LATITUDE, CONF_STAT_ZONE_BASE_LONGITUDE,
                             CONF_STAT_ZONE_INZONE_INTERVAL, CONF_LOG_LEVEL,
                             CONF_IOSAPP_REQUEST_LOC_MAX_CNT, CONF_DISTANCE_BETWEEN_DEVICES,
                             CONF_PASSTHRU_ZONE_TIME, CONF_TRACK_FROM_BASE_ZONE, CONF_TRACK_FROM_HOME_ZONE,
-                            CONF_TFZ_TRACKING_MAX_DISTANCE,
+                            CONF_TFZ_TRACKING_MAX_DISTANCE, CONF_LOAD_SHEDDING, CONF_ZONE_HYSTERESIS,
 
                             CONF_STAT_ZONE_STILL_TIME,
                             CONF_STAT_ZONE_INZONE_INTERVAL,
@@ -49,10 +50,74 @@ from .const          import (DEVICENAME_IOSAPP, VERSION, NOT_SET, HOME_FNAME, HO
 
 
 import logging
+import threading
 _LOGGER = logging.getLogger("icloud3_cf")
 
 #<><><><><><><><><><><><><><><><><><><><><><><><><><><><><><><><><><><><>
-class GlobalVariables(object):
+#
+#   DEVICE UPDATE JOB GLOBALS
+#
+#   this_update_secs, this_update_time and trace_prefix are set by the 5-sec
+#   loop for each pass. The tracked Devices are updated by DeviceUpdatePool jobs
+#   on worker threads that are still running when the loop sets 'WRAPUP > ' and
+#   starts the next pass. Each job gets a copy of these values when it is
+#   submitted (Gb.job_globals()) and they are kept for the job's thread
+#   (Gb.start_job_globals, Gb.end_job_globals). Outside of a job, the loop's
+#   values are used.
+#
+#   The other Gb variables are shared by the loop and the jobs:
+#       - Set up by start_ic3 or changed by the loop before the jobs are
+#           submitted (zones, configuration, Devices) - Read by the jobs
+#       - A Device's own fields - Only changed by its job, there is only one
+#           job for a Device at a time (DeviceUpdatePool device lock)
+#       - DeviceDistances, WazeHist, WazeRouteCache, StatZoneStateWriter,
+#           DeviceUpdatePool - Changed by the jobs while holding their lock
+#       - NearDeviceClusters - Rebuilt by the first job that needs it after a
+#           distance change (while holding its lock), the new cluster lists
+#           replace the old ones
+#       - ZoneDistanceCache, ZoneSelectCache - One dict get/set at a time, the
+#           value saved is the same whichever job saves it. The hit counts
+#           are approximate.
+#
+#<><><><><><><><><><><><><><><><><><><><><><><><><><><><><><><><><><><><>
+JOB_GLOBALS = ['this_update_secs', 'this_update_time', 'trace_prefix']
+_job_local = threading.local()
+
+def _job_global(name):
+    def get_value(cls):
+        job_globals = getattr(_job_local, 'job_globals', None)
+        if job_globals is not None:
+            return job_globals[name]
+        return cls._loop_globals[name]
+
+    def set_value(cls, value):
+        job_globals = getattr(_job_local, 'job_globals', None)
+        if job_globals is not None:
+            job_globals[name] = value
+        else:
+            cls._loop_globals[name] = value
+
+    return property(get_value, set_value)
+
+class _GlobalVariablesType(type):
+    this_update_secs = _job_global('this_update_secs')
+    this_update_time = _job_global('this_update_time')
+    trace_prefix     = _job_global('trace_prefix')
+
+    def job_globals(cls):
+        '''
+        Return the current job globals to be used by a Device update job
+        '''
+        return {name: getattr(cls, name) for name in JOB_GLOBALS}
+
+    def start_job_globals(cls, job_globals):
+        _job_local.job_globals = job_globals.copy()
+
+    def end_job_globals(cls):
+        _job_local.job_globals = None
+
+#<><><><><><><><><><><><><><><><><><><><><><><><><><><><><><><><><><><><>
+class GlobalVariables(object, metaclass=_GlobalVariablesType):
     '''
     Define global variables used in the various iCloud3 modules
     '''
@@ -88,6 +153,23 @@ class GlobalVariables(object):
     Waze            = None
     WazeHist        = None
     WazeHistTrackSensor = None    # Sensor for updating the lat/long values for the WazeHist Map display
+    DeviceScheduler = None      # Device next update deadline priority queue (support/device_scheduler)
+    DeviceUpdatePool = None     # Device update worker threads & device locks (support/device_update_pool)
+    UpdateCompletion = None     # 5-sec loop pass/device update finished signal (support/update_completion)
+    IcloudPrefetchPlanner = None  # iCloud location prefetch timing & batching (support/icloud_prefetch_planner)
+    PeriodicTasks   = None      # Hourly, midnight, every minute, etc. timer tasks (support/periodic_tasks)
+    LoopStats       = None      # 5-sec loop phase timing statistics (support/loop_stats)
+    LoopStatsSensor = None      # Sensor for displaying the 5-sec loop phase timing statistics
+    LoopLoadControl = None      # 5-sec loop overrun detection & load shedding (support/loop_load_control)
+    ZoneDistanceCache = None    # Location to zone distances calculated in this 5-sec loop pass (support/zone_distance_cache)
+    ZoneSelectCache = None      # _select_zone results by Device & rounded location (support/zone_select_cache)
+    StatZoneStateWriter = None  # Stationary Zone entity writes done at the end of the 5-sec loop pass (support/stat_zone_state_writer)
+    GeofenceHysteresis = None   # Held zone exits/enters near the zone edge (support/geofence_hysteresis)
+    WazeRouteFanout = None      # Waze routes for a Device's track from zones requested at the same time (support/waze_route_fanout)
+    WazeRouteCache  = None      # Waze route results for all Devices by track from zone & location cell (support/waze_route_cache)
+    zones_version   = 0         # Incremented when the zones are loaded or changed or a Stationary Zone moves
+    DeviceDistances = None      # Distance between each pair of Devices (support/device_distance_matrix)
+    NearDeviceClusters = None   # Devices near each other and the NearDevice they use (support/near_device_clusters)
 
     operating_mode          = 0         # Platform (Legacy using configuration.yaml) or Integration
     ha_config_platform_stmt = False     # a platform: icloud3 stmt is in the configurationyaml file that needs to be removed
@@ -125,6 +207,13 @@ class GlobalVariables(object):
     Devices_by_devicename_tracked     = {}  # All monitored Devices by devicename
     Devices_by_icloud_device_id       = {}  # FmF/FamShr Device Configuration
     Devices_by_iosapp_devicename      = {}  # All Devices by the iosapp device_tracker.iosapp_devicename
+    Devices_by_iosapp_entity_id       = {}  # (Device, entity type) by the iosapp entity_id with a state change listener
+    iosapp_mailbox_by_devicename      = {}  # iOS App state changes received {devicename: {entity_type: State}}
+    iosapp_state_change_unsub         = None  # Remove the iOS App state change listener
+    iosapp_state_change_listener_active = False # The iOS App entities are not polled if the listener is active
+    zone_change_unsub                 = None  # Remove the zone state change listener
+    zone_changes_pending              = {}    # {zone: new State or None if deleted} applied by the 5-sec loop
+    DeletedZones_by_zone              = {}    # Deleted zones kept in Zones_by_zone until no Device is in them
     Zones                             = []  # Zones object list
     Zones_by_zone                     = {}  # Zone object by zone name
     zone_display_as                   = {}   # Zone display_as by zone distionary to ease displaying zone fname
@@ -132,6 +221,7 @@ class GlobalVariables(object):
     StatZones                         = []  # Stationary Zone objects
     StatZones_by_devicename           = {}  # Stationary Zone objects by devicename
     HomeZone                          = None # Home Zone object
+    ZoneIndex                         = None # ZoneSpatialIndex of the zone centers, built in create_Zones_object
 
     # HA device_tracker and sensor entity info
     DeviceTrackers_by_devicename      = {}  # HA device_tracker.[devicename] entity objects
@@ -162,7 +252,9 @@ class GlobalVariables(object):
     ic3_debug_log_new_file_secs  = 0
     info_notification            = ''
     ha_notification              = {}
-    trace_prefix                 = ''
+    _loop_globals                = {'this_update_secs': 0,      # trace_prefix, this_update_secs/time
+                                    'this_update_time': '',     # See DEVICE UPDATE JOB GLOBALS
+                                    'trace_prefix': '', }
     trace_text_change_1          = ''
     trace_text_change_2          = ''
 
@@ -243,6 +335,8 @@ class GlobalVariables(object):
     # device_tracker_state_evlog_format_flag = (device_tracker_state_format == FNAME)
     discard_poor_gps_inzone_flag    = DEFAULT_GENERAL_CONF[CONF_DISCARD_POOR_GPS_INZONE]
     distance_between_device_flag    = DEFAULT_GENERAL_CONF[CONF_DISTANCE_BETWEEN_DEVICES]
+    load_shedding                   = DEFAULT_GENERAL_CONF[CONF_LOAD_SHEDDING]
+    zone_hysteresis                 = DEFAULT_GENERAL_CONF[CONF_ZONE_HYSTERESIS]
 
     tfz_tracking_max_distance       = DEFAULT_GENERAL_CONF[CONF_TFZ_TRACKING_MAX_DISTANCE]
 
@@ -253,6 +347,10 @@ class GlobalVariables(object):
     waze_history_database_used      = DEFAULT_GENERAL_CONF[CONF_WAZE_HISTORY_DATABASE_USED]
     waze_history_max_distance       = DEFAULT_GENERAL_CONF[CONF_WAZE_HISTORY_MAX_DISTANCE]
     waze_history_track_direction    = DEFAULT_GENERAL_CONF[CONF_WAZE_HISTORY_TRACK_DIRECTION]
+    waze_history_match_radius       = DEFAULT_GENERAL_CONF[CONF_WAZE_HISTORY_MATCH_RADIUS]
+    waze_history_nearest_cnt        = DEFAULT_GENERAL_CONF[CONF_WAZE_HISTORY_NEAREST_CNT]
+    waze_route_cache_size           = DEFAULT_GENERAL_CONF[CONF_WAZE_ROUTE_CACHE_SIZE]
+    waze_route_cache_time           = DEFAULT_GENERAL_CONF[CONF_WAZE_ROUTE_CACHE_TIME]
 
     stat_zone_fname                 = DEFAULT_GENERAL_CONF[CONF_STAT_ZONE_FNAME]
     stat_zone_base_latitude         = DEFAULT_GENERAL_CONF[CONF_STAT_ZONE_BASE_LATITUDE]
@@ -320,8 +418,6 @@ class GlobalVariables(object):
 
     # Device state, zone data from icloud and iosapp
     state_to_zone     = {}
-    this_update_secs  = 0
-    this_update_time  = ''
     state_this_poll   = {}
     state_last_poll   = {}
     zone_last         = {}
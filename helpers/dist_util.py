@@ -6,6 +6,21 @@ from ..global_variables import GlobalVariables as Gb
 from .common            import (round_to_zero, )
 from .messaging         import (_trace, _traceha, )
 
+import math
+
+EARTH_RADIUS_M          = 6371008.8
+M_PER_LAT_DEGREE        = EARTH_RADIUS_M * math.pi / 180
+APPROX_DIST_MAX_M       = 100000    # Use the equirectangular distance for distances under 100km
+APPROX_DIST_ERROR_PCT   = .01       # Maximum error of the equirectangular distance vs the geodesic distance
+APPROX_DIST_ERROR_M     = 1         #   (spherical earth + flat projection) under 100km, plus rounding
+FORMAT_DIST_CACHE_MAX   = 2000      # Formatted distances saved for each format function
+
+# The formatted distance text by the distance value. The distances are rounded to the
+# meter when they are calculated so the same values are formatted over and over.
+_format_km_to_mi_cache  = {}        # {(dist_km, um): text}
+_format_dist_km_cache   = {}        # {dist_km: text}
+_format_dist_m_cache    = {}        # {dist_m: text}
+
 
 #<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>
 #
@@ -64,6 +79,104 @@ def calc_distance_m(from_gps, to_gps):
     distance_m = distance(from_lat, from_long, to_lat, to_long)
     return round(round_to_zero(distance_m))
 
+#<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>
+#
+#   Tiered distance functions - Bounding box test, then the equirectangular
+#   approximation, then the geodesic distance (calc_distance_m) only when the
+#   approximation is too close to the radius to be sure
+#
+#<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>
+def is_valid_gps(gps):
+    latitude, longitude = gps
+    return (latitude is not None and longitude is not None
+                and latitude != 0 and longitude != 0)
+
+#--------------------------------------------------------------------
+def calc_gps_bounding_box(gps, radius_m):
+    '''
+    Return the lat/long box around the location that contains the circle with the
+    radius. Add the approximation error so a location on the circle is not excluded.
+
+    Return:
+        (min latitude, max latitude, min longitude, max longitude)
+    '''
+    latitude, longitude = gps
+    radius_m   = radius_m * (1 + APPROX_DIST_ERROR_PCT) + APPROX_DIST_ERROR_M
+    lat_deg    = radius_m / M_PER_LAT_DEGREE
+    cos_lat    = math.cos(math.radians(min(abs(latitude) + lat_deg, 89.9)))
+    long_deg   = radius_m / (M_PER_LAT_DEGREE * cos_lat)
+
+    return (latitude - lat_deg, latitude + lat_deg, longitude - long_deg, longitude + long_deg)
+
+def is_in_gps_bounding_box(bounding_box, gps):
+    min_lat, max_lat, min_long, max_long = bounding_box
+    return (min_lat <= gps[0] <= max_lat and min_long <= gps[1] <= max_long)
+
+#--------------------------------------------------------------------
+def calc_distance_approx_m(from_gps, to_gps):
+    '''
+    Equirectangular distance (meters). Within APPROX_DIST_ERROR_PCT + APPROX_DIST_ERROR_M
+    of the geodesic distance for distances under APPROX_DIST_MAX_M.
+    '''
+    from_lat, from_long = from_gps
+    to_lat, to_long     = to_gps
+
+    x = math.radians(to_long - from_long) * math.cos(math.radians((from_lat + to_lat) / 2))
+    y = math.radians(to_lat - from_lat)
+
+    return EARTH_RADIUS_M * math.sqrt(x * x + y * y)
+
+#--------------------------------------------------------------------
+def is_within_distance(from_gps, to_gps, radius_m, bounding_box=None):
+    '''
+    Is the distance between the locations less than or equal to the radius
+
+    Parameters:
+        bounding_box - The calc_gps_bounding_box of from_gps and the radius. The box
+                        is checked first if it is available.
+    '''
+    if is_valid_gps(from_gps) is False or is_valid_gps(to_gps) is False:
+        return True             # calc_distance_m returns 0 for an invalid gps
+
+    if bounding_box and is_in_gps_bounding_box(bounding_box, to_gps) is False:
+        return False
+
+    approx_dist_m = calc_distance_approx_m(from_gps, to_gps)
+    if approx_dist_m > APPROX_DIST_MAX_M:
+        return radius_m > APPROX_DIST_MAX_M / 2 and calc_distance_m(from_gps, to_gps) <= radius_m
+
+    error_m = approx_dist_m * APPROX_DIST_ERROR_PCT + APPROX_DIST_ERROR_M
+    if approx_dist_m - error_m > radius_m:
+        return False
+    if approx_dist_m + error_m <= radius_m:
+        return True
+
+    return calc_distance_m(from_gps, to_gps) <= radius_m
+
+#--------------------------------------------------------------------
+def calc_distance_tiered_m(from_gps, to_gps, exact_within_m):
+    '''
+    Return the equirectangular distance (meters) when the locations are further apart
+    than exact_within_m (and under APPROX_DIST_MAX_M), otherwise the geodesic distance
+    '''
+    if is_valid_gps(from_gps) is False or is_valid_gps(to_gps) is False:
+        return 0
+
+    approx_dist_m = calc_distance_approx_m(from_gps, to_gps)
+    error_m       = approx_dist_m * APPROX_DIST_ERROR_PCT + APPROX_DIST_ERROR_M
+    if approx_dist_m - error_m > exact_within_m and approx_dist_m < APPROX_DIST_MAX_M:
+        return round(approx_dist_m)
+
+    return calc_distance_m(from_gps, to_gps)
+
+#--------------------------------------------------------------------
+def _save_format_dist(format_cache, key, dist_text):
+    if len(format_cache) >= FORMAT_DIST_CACHE_MAX:
+        format_cache.clear()
+    format_cache[key] = dist_text
+
+    return dist_text
+
 #--------------------------------------------------------------------
 def format_km_to_mi(dist_km):
     '''
@@ -71,7 +184,14 @@ def format_km_to_mi(dist_km):
 
     dist: Distance in kilometers
     '''
+    key = (dist_km, Gb.um)
+    dist_text = _format_km_to_mi_cache.get(key)
+    if dist_text is None:
+        dist_text = _save_format_dist(_format_km_to_mi_cache, key, _format_km_to_mi(dist_km))
 
+    return dist_text
+
+def _format_km_to_mi(dist_km):
     if Gb.um == 'mi':
         mi = dist_km * Gb.um_km_mi_factor
 
@@ -105,6 +225,13 @@ def format_dist_km(dist_km):
 
     dist: Distance in kilometers
     '''
+    dist_text = _format_dist_km_cache.get(dist_km)
+    if dist_text is None:
+        dist_text = _save_format_dist(_format_dist_km_cache, dist_km, _format_dist_km(dist_km))
+
+    return dist_text
+
+def _format_dist_km(dist_km):
     if dist_km >= 25:       #25km/15mi
         return f"{dist_km:.0f}km"
     if dist_km >= 1:        #1000m/.6mi
@@ -119,6 +246,13 @@ def format_dist_m(dist_m):
 
     dist: Distance in meters
     '''
+    dist_text = _format_dist_m_cache.get(dist_m)
+    if dist_text is None:
+        dist_text = _save_format_dist(_format_dist_m_cache, dist_m, _format_dist_m(dist_m))
+
+    return dist_text
+
+def _format_dist_m(dist_m):
     if dist_m >= 25000:       #25km/15mi
         return f"{dist_m/1000:.0f}km"
     if dist_m >= 1000:        #1000m/.6mi
@@ -17,14 +17,17 @@ from homeassistant.helpers import entity_registry, device_registry
 #    Entity State and Attributes functions
 #
 #<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>
-def get_state(entity_id):
+def get_state(entity_id, State=None):
     """
-    Return the state of an entity
+    Return the state of an entity. The entity's State object is used if it is
+    available (from a state change event), otherwise it is read from hass.states.
     """
 
     try:
         entity_state = ''
-        entity_state = Gb.hass.states.get(entity_id).state
+        if State is None:
+            State = Gb.hass.states.get(entity_id)
+        entity_state = State.state
         if entity_state in IOS_TRIGGER_ABBREVIATIONS:
             state = IOS_TRIGGER_ABBREVIATIONS[entity_state]
         else:
@@ -43,13 +46,13 @@ def get_state(entity_id):
     return state
 
 #--------------------------------------------------------------------
-def get_attributes(entity_id):
+def get_attributes(entity_id, State=None):
     """
     Return the attributes of an entity.
     """
 
     try:
-        entity_data  = Gb.hass.states.get(entity_id)
+        entity_data  = State if State is not None else Gb.hass.states.get(entity_id)
         entity_attrs = entity_data.attributes
         retry_cnt = 0
         while retry_cnt < 10:
@@ -71,14 +74,16 @@ def get_attributes(entity_id):
     return dict(entity_attrs)
 
 #--------------------------------------------------------------------
-def get_last_changed_time(entity_id):
+def get_last_changed_time(entity_id, State=None):
     """
     Return the entity's last changed time attribute in secs
     Last changed time format '2019-09-09 14:02:45.12345+00:00' (utc value)
     """
 
     try:
-        changed_time  = Gb.hass.states.get(entity_id).last_changed
+        if State is None:
+            State = Gb.hass.states.get(entity_id)
+        changed_time  = State.last_changed
 
         timestamp_utc = str(changed_time).split(".")[0]
         time_secs     = datetime_to_secs(timestamp_utc, UTC_TIME)
@@ -57,11 +57,36 @@ from .support           import start_ic3
 from .support           import start_ic3_control
 from .support           import restore_state
 from .support           import iosapp_data_handler
+from .support           import iosapp_state_listener
+from .support           import zone_change_listener
+from .support.iosapp_state_listener import (IOSAPP_LOCATION_ENTITIES, IOSAPP_BATTERY_ENTITIES, )
 from .support           import iosapp_interface
 from .support           import pyicloud_ic3_interface
 from .support           import icloud_data_handler
 from .support           import service_handler
 from .support           import determine_interval as det_interval
+from .support.device_scheduler import DeviceScheduler
+from .support.device_update_pool import DeviceUpdatePool
+from .support.update_completion import UpdateCompletion
+from .support.icloud_prefetch_planner import IcloudPrefetchPlanner
+from .support.periodic_tasks import PeriodicTaskRegistry
+from .support.zone_spatial_index import (ZonesDistanceList, )
+from .support.zone_distance_cache import ZoneDistanceCache
+from .support.zone_select_cache import ZoneSelectCache
+from .support.stat_zone_state_writer import StatZoneStateWriter
+from .support.geofence_hysteresis import GeofenceHysteresis
+from .support.waze_route_fanout import WazeRouteFanout
+from .support.waze_route_cache import WazeRouteCache
+from .support.device_distance_matrix import DeviceDistanceMatrix
+from .support.near_device_clusters import NearDeviceClusters
+from .support.loop_stats import (LoopStats,
+                                LOOP_PHASE_LOOP, LOOP_PHASE_SPECIAL_TIME, LOOP_PHASE_PREFETCH,
+                                LOOP_PHASE_DEVICE_UPDATE, LOOP_PHASE_IOSAPP_CHECK,
+                                LOOP_PHASE_ICLOUD_REFRESH, LOOP_PHASE_ZONE_SELECT,
+                                LOOP_PHASE_DETERMINE_INTERVAL, LOOP_PHASE_SENSOR_WRITE,
+                                LOOP_PHASE_EVLOG_REFRESH, )
+from .support.loop_load_control import (LoopLoadControl,
+                                SHED_INFO_MSG_REFRESH, SHED_NEARBY_DEVICES_MSG, SHED_MONITORED_DEVICES, )
 
 from .helpers.common    import (instr, is_inzone_zone, is_statzone, isnot_inzone_zone, )
 from .helpers.messaging import (broadcast_info_msg,
@@ -110,6 +135,22 @@ class iCloud3:
         self.e_seconds_local_offset_secs = 0
 
         self.initialize_5_sec_loop_control_flags()
+        Gb.DeviceScheduler = DeviceScheduler()
+        Gb.DeviceUpdatePool = DeviceUpdatePool()
+        Gb.UpdateCompletion = UpdateCompletion()
+        Gb.IcloudPrefetchPlanner = IcloudPrefetchPlanner()
+        Gb.PeriodicTasks    = PeriodicTaskRegistry()
+        self._register_periodic_tasks()
+        Gb.LoopStats        = LoopStats()
+        Gb.LoopLoadControl  = LoopLoadControl()
+        Gb.ZoneDistanceCache = ZoneDistanceCache()
+        Gb.ZoneSelectCache  = ZoneSelectCache()
+        Gb.StatZoneStateWriter = StatZoneStateWriter()
+        Gb.GeofenceHysteresis = GeofenceHysteresis()
+        Gb.WazeRouteFanout  = WazeRouteFanout()
+        Gb.WazeRouteCache   = WazeRouteCache()
+        Gb.DeviceDistances  = DeviceDistanceMatrix()
+        Gb.NearDeviceClusters = NearDeviceClusters()
 
         #initialize variables configuration.yaml parameters
         start_ic3.set_global_variables_from_conf_parameters()
@@ -156,6 +197,7 @@ class iCloud3:
             self.startup_log_msgs           = ''
             self.startup_log_msgs_prefix    = ''
 
+            Gb.DeviceScheduler.initialize()
             start_ic3_control.stage_1_setup_variables()
             start_ic3_control.stage_2_prepare_configuration()
 
@@ -197,6 +239,7 @@ class iCloud3:
     def _polling_loop_5_sec_device(self, ha_timer_secs):
         Gb.this_update_secs   = time_now_secs()
         Gb.this_update_time   = dt_util.now().strftime('%H:%M:%S')
+        Gb.LoopLoadControl.tick_started(ha_timer_secs)
 
         if Gb.config_flow_updated_parms != {''}:
             start_ic3.process_config_flow_parameter_updates()
@@ -211,6 +254,10 @@ class iCloud3:
                 or Gb.conf_devices == []
                 or Gb.start_icloud3_inprocess_flag):
 
+            # The prior pass is still running, this pass is skipped
+            if self.loop_ctrl_master_update_in_process_flag:
+                Gb.LoopLoadControl.tick_skipped()
+
             # Authentication may take a long time, Display a status message before exiting loop
             if (Gb.pyicloud_auth_started_secs > 0):
                 info_msg = ("Waiting for iCloud Account Authentication, Requested at "
@@ -236,11 +283,19 @@ class iCloud3:
             pyicloud_ic3_interface.pyicloud_reset_session()
             Gb.evlog_action_request = ''
 
+        loop_started = time.perf_counter()
         try:
             #<<<<<<<<<<<<<<<<<<<<>>>>>>>>>>>>>>>>>>>>
             #   CHECK TIMERS
             #<<<<<<<<<<<<<<<<<<<<>>>>>>>>>>>>>>>>>>>>
-            self._main_5sec_loop_special_time_control()
+            with Gb.LoopStats.timer(LOOP_PHASE_SPECIAL_TIME):
+                self._main_5sec_loop_special_time_control()
+
+            # Add, update or remove the zones that were changed in HA since the last pass
+            zone_change_listener.apply_pending_zone_changes()
+
+            # Run the EvLog Action requests queued while the Devices were being updated
+            Gb.UpdateCompletion.run_queued_requests()
 
             if Gb.all_tracking_paused_flag:
                 return
@@ -250,29 +305,48 @@ class iCloud3:
             #   UPDATE TRACKED DEVICES
             #<<<<<<<<<<<<<<<<<<<<>>>>>>>>>>>>>>>>>>>>
             self.loop_ctrl_master_update_in_process_flag = True
-            self._main_5sec_loop_icloud_prefetch_control()
-
+            Gb.UpdateCompletion.pass_started()
+            Gb.ZoneDistanceCache.new_pass()
+            Gb.NearDeviceClusters.new_pass()
+            with Gb.LoopStats.timer(LOOP_PHASE_PREFETCH):
+                self._main_5sec_loop_icloud_prefetch_control()
+
+            # Only the Devices that have reached their next deadline (next update time,
+            # passthru zone expire time, Stat Zone timer), have been triggered or
+            # have an update pending are processed
+            Gb.DeviceScheduler.refresh_due_devices()
+            Gb.DeviceUpdatePool.check_stalled_device_updates()
+
+            # Each Device is updated on the DeviceUpdatePool worker threads so a slow
+            # Waze or iCloud request for one Device does not hold up the others. A Device
+            # that is still being updated from a prior pass is skipped.
             for Device in Gb.Devices_by_devicename_tracked.values():
                 self._main_5sec_loop_update_battery_iosapp(Device)
 
-                if self.loop_ctrl_device_update_in_process:
-                    self._display_loop_control_msg('Tracked')
-                    break
-                if Device.is_tracking_paused:
+                if (Device.is_tracking_paused
+                        or Gb.DeviceUpdatePool.is_device_update_in_process(Device.devicename)):
                     continue
 
-                self._set_loop_control_device(Device)
-                self._main_5sec_loop_update_tracked_devices_iosapp(Device)
-                self._main_5sec_loop_update_tracked_devices_icloud(Device)
+                # Send a location request to device if needed
+                if Gb.data_source_use_iosapp:
+                    iosapp_data_handler.check_if_iosapp_is_alive(Device)
 
-                self._display_secs_to_next_update_info_msg(Device)
-                self._clear_loop_control_device()
+                if (iosapp_state_listener.is_iosapp_polling_needed(Device)
+                        or iosapp_state_listener.is_iosapp_mailbox_empty(Device) is False
+                        or Gb.DeviceScheduler.is_device_due(Device)):
+                    Gb.DeviceUpdatePool.submit_device_update(Device,
+                                                self._main_5sec_loop_update_tracked_device)
 
 
             #<<<<<<<<<<<<<<<<<<<<>>>>>>>>>>>>>>>>>>>>
             #   UPDATE MONITORED DEVICES
             #<<<<<<<<<<<<<<<<<<<<>>>>>>>>>>>>>>>>>>>>
-            for Device in Gb.Devices_by_devicename_monitored.values():
+            # Monitored devices are deferred when the loop is overloaded. Any new
+            # location is picked up on the first pass after the overload clears.
+            monitored_Devices = Gb.Devices_by_devicename_monitored.values() \
+                                    if Gb.LoopLoadControl.is_task_runnable(SHED_MONITORED_DEVICES) \
+                                    else []
+            for Device in monitored_Devices:
                 self._main_5sec_loop_update_battery_iosapp(Device)
 
                 if self.loop_ctrl_device_update_in_process:
@@ -293,8 +367,15 @@ class iCloud3:
         self.initialize_5_sec_loop_control_flags()
         self.initial_locate_complete_flag  = True
 
+        # The queued EvLog Action requests (pause, resume, locate) are run on the
+        # next pass after the Device updates still running are finished
+        Gb.UpdateCompletion.pass_finished()
+
         Gb.trace_prefix = 'WRAPUP > '
 
+        # Write the Stationary Zone entities that were moved during the pass
+        Gb.StatZoneStateWriter.write_pending_zone_states()
+
         #<<<<<<<<<<<<<<<<<<<<>>>>>>>>>>>>>>>>>>>>
         #   UPDATE DISPLAYED DEVICE INFO FIELD
         #<<<<<<<<<<<<<<<<<<<<>>>>>>>>>>>>>>>>>>>>
@@ -304,7 +385,8 @@ class iCloud3:
             show_one_screen = (len(Gb.EvLog.evlog_table) > 300
                                     and Gb.log_debug_flag is False)
             if Device.last_evlog_msg_secs > Gb.EvLog.last_refresh_secs:
-                Gb.EvLog.update_event_log_display(devicename=Device.devicename,
+                with Gb.LoopStats.timer(LOOP_PHASE_EVLOG_REFRESH):
+                    Gb.EvLog.update_event_log_display(devicename=Device.devicename,
                                                     show_one_screen=show_one_screen)
 
         #<<<<<<<<<<<<<<<<<<<<>>>>>>>>>>>>>>>>>>>>
@@ -312,16 +394,21 @@ class iCloud3:
         #<<<<<<<<<<<<<<<<<<<<>>>>>>>>>>>>>>>>>>>>
         # Update distance sensors (_zone/home.waze/calc_distace) to update the
         # distance to each device
-        if Gb.dist_to_other_devices_update_sensor_list:
-            for devicename in Gb.dist_to_other_devices_update_sensor_list:
-                Device = Gb.Devices_by_devicename[devicename]
-                Device.sensors[DISTANCE_TO_OTHER_DEVICES] = Device.dist_to_other_devices.copy()
-                Device.sensors[DISTANCE_TO_OTHER_DEVICES_DATETIME] = Device.dist_to_other_devices_datetime
+        # The Devices are still being updated by the DeviceUpdatePool, the list is
+        # swapped out so the ones added now are written on the next pass
+        for devicename in Gb.DeviceDistances.pop_sensor_update_devicenames():
+            Device = Gb.Devices_by_devicename.get(devicename)
+            if Device is None:
+                continue
+            Device.sensors[DISTANCE_TO_OTHER_DEVICES] = Gb.DeviceDistances.dist_to_other_devices(Device)
+            Device.sensors[DISTANCE_TO_OTHER_DEVICES_DATETIME] = Device.dist_to_other_devices_datetime
+            with Gb.LoopStats.timer(LOOP_PHASE_SENSOR_WRITE, Device):
                 Device.write_ha_sensors_state(SENSOR_LIST_DISTANCE)
 
-            Gb.dist_to_other_devices_update_sensor_list = set()
-
         Gb.trace_prefix = ''
+        loop_secs = time.perf_counter() - loop_started
+        Gb.LoopStats.add_time(LOOP_PHASE_LOOP, loop_secs * 1000)
+        Gb.LoopLoadControl.tick_finished(loop_secs)
 
 
 #<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>
@@ -330,6 +417,31 @@ class iCloud3:
 #
 #<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>
 
+    def _main_5sec_loop_update_tracked_device(self, Device):
+        '''
+        Update the tracked Device with iOS App and iCloud data. This is run as
+        a DeviceUpdatePool job while holding the Device's update lock.
+        '''
+        with Gb.LoopStats.timer(LOOP_PHASE_DEVICE_UPDATE, Device):
+            self._main_5sec_loop_update_tracked_devices_iosapp(Device)
+
+            if (Device.iosapp_data_updated_flag
+                    or Gb.DeviceScheduler.is_device_due(Device)):
+                self._main_5sec_loop_update_tracked_devices_icloud(Device)
+                self._display_secs_to_next_update_info_msg(Device)
+                Gb.DeviceScheduler.schedule_device(Device)
+
+#----------------------------------------------------------------------------
+    def iosapp_state_change_update_device(self, Device):
+        '''
+        Update the Device as soon as an iOS App state or trigger change is received
+        instead of waiting for the next 5-sec loop pass. This is run as a
+        DeviceUpdatePool job.
+        '''
+        Gb.this_update_secs = time_now_secs()
+        self._main_5sec_loop_update_tracked_device(Device)
+
+#----------------------------------------------------------------------------
     def _main_5sec_loop_update_tracked_devices_iosapp(self, Device):
         '''
         Update the device based on iOS App data
@@ -344,7 +456,16 @@ class iCloud3:
         if Gb.this_update_secs > Device.passthru_zone_expire_secs:
             Device.reset_passthru_zone_delay()
 
-        iosapp_data_handler.check_iosapp_state_trigger_change(Device)
+        # The iOS App entities are only checked when a state change was received
+        # (or they are being polled because the state change listener is not running)
+        if (iosapp_state_listener.is_iosapp_polling_needed(Device)
+                or iosapp_state_listener.is_iosapp_mailbox_empty(Device) is False
+                or Device.iosapp_data_state == NOT_SET):
+            iosapp_states = iosapp_state_listener.drain_iosapp_mailbox(Device, IOSAPP_LOCATION_ENTITIES)
+            with Gb.LoopStats.timer(LOOP_PHASE_IOSAPP_CHECK, Device):
+                iosapp_data_handler.check_iosapp_state_trigger_change(Device, iosapp_states)
+        else:
+            Device.iosapp_data_updated_flag = False
 
         # Turn off monitoring the iOSApp if excessive errors
         if Device.iosapp_data_invalid_error_cnt > 50:
@@ -381,9 +502,6 @@ class iCloud3:
             self._validate_new_iosapp_data(Device)
             self.process_updated_location_data(Device, IOSAPP_FNAME)
 
-        # Send a location request to device if needed
-        iosapp_data_handler.check_if_iosapp_is_alive(Device)
-
         # Refresh the EvLog if this is an initial locate
         if self.initial_locate_complete_flag == False:
             if devicename == Gb.Devices[0].devicename:
@@ -413,8 +531,11 @@ class iCloud3:
         if icloud_data_handler.should_ic3_device_and_sensors_be_updated(Device) is False:
             return
 
-        # Update device info. Get data from FmF or FamShr
-        icloud_data_handler.request_icloud_data_update(Device)
+        # Update device info. Get data from FmF or FamShr. Only one Device refreshes
+        # the iCloud data at a time, the others will use the data just received.
+        with Gb.DeviceUpdatePool.icloud_refresh_lock:
+            with Gb.LoopStats.timer(LOOP_PHASE_ICLOUD_REFRESH, Device):
+                icloud_data_handler.request_icloud_data_update(Device)
 
         # Do not redisplay update reason if in error retries. It has already been displayed.
         if (Device.icloud_devdata_useable_flag
@@ -436,9 +557,17 @@ class iCloud3:
         # Get in-zone name or away, will be used in process_updated_location_data routine
         # when results are calculted. We need to get it now to see if the passthru is
         # needed or still active
-        Device.selected_zone_results = self._select_zone(Device)
-        ZoneSelected, zone_selected, zone_selected_dist_m, zones_distance_list = \
-            Device.selected_zone_results
+        with Gb.LoopStats.timer(LOOP_PHASE_ZONE_SELECT, Device):
+            ZoneSelected, zone_selected, zone_selected_dist_m, zones_distance_list = \
+                self._select_zone(Device)
+
+        # The location is near the edge of the zone being exited or entered. It may be
+        # bouncing in and out of the zone, hold the zone change and recheck it later.
+        # The location is still used but the Device stays in its current zone.
+        if Device.no_location_data is False and Device.icloud_devdata_useable_flag:
+            if Gb.GeofenceHysteresis.hold_zone_change_secs(Device,
+                                    zone_selected if ZoneSelected else NOT_HOME) > 0:
+                zone_selected = Device.loc_data_zone
 
         # Entering a zone (going from not_home to a zone)
         # If entering a zone, set the passthru expire time (if needed) and the next
@@ -448,7 +577,6 @@ class iCloud3:
                     and zone_selected != NOT_HOME
                     and Device.is_stationary_trigger_reached is False):
                 if Device.set_passthru_zone_delay(ICLOUD, zone_selected, time_now_secs()):
-                    Device.selected_zone_results = []
                     return
 
             else:
@@ -473,7 +601,6 @@ class iCloud3:
                 Gb.EvLog.update_event_log_display(devicename)
 
         Device.icloud_initial_locate_done = True
-        Device.selected_zone_results = []
 
 #---------------------------------------------------------------------
     def _main_5sec_loop_update_monitored_devices(self, Device):
@@ -499,6 +626,11 @@ class iCloud3:
                     or Gb.start_icloud3_inprocess_flag):
                 return
 
+            # The battery entities are only read when they have changed
+            if (Gb.iosapp_state_change_listener_active
+                    and iosapp_state_listener.drain_iosapp_mailbox(Device, IOSAPP_BATTERY_ENTITIES) == {}):
+                return
+
             if Device.update_iosapp_battery_information():
                 event_msg = f"Battery Info > Level-{Device.format_battery_level_status_source}"
 
@@ -513,74 +645,53 @@ class iCloud3:
 #----------------------------------------------------------------------------
     def _main_5sec_loop_icloud_prefetch_control(self):
         '''
-        Update the iCloud location data if it the next_update_time will be reached
-        in the next 10-seconds
+        Update the iCloud location data just before the next_update_time of one or
+        more Devices will be reached
         '''
         if Gb.PyiCloud is None:
             return
 
-        if Device := self._get_icloud_data_prefetch_device():
-            Gb.trace_prefix = 'PREFETCH > '
-            log_start_finish_update_banner('start', Device.devicename, 'icloud prefetch', '')
-            post_monitor_msg(Device.devicename, "iCloud Location Requested (prefetch)")
+        # Skip the prefetch if a Device update is refreshing the iCloud data now. The
+        # lock is held so a Device update can not start a refresh during the prefetch.
+        if Gb.DeviceUpdatePool.icloud_refresh_lock.acquire(blocking=False) is False:
+            return
 
-            Device.icloud_devdata_useable_flag = \
-                icloud_data_handler.update_PyiCloud_RawData_data(Device,
-                        results_msg_flag=Device.is_location_old_or_gps_poor)
+        try:
+            if prefetch_Devices := self._get_icloud_data_prefetch_devices():
+                Device = prefetch_Devices[0]
+                Gb.IcloudPrefetchPlanner.prefetch_started(prefetch_Devices)
 
-            log_start_finish_update_banner('finish', Device.devicename, 'icloud prefetch', '')
-            Gb.trace_prefix = ''
+                Gb.trace_prefix = 'PREFETCH > '
+                log_start_finish_update_banner('start', Device.devicename, 'icloud prefetch', '')
+                post_monitor_msg(Device.devicename, f"iCloud Location Requested (prefetch), "
+                                    f"Devices-{', '.join([_Device.devicename for _Device in prefetch_Devices])}")
+
+                Device.icloud_devdata_useable_flag = \
+                    icloud_data_handler.update_PyiCloud_RawData_data(Device,
+                            results_msg_flag=Device.is_location_old_or_gps_poor)
+
+                log_start_finish_update_banner('finish', Device.devicename, 'icloud prefetch', '')
+                Gb.trace_prefix = ''
+
+        finally:
+            Gb.DeviceUpdatePool.icloud_refresh_lock.release()
 
 #----------------------------------------------------------------------------
     def _main_5sec_loop_special_time_control(self):
         '''
-        Various functions that are run based on the time-of-day
+        Various functions that are run based on the time-of-day. The hourly, daily,
+        every minute, 15-min and 30-min tasks are run by the PeriodicTaskRegistry.
         '''
-
-        time_now_mmss = Gb.this_update_time[-5:]
-        time_now_ss   = Gb.this_update_time[-2:]
-        time_now_mm   = Gb.this_update_time[3:5] if time_now_ss == '00' else ''
-
-        # Every hour
-        if time_now_mmss == '00:00':
-            self._timer_tasks_every_hour()
-
-        # At midnight
-        if Gb.this_update_time == '00:00:00':
-            self._timer_tasks_midnight()
-
-        # At 1am
-        elif Gb.this_update_time == '01:00:00':
-            calculate_time_zone_offset()
+        Gb.PeriodicTasks.run_due_tasks()
 
         if (Gb.this_update_secs >= Gb.EvLog.clear_secs):
             Gb.EvLog.update_event_log_display(show_one_screen=True)
 
-        # Every minute
-        if time_now_ss == '00':
-            for Device in Gb.Devices_by_devicename.values():
-                Device.display_info_msg(Device.format_info_msg)
-
-            close_reopen_ic3_debug_log_file()
-
-        # Every 15-minutes
-        if time_now_mm in ['00', '15', '30', '45']:
-            if Gb.log_debug_flag:
-                for devicename, Device in Gb.Devices_by_devicename_tracked.items():
-                    Device.log_data_fields()
-
-            # Close and reopen icloud3-debug.log file so all records are written
-            # if last record was written within the last 15-minutes
-            # close_reopen_ic3_debug_log_file(closed_by='iCloud3 Commit Log Records')
-
-        # Every 1/2-hour
-        if time_now_mm in ['00', '30']:
-            for devicename, Device in Gb.Devices_by_devicename.items():
-                if Device.dist_apart_msg:
-                    event_msg =(f"Nearby Devices (<{NEAR_DEVICE_DISTANCE}m) > "
-                                f"{Device.dist_apart_msg}, "
-                                f"Checked-{secs_to_time(Device.near_device_checked_secs)}")
-                    post_event(devicename, event_msg)
+        # Run the tasks that were deferred when the loop was overloaded
+        if Gb.LoopLoadControl.is_task_runnable(SHED_INFO_MSG_REFRESH, task_due_flag=False):
+            self._display_all_devices_info_msg()
+        if Gb.LoopLoadControl.is_task_runnable(SHED_NEARBY_DEVICES_MSG, task_due_flag=False):
+            self._post_nearby_devices_msg()
 
         if (Gb.PyiCloud is not None
                 and Gb.this_update_secs >= Gb.authentication_error_retry_secs):
@@ -809,9 +920,10 @@ class iCloud3:
                 # with good data (hopefully). Update interval, next_update_time values and sensors with the time
                 det_interval.determine_interval_after_error(Device, counter=OLD_LOC_POOR_GPS_CNT)
 
-                Device.write_ha_sensors_state()
-                Device.write_ha_device_from_zone_sensors_state()
-                Device.write_ha_device_tracker_state()
+                with Gb.LoopStats.timer(LOOP_PHASE_SENSOR_WRITE, Device):
+                    Device.write_ha_sensors_state()
+                    Device.write_ha_device_from_zone_sensors_state()
+                    Device.write_ha_device_tracker_state()
 
             # Refresh the EvLog if this is an initial locate
             if (self.initial_locate_complete_flag == False
@@ -857,15 +969,21 @@ class iCloud3:
             self._post_before_update_monitor_msg(Device)
 
             if self._calculate_interval_and_next_update(Device):
+                # Recheck a held zone change at the recheck time, not the zone's interval
+                recheck_secs = Gb.GeofenceHysteresis.recheck_secs(Device)
+                if 0 < recheck_secs < Device.next_update_secs - Gb.this_update_secs:
+                    det_interval.update_all_device_fm_zone_sensors_interval(Device, recheck_secs)
+
                 Device.update_sensor_values_from_data_fields()
 
             event_msg =(f"{EVLOG_UPDATE_END}{update_requested_by} update completed > "
                         f"Date source - {Device.dev_data_source}")
             post_event(devicename, event_msg)
 
-        Device.write_ha_sensors_state()
-        Device.write_ha_device_from_zone_sensors_state()
-        Device.write_ha_device_tracker_state()
+        with Gb.LoopStats.timer(LOOP_PHASE_SENSOR_WRITE, Device):
+            Device.write_ha_sensors_state()
+            Device.write_ha_device_from_zone_sensors_state()
+            Device.write_ha_device_tracker_state()
 
         self._post_after_update_monitor_msg(Device)
 
@@ -923,10 +1041,16 @@ class iCloud3:
             # Cycle thru each Track From Zone get the interval and all other data
             devicename = Device.devicename
 
+            # Request the Waze routes for all of the Track From Zones at the same time
+            Gb.WazeRouteFanout.request_device_routes(Device)
+
             for from_zone, DeviceFmZone in Device.DeviceFmZones_by_zone.items():
                 log_start_finish_update_banner('start', devicename, Device.dev_data_source, from_zone)
 
-                det_interval.determine_interval(Device, DeviceFmZone)
+                with Gb.LoopStats.timer(LOOP_PHASE_DETERMINE_INTERVAL, Device):
+                    det_interval.determine_interval(Device, DeviceFmZone)
+
+            Gb.WazeRouteFanout.release_device_routes(Device)
 
             self._set_tracked_devicefmzone_to_dislpay(Device)
 
@@ -999,8 +1123,6 @@ class iCloud3:
         Get current zone of the device based on the location
 
         Parameters:
-            selected_zone_results - The zone may have already been selected. If so, this list
-                            is the results from a previous _select_zone
             display_zone_msg - True if the msg should be posted to the Event Log
 
         Returns:
@@ -1012,15 +1134,11 @@ class iCloud3:
         calling hass on all polls
         '''
 
-        # Zone selected may have been done when determing if the device just entered a zone
-        # during the passthru check. If so, use it and then reset it
-        if Device.selected_zone_results == []:
+        # The zone may have already been selected when determing if the device just entered
+        # a zone during the passthru check. If so, the results are in the ZoneSelectCache.
+        with Gb.LoopStats.timer(LOOP_PHASE_ZONE_SELECT, Device):
             ZoneSelected, zone_selected, zone_selected_dist_m, zones_distance_list = \
                 self._select_zone(Device)
-        else:
-            ZoneSelected, zone_selected, zone_selected_dist_m, zones_distance_list = \
-                Device.selected_zone_results
-            Device.selected_zone_results = []
 
         if zone_selected == 'unknown':
             return ZoneSelected, zone_selected
@@ -1036,13 +1154,12 @@ class iCloud3:
         elif is_statzone(zone_selected) is False and Device.StatZone.is_at_base is False:
             Device.stationary_zone_update_control = STAT_ZONE_MOVE_TO_BASE
 
-        zones_distance_list.sort()
-        zones_distance_list = ', '.join([v.split('|')[1] for v in zones_distance_list])
-
+        # The nearest zones text is only built when it is displayed. It is saved in the
+        # ZonesDistanceList, which is reused while the Device stays at this location.
         if display_zone_msg:
             selected_zone_msg   = f"-{format_dist_m(zone_selected_dist_m)}/r{ZoneSelected.radius_m:.0f}m" \
                                     if ZoneSelected.radius_m > 0 else ''
-            other_zones_msg     = f" > {zones_distance_list}" \
+            other_zones_msg     = f" > {zones_distance_list.display_text()}" \
                                     if zone_selected == NOT_HOME or is_statzone(zone_selected) else ''
 
             zones_msg =(f"Zone > "
@@ -1052,15 +1169,22 @@ class iCloud3:
                         f", GPS-{Device.loc_data_fgps}")
             post_event(Device.devicename, zones_msg)
 
-            if other_zones_msg == '':
+            if other_zones_msg == '' and Gb.evlog_trk_monitors_flag:
                 zones_msg =(f"Zone > "
                             f"{ZoneSelected.display_as} > "
-                            f"{zones_distance_list}")
+                            f"{zones_distance_list.display_text()}")
                 post_monitor_msg(Device.devicename, zones_msg)
 
+        # The zone change from the iCloud location is held by the geofence hysteresis,
+        # keep the current zone until it is rechecked
+        if (Device.is_data_source_IOSAPP is False
+                and Gb.GeofenceHysteresis.is_zone_change_held(Device, zone_selected)):
+            zone_selected = Device.loc_data_zone
+            ZoneSelected  = Gb.Zones_by_zone[Device.loc_data_zone]
+
         # Get distance between zone selected and current zone to see if they overlap.
         # If so, keep the current zone
-        if (zone_selected != NOT_HOME
+        elif (zone_selected != NOT_HOME
                 and self._is_overlapping_zone(Device.loc_data_zone, zone_selected)):
             zone_selected = Device.loc_data_zone
             ZoneSelected  = Gb.Zones_by_zone[Device.loc_data_zone]
@@ -1085,7 +1209,7 @@ class iCloud3:
             ZoneSelected - Zone selected object or None
             zone_selected - zone entity name
             zone_selected_distance_m - distance to the zone (meters)
-            zones_distance_list - list of zone info [distance_m|zoneName-distance]
+            zones_distance_list - ZonesDistanceList, nearest zones 'zoneName-distance' text
         '''
 
         if latitude is None:
@@ -1104,19 +1228,33 @@ class iCloud3:
             post_event(Device.devicename, zones_msg)
             return ZoneSelected, zone_selected, 0, []
 
+        # The Device has not moved (more than a few meters) and the zones have not changed
+        # since the zone was last selected at this location
+        selected_zone_results = Gb.ZoneSelectCache.get_results(Device, latitude, longitude)
+        if selected_zone_results is not None:
+            return selected_zone_results
+
         # Build table of zones, distance, radius
         # all_zones_data = [[Zone.distance_m(latitude, longitude), Zone, Zone.zone, Zone.radius_m, Zone.display_as, Zone.passive]
         #                         for Zone in Gb.Zones
         #                         if (Zone.passive is False and Zone.radius_m > 1)]
 
-        zones_data = [[Zone.distance_m(latitude, longitude), Zone, Zone.zone, Zone.radius_m, Zone.display_as]
-                                for Zone in Gb.Zones
+        # Only the zones near the location (from the zone spatial index) and the Device's
+        # Stationary Zone can contain it
+        if Gb.ZoneIndex is None:
+            CandidateZones = Gb.Zones
+        else:
+            CandidateZones = Gb.ZoneIndex.candidate_zones(latitude, longitude)
+            if Device.StatZone is not None:
+                CandidateZones.append(Device.StatZone)
+
+        # Select zones the device is in. The exact distance is only calculated for them.
+        inzone_zones = [[Zone.distance_m(latitude, longitude), Zone, Zone.zone, Zone.radius_m, Zone.display_as]
+                                for Zone in CandidateZones
                                 if (Zone.passive is False
                                     and Zone.radius_m > 1
-                                    and Device.is_my_stat_zone(Zone))]
-
-        # Select zones the device is in
-        inzone_zones = [zone_data for zone_data in zones_data if zone_data [0] <= zone_data[3]]
+                                    and Device.is_my_stat_zone(Zone)
+                                    and Zone.is_location_in_zone(latitude, longitude))]
 
         # Get the smallest zone
         for zone_data in inzone_zones:
@@ -1127,11 +1265,13 @@ class iCloud3:
         zone_selected = zone_data_selected[2]
         zone_selected_dist_m = zone_data_selected[0]
 
-        # diisplay_as = Device.StatZone.dislay_as if is_statzone(zone_selected) else zone_data_selected[1]
-        zones_distance_list = [f"{int(zone_data[0]):08}| {zone_data[4]}-{format_dist_m(zone_data[0])}"
-                                    for zone_data in zones_data]
+        # The nearest zones list is only built when it is displayed in the EvLog
+        zones_distance_list = ZonesDistanceList(Device, latitude, longitude)
 
-        return ZoneSelected, zone_selected, zone_selected_dist_m, zones_distance_list
+        selected_zone_results = (ZoneSelected, zone_selected, zone_selected_dist_m, zones_distance_list)
+        Gb.ZoneSelectCache.save_results(Device, latitude, longitude, selected_zone_results)
+
+        return selected_zone_results
 
     def x_select_zone(self, Device, latitude=None, longitude=None):
         '''
@@ -1271,51 +1411,23 @@ class iCloud3:
             return False
 
 #--------------------------------------------------------------------
-    def _get_icloud_data_prefetch_device(self):
+    def _get_icloud_data_prefetch_devices(self):
         '''
-        Get the time (secs) until the next update for any device. This is used to determine
-        when icloud data should be prefetched before it is needed.
+        Get the Devices that should have their iCloud data prefetched now. The
+        IcloudPrefetchPlanner starts the refresh the learned round trip time before
+        the earliest update and batches the other Devices due in the window.
 
         Return:
-            Device that will be updated in 5-secs
+            [Devices] - The first Device requests the refresh, [] if none
         '''
-        # At least 10-secs between prefetch refreshes
-        if (secs_since(Gb.pyicloud_refresh_time[FAMSHR]) < 10
-                and secs_since(Gb.pyicloud_refresh_time[FMF]) < 10):
-            return None
-
-        prefetch_before_update_secs = 5
-        for Device in Gb.Devices_by_devicename_tracked.values():
-            if Device.icloud_initial_locate_done is False:
-                return Device
-
-            if (Device.is_tracking_method_IOSAPP
-                    or Device.is_tracking_paused):
-                    # or Device.is_offline
-                    # or Device.NearDevice):
-                continue
-
-            secs_to_next_update = secs_to(Device.next_update_secs)
-
-            if Device.inzone_interval_secs < -15 or Device.inzone_interval_secs > 15:
-                continue
-
-            # If going towards a TrackFmZone and the next update is in 15-secs or less and distance < 1km
-            # and current location is older than 15-secs, prefetch data now
-            if (Device.DeviceFmZoneTracked.is_going_towards
-                    and Device.DeviceFmZoneTracked.zone_dist < 1
-                    and secs_since(Device.loc_data_secs > 15)):
-                Device.old_loc_threshold_secs = 15
-                return Device
-
-            if Device.is_location_gps_good:
-                continue
+        prefetch_Devices = Gb.IcloudPrefetchPlanner.get_prefetch_devices()
 
-            # Updating the device in the next 10-secs
-            Device.display_info_msg(f"Requesting iCloud Location, Next Update in {secs_to_time_str(secs_to_next_update)} secs")
-            return Device
+        for Device in prefetch_Devices:
+            if Device.icloud_initial_locate_done:
+                secs_to_next_update = secs_to(Device.next_update_secs)
+                Device.display_info_msg(f"Requesting iCloud Location, Next Update in {secs_to_time_str(secs_to_next_update)} secs")
 
-        return None
+        return prefetch_Devices
 
 #--------------------------------------------------------------------
     def _display_icloud_acct_error_msg(self, Device):
@@ -1379,19 +1491,6 @@ class iCloud3:
         '''
         return f"{devicename}_stationary" if zone == STATIONARY else zone
 
-#--------------------------------------------------------------------
-    def _wait_if_update_in_process(self, Device=None):
-        # An update is in process, must wait until done
-
-        wait_cnt = 0
-        # while Gb.master_update_in_process_flag:
-        while self.loop_ctrl_master_update_in_process_flag:
-            wait_cnt += 1
-            if Device:
-                Device.write_ha_sensor_state(INTERVAL, (f"WAIT-{wait_cnt}"))
-
-            time.sleep(2)
-
 #--------------------------------------------------------------------
     def _post_before_update_monitor_msg(self, Device):
         """ Post a monitor msg for all other devices with this device's update reason """
@@ -1491,6 +1590,69 @@ class iCloud3:
 #   Perform tasks on a regular time schedule
 #
 #<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>
+    def _register_periodic_tasks(self):
+        '''
+        Add the time-of-day tasks to the PeriodicTaskRegistry. Tasks due at the same
+        time are run in the order they are registered.
+        '''
+        Gb.PeriodicTasks.register('every_hour', self._timer_tasks_every_hour, 3600)
+        Gb.PeriodicTasks.register('midnight', self._timer_tasks_midnight, 86400)
+        Gb.PeriodicTasks.register('time_zone_offset', calculate_time_zone_offset, 86400, offset_secs=3600)
+        Gb.PeriodicTasks.register('every_minute', self._timer_tasks_every_minute, 60)
+        Gb.PeriodicTasks.register('every_15_minutes', self._timer_tasks_every_15_minutes, 900)
+        Gb.PeriodicTasks.register('nearby_devices_msg', self._timer_tasks_nearby_devices_msg, 1800)
+
+#--------------------------------------------------------------------
+    def _timer_tasks_every_minute(self):
+        # Deferred when the loop is overloaded
+        if Gb.LoopLoadControl.is_task_runnable(SHED_INFO_MSG_REFRESH):
+            self._display_all_devices_info_msg()
+
+        # Pick up any next update time changes not made through the scheduler
+        Gb.DeviceScheduler.schedule_all_devices()
+        Gb.LoopStats.update_loop_stats_sensor()
+
+        close_reopen_ic3_debug_log_file()
+
+    def _display_all_devices_info_msg(self):
+        for Device in Gb.Devices_by_devicename.values():
+            Device.display_info_msg(Device.format_info_msg)
+
+#--------------------------------------------------------------------
+    def _timer_tasks_every_15_minutes(self):
+        if Gb.log_debug_flag is False:
+            return
+
+        for devicename, Device in Gb.Devices_by_devicename_tracked.items():
+            Device.log_data_fields()
+        Gb.DeviceScheduler.log_schedule()
+        Gb.LoopStats.log_loop_stats()
+        Gb.LoopLoadControl.log_load_control()
+        Gb.IcloudPrefetchPlanner.log_prefetch_stats()
+        Gb.PeriodicTasks.log_task_stats()
+        Gb.ZoneDistanceCache.log_cache_stats()
+        Gb.ZoneSelectCache.log_cache_stats()
+        Gb.NearDeviceClusters.log_clusters()
+        if Gb.Waze:
+            Gb.Waze.log_request_stats()
+        Gb.WazeRouteFanout.log_fanout_stats()
+        Gb.WazeRouteCache.log_cache_stats()
+
+#--------------------------------------------------------------------
+    def _timer_tasks_nearby_devices_msg(self):
+        # Deferred when the loop is overloaded
+        if Gb.LoopLoadControl.is_task_runnable(SHED_NEARBY_DEVICES_MSG):
+            self._post_nearby_devices_msg()
+
+    def _post_nearby_devices_msg(self):
+        for devicename, Device in Gb.Devices_by_devicename.items():
+            if Device.dist_apart_msg:
+                event_msg =(f"Nearby Devices (<{NEAR_DEVICE_DISTANCE}m) > "
+                            f"{Device.dist_apart_msg}, "
+                            f"Checked-{secs_to_time(Device.near_device_checked_secs)}")
+                post_event(devicename, event_msg)
+
+#--------------------------------------------------------------------
     def _timer_tasks_every_hour(self):
         for Device in Gb.Devices_by_devicename.values():
             self._display_usage_counts(Device)
@@ -19,6 +19,7 @@ from .global_variables  import GlobalVariables as Gb
 from .const             import (DOMAIN, VERSION,
                                 SENSOR_EVENT_LOG_NAME,
                                 SENSOR_WAZEHIST_TRACK_NAME,
+                                SENSOR_LOOP_STATS_NAME,
                                 HOME, NOT_SET, NOT_SET_FNAME, NONE_FNAME,
                                 DATETIME_ZERO, HHMMSS_ZERO,
                                 BLANK_SENSOR_FIELD, DOT, UM_FNAME,
@@ -91,6 +92,13 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry, async_add_e
             else:
                 log_error_msg("Error setting up Waze History Track Sensor")
 
+        if Gb.LoopStatsSensor is None:
+            Gb.LoopStatsSensor = Sensor_LoopStats('iCloud3 Loop Stats', SENSOR_LOOP_STATS_NAME)
+            if Gb.LoopStatsSensor:
+                NewSensors.append(Gb.LoopStatsSensor)
+            else:
+                log_error_msg("Error setting up Loop Stats Sensor")
+
         # Create the selected sensors for each devicename
         # Cycle through each device being tracked or monitored and create it's sensors
         for conf_device in Gb.conf_devices:
@@ -1137,6 +1145,7 @@ class Support_SensorBase(SensorEntity):
     ''' iCloud Support Sensor Base
         - Event Log
         - Waze History Track
+        - Loop Stats
     '''
 
     def __init__(self, fname, entity_name):
@@ -1283,4 +1292,33 @@ class Sensor_WazeHistTrack(Support_SensorBase):
                 'friendly_name': 'WazeHist'}
 
 
+#<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>
+class Sensor_LoopStats(Support_SensorBase):
+    '''iCloud 5-sec Loop Phase Timing Statistics Sensor.'''
+
+    @property
+    def icon(self):
+        return 'mdi:timer-cog-outline'
+
+    @property
+    def native_value(self):
+        '''State value - 5-sec loop p95 time (msecs)'''
+        if Gb.LoopStats is None:
+            return 'Not Used'
+
+        return Gb.LoopStats.loop_p95_msecs
+
+    @property
+    def native_unit_of_measurement(self):
+        return 'ms'
+
+    @property
+    def extra_state_attributes(self):
+        '''Return the p50/p95/max times for each loop phase and device.'''
+        if Gb.LoopStats is None:
+            return None
+
+        return Gb.LoopStats.stats_attrs
+
+
 #<><><><><><><><><><><><><><><><><><><><><><><><><><><><><><><><><><><><><
@@ -20,6 +20,10 @@ from ..const                import (
                                     CONF_WAZE_USED, CONF_WAZE_REGION, CONF_WAZE_MAX_DISTANCE, CONF_DISTANCE_METHOD,
                                     WAZE_SERVERS_BY_COUNTRY_CODE, WAZE_SERVERS_FNAME,
                                     CONF_EXCLUDED_SENSORS, CONF_OLD_LOCATION_ADJUSTMENT, CONF_DISTANCE_BETWEEN_DEVICES,
+                                    CONF_LOAD_SHEDDING, LOAD_SHEDDING_NORMAL,
+                                    CONF_ZONE_HYSTERESIS, HYST_ALL_ZONES,
+                                    CONF_WAZE_ROUTE_CACHE_SIZE, CONF_WAZE_ROUTE_CACHE_TIME,
+                                    CONF_WAZE_HISTORY_MATCH_RADIUS, CONF_WAZE_HISTORY_NEAREST_CNT,
                                     RANGE_DEVICE_CONF, RANGE_GENERAL_CONF, MIN, MAX, STEP, RANGE_UM,
                                     )
 
@@ -220,6 +224,31 @@ def check_config_file_new_parameters_beta():
     update_config_file_flag = (_add_config_file_parameter(Gb.conf_general, CONF_EXIT_ZONE_INTERVAL, 3)
             or update_config_file_flag)
 
+    # Add CONF_LOAD_SHEDDING
+    update_config_file_flag = (_add_config_file_parameter(Gb.conf_general, CONF_LOAD_SHEDDING, LOAD_SHEDDING_NORMAL)
+            or update_config_file_flag)
+
+    # Add CONF_ZONE_HYSTERESIS
+    update_config_file_flag = (_add_config_file_parameter(Gb.conf_general, CONF_ZONE_HYSTERESIS,
+                {HYST_ALL_ZONES: DEFAULT_GENERAL_CONF[CONF_ZONE_HYSTERESIS][HYST_ALL_ZONES].copy()})
+            or update_config_file_flag)
+
+    # Add CONF_WAZE_ROUTE_CACHE_SIZE, CONF_WAZE_ROUTE_CACHE_TIME
+    update_config_file_flag = (_add_config_file_parameter(Gb.conf_general, CONF_WAZE_ROUTE_CACHE_SIZE,
+                DEFAULT_GENERAL_CONF[CONF_WAZE_ROUTE_CACHE_SIZE])
+            or update_config_file_flag)
+    update_config_file_flag = (_add_config_file_parameter(Gb.conf_general, CONF_WAZE_ROUTE_CACHE_TIME,
+                DEFAULT_GENERAL_CONF[CONF_WAZE_ROUTE_CACHE_TIME])
+            or update_config_file_flag)
+
+    # Add CONF_WAZE_HISTORY_MATCH_RADIUS, CONF_WAZE_HISTORY_NEAREST_CNT
+    update_config_file_flag = (_add_config_file_parameter(Gb.conf_general, CONF_WAZE_HISTORY_MATCH_RADIUS,
+                DEFAULT_GENERAL_CONF[CONF_WAZE_HISTORY_MATCH_RADIUS])
+            or update_config_file_flag)
+    update_config_file_flag = (_add_config_file_parameter(Gb.conf_general, CONF_WAZE_HISTORY_NEAREST_CNT,
+                DEFAULT_GENERAL_CONF[CONF_WAZE_HISTORY_NEAREST_CNT])
+            or update_config_file_flag)
+
 
     # Remove CONF_ZONE_SENSOR_EVLOG_FORMAT, Add CONF_ZONE_SENSOR_EVLOG_FORMAT
     dtf = 'zone'
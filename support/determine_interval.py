@@ -824,6 +824,10 @@ def update_all_device_fm_zone_sensors_interval(Device, interval, DeviceFmZone=No
         if Device.StatZone.timer_expired:
             Device.StatZone.timer = next_update_secs
 
+    # Move the Device in the scheduler queue to the new next update time
+    if Gb.DeviceScheduler:
+        Gb.DeviceScheduler.schedule_device(Device)
+
 #<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>
 #
 #  PROCESS PASS THRU ZONE DELAY (1-MINUTE)
@@ -1076,139 +1080,44 @@ def _get_interval_for_error_retry_cnt(Device, counter=OLD_LOC_POOR_GPS_CNT, paus
 #<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>
 def update_nearby_device_info(Device):
     '''
-    Cycle through the devices and see if this device is in the same location as
-    another device updated earlier in this 5-sec polling loop.
-
-    Return: The closest device
+    Get the Device's NearDevice (the closest Device ranked ahead of it in its cluster) and
+    build the distance to the other devices message.
 
-    {devicename: [dist_m, gps_accuracy_factor, display_text]}
+    Gb.DeviceDistances row - {devicename: [dist_m, min_gps_accuracy]}
     '''
+    dist_to_other_devices = Gb.DeviceDistances.row(Device)
     if (len(Gb.Devices) == 1
-            or len(Device.dist_to_other_devices) == 0
+            or len(dist_to_other_devices) == 0
             or Gb.distance_between_device_flag is False):
         return
 
-    closest_device_distance     = HIGH_INTEGER
     Device.dist_apart_msg       = ''
-    Device.NearDevice           = None
+    Device.NearDevice           = Gb.NearDeviceClusters.near_device(Device)
     Device.near_device_distance = 0
     Device.near_device_checked_secs = time_now_secs()
 
-    for devicename, dist_to_other_devices in Device.dist_to_other_devices.items():
+    if Device.NearDevice:
+        Device.near_device_distance = dist_to_other_devices[Device.NearDevice.devicename][0]
+
+    for devicename, (dist_m, min_gps_accuracy) in dist_to_other_devices.items():
         _Device = Gb.Devices_by_devicename[devicename]
 
-        dist_m, gps_accuracy_factor, display_text = dist_to_other_devices
+        gps_accuracy_factor = Gb.DeviceDistances.gps_accuracy_factor(dist_m, min_gps_accuracy)
+        display_text        = Gb.DeviceDistances.display_text(dist_m, min_gps_accuracy)
+
         reason_symbol = ''
         if gps_accuracy_factor > NEAR_DEVICE_DISTANCE:
             reason_symbol = '±'     #∓
-        # elif display_text == '0m/±0m':
-        #     reason_symbol = '⊘'
-        elif _Device.NearDevice is Device:
-            reason_symbol = '⌘'
-        elif _check_near_device_circular_loop(_Device, Device) is False:
+        elif Gb.NearDeviceClusters.is_using_device(Device, _Device):
             reason_symbol = '⌘'
         elif Device.is_inzone_stationary or _Device.is_inzone_stationary:
             reason_symbol = '$'
 
-        if (dist_m > NEAR_DEVICE_DISTANCE
-                or gps_accuracy_factor > NEAR_DEVICE_DISTANCE
-                or display_text == '0m/±0m'
-                or _Device.NearDevice is Device
-                or _check_near_device_circular_loop(_Device, Device) is False
-                or Device.is_inzone_stationary
-                or _Device.is_inzone_stationary):
-            nearby_symbol = '⊗'
-        else:
-            nearby_symbol = ''
+        nearby_symbol = '' if _Device is Device.NearDevice else '⊗'
 
         Device.dist_apart_msg += f"{nearby_symbol}{_Device.fname_devtype}-{display_text}{reason_symbol}, "
 
-        # The nearby devices can not point to each other and other criteria
-        # if (((Device.is_tracked and _Device.is_tracked) or _Device.is_monitored)
-        if (Device.is_tracked
-                and _Device.is_tracked
-                and nearby_symbol == ''
-                and _Device.DeviceFmZoneHome.interval_secs > 0
-                and _Device.old_loc_poor_gps_cnt == 0
-                and _Device.is_online):
-
-            if dist_m < closest_device_distance:
-                closest_device_distance = dist_m
-                Device.NearDevice = _Device
-                Device.near_device_distance = dist_m
-
     monitor_msg = f"Nearby Devices (<{NEAR_DEVICE_DISTANCE}m) > {Device.dist_apart_msg}"
     post_monitor_msg(Device.devicename, monitor_msg)
 
     return
-
-#--------------------------------------------------------------------------------
-def _check_near_device_circular_loop(_Device, Device):
-    '''
-    Make sure the eligible nearbe device is not used by another device(s) that ends
-    up referencing the Device being updated, creating a circular loop back to itself
-    '''
-    if _Device.NearDevice is None:
-        return True
-
-    next_Device_to_check = _Device.NearDevice
-    checked_Devices = []
-    near_devices_msg = f"{_Device.devicename}{RARROW}{next_Device_to_check.devicename}"
-    log_debug_base_msg = f"Check Nearby Device-{_Device.devicename}"
-    reason_msg = ''
-
-    check_start_time_secs = time_now_secs()
-    cnt = 0
-    can_use_device = False
-
-    while can_use_device is False:     #next_Device_to_check is not Device:
-        # Make sure the loop will not hang
-        cnt += 1
-        if cnt > len(Gb.Devices):
-            reason_msg = f"DeviceCnt-{cnt} > {len(Gb.Devices)}"
-            break
-
-        # Make sure the loop does not hang by only running 5-secs
-        if secs_since(check_start_time_secs) > 5:
-            reason_msg = 'Running more than 10-secs'
-            break
-
-        # If the next_NearDevice will loop back to a device that has already been checked,
-        # do not use the _Device.NearDevice
-        if next_Device_to_check.NearDevice in checked_Devices:
-            near_devices_msg += f"{RARROW}{_Device.devicename}"
-            reason_msg = 'Looped back to itself'
-            break
-
-        # If the next_NearDevice circles back to the _Device originally being checked,
-        # do not use the _Device.NearDevice
-        if next_Device_to_check.NearDevice is _Device:
-            near_devices_msg += f"{RARROW}{_Device.devicename}"
-            reason_msg = 'Looped back to start'
-            break
-
-        # If the NearDevice cycle ends, it's OK to use the current _Device
-        if (next_Device_to_check is None
-                or next_Device_to_check.NearDevice is None):
-            near_devices_msg += f"{RARROW}None"
-            can_use_device = True
-            break
-
-        near_devices_msg += f"{RARROW}{next_Device_to_check.NearDevice.devicename}"
-        next_Device_to_check = next_Device_to_check.NearDevice
-        checked_Devices.append(next_Device_to_check.NearDevice)
-        log_msg = ( f"{log_debug_base_msg}, Checking, "
-                    f"Cnt-{cnt}, "
-                    f"Timer-{secs_since(check_start_time_secs)} secs, "
-                    f"{near_devices_msg}")
-        log_debug_msg(Device.devicename, log_msg)
-
-    # The loop was broken out of
-    can_cannot_msg = 'CanUse' if can_use_device else f"CanNotUse, {reason_msg}"
-    log_msg = ( f"{log_debug_base_msg}, "
-                f"{can_cannot_msg}, "
-                f"Cnt-{cnt}, "
-                f"Timer-{secs_since(check_start_time_secs)} secs, "
-                f"{near_devices_msg}")
-    log_debug_msg(Device.devicename, log_msg)
-    return can_use_device
@@ -0,0 +1,165 @@
+#<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>
+#
+#   DEVICE DISTANCE MATRIX
+#
+#   Each Device kept its own dist_to_other_devices dictionary. When a Device was
+#   located, the distance, gps accuracy factor and display text were built for
+#   every other Device, compared to the values in both Devices' dictionaries and
+#   saved in both of them.
+#
+#   The distances between the Devices are now kept in one symmetric matrix. The
+#   [distance_m, min gps accuracy] entry for a pair of Devices is shared by both
+#   Device's rows so only the row (and column) of the Device that was located is
+#   updated. The gps accuracy factor and display text are built from the entry
+#   when the distance sensors are written and when the nearby devices are
+#   checked.
+#
+#   Usage:
+#       Gb.DeviceDistances.update_device(Device)
+#       Gb.DeviceDistances.row(Device) - {devicename: [distance_m, min_gps_accuracy]}
+#       Gb.DeviceDistances.dist_to_other_devices(Device)
+#               - {devicename: [distance_m, gps_accuracy_factor, display_text]}
+#       Gb.DeviceDistances.pop_sensor_update_devicenames()
+#               - Devices whose distance sensors need to be written
+#
+#   update_device is run by the DeviceUpdatePool worker threads. The matrix
+#   entries and the Gb.dist_to_other_devices_update_sensor_list are changed
+#   while holding the matrix lock.
+#
+#<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>
+
+from ..global_variables     import GlobalVariables as Gb
+from ..const                import (NEAR_DEVICE_DISTANCE, )
+from ..helpers.messaging    import (log_exception, _trace, _traceha, )
+from ..helpers.time_util    import (secs_since, datetime_now, )
+
+import threading
+
+
+#<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>
+class DeviceDistanceMatrix(object):
+
+    def __init__(self):
+        self.rows = {}      # {devicename: {other devicename: [distance_m, min_gps_accuracy]}}
+                            # rows[a][b] and rows[b][a] are the same list
+        self._lock = threading.Lock()
+
+    def __repr__(self):
+        return f"<DeviceDistanceMatrix: Devices-{len(self.rows)}>"
+
+#--------------------------------------------------------------------
+    def initialize_device(self, Device):
+        '''
+        Set the distances from the Device to all of the other Devices to 0
+        '''
+        devicename = Device.devicename
+        self.rows[devicename] = {}
+
+        for _devicename in Gb.Devices_by_devicename.keys():
+            if _devicename != devicename:
+                self._set_pair_entry(devicename, _devicename, [0, 0])
+
+    def _set_pair_entry(self, devicename, _devicename, entry):
+        self.rows.setdefault(devicename, {})[_devicename] = entry
+        self.rows.setdefault(_devicename, {})[devicename] = entry
+
+#--------------------------------------------------------------------
+    def row(self, Device):
+        '''
+        Return:
+            {devicename: [distance_m, min_gps_accuracy]} for the Devices that are set up.
+            The entries are copies, a worker may be updating them.
+        '''
+        with self._lock:
+            return {_devicename: entry.copy()
+                        for _devicename, entry in self.rows.get(Device.devicename, {}).items()
+                        if _devicename in Gb.Devices_by_devicename}
+
+#--------------------------------------------------------------------
+    @staticmethod
+    def _is_location_old(Device, _Device):
+        '''
+        The distance between the Devices is not updated if either location is old, unless
+        they are both in the same zone
+        '''
+        if Device.sensor_zone == _Device.sensor_zone and Device.is_inzone:
+            return False
+
+        return ((secs_since(_Device.loc_data_secs) > _Device.old_loc_threshold_secs * 1.5)
+                    or (secs_since(Device.loc_data_secs) > Device.old_loc_threshold_secs * 1.5))
+
+#--------------------------------------------------------------------
+    def update_device(self, Device):
+        '''
+        Update the distance from the Device that was just located to the other tracked
+        Devices. The Devices whose distances changed are added to the
+        dist_to_other_devices_update_sensor_list so their sensors are updated.
+        '''
+        try:
+            devicename = Device.devicename
+            row = self.rows.setdefault(devicename, {})
+
+            for _devicename, _Device in Gb.Devices_by_devicename_tracked.items():
+                if _Device is Device or self._is_location_old(Device, _Device):
+                    continue
+
+                dist_apart_m     = _Device.distance_m_tiered(Device.loc_data_latitude, Device.loc_data_longitude)
+                min_gps_accuracy = min(Device.loc_data_gps_accuracy, _Device.loc_data_gps_accuracy)
+
+                with self._lock:
+                    entry = row.get(_devicename)
+                    if entry is None:
+                        entry = [None, None]
+                        self._set_pair_entry(devicename, _devicename, entry)
+
+                    elif entry[0] == dist_apart_m and entry[1] == min_gps_accuracy:
+                        continue
+
+                    entry[0] = dist_apart_m
+                    entry[1] = min_gps_accuracy
+
+                    Gb.dist_to_other_devices_update_sensor_list.add(devicename)
+                    Gb.dist_to_other_devices_update_sensor_list.add(_devicename)
+
+                Device.dist_to_other_devices_datetime = datetime_now()
+                Gb.NearDeviceClusters.distances_changed()
+
+        except Exception as err:
+            log_exception(err)
+
+#--------------------------------------------------------------------
+    def pop_sensor_update_devicenames(self):
+        '''
+        Return the Devices whose distance sensors need to be written and start a new
+        list. A Device updated by a worker after this is written on the next pass.
+        '''
+        with self._lock:
+            devicenames = Gb.dist_to_other_devices_update_sensor_list
+            Gb.dist_to_other_devices_update_sensor_list = set()
+
+        return devicenames
+
+#--------------------------------------------------------------------
+    @staticmethod
+    def gps_accuracy_factor(dist_apart_m, min_gps_accuracy):
+        return round(min_gps_accuracy * dist_apart_m / NEAR_DEVICE_DISTANCE)
+
+    @staticmethod
+    def display_text(dist_apart_m, min_gps_accuracy):
+        if dist_apart_m > 500:
+            return f"{dist_apart_m/1000:.1f}km/±{min_gps_accuracy}m"
+
+        return f"{dist_apart_m}m/±{min_gps_accuracy}m"
+
+#--------------------------------------------------------------------
+    def dist_to_other_devices(self, Device):
+        '''
+        Build the distance to other devices sensor value
+
+        Return:
+            {devicename: [distance_m, gps_accuracy_factor, display_text]}
+        '''
+        return {_devicename: [dist_apart_m,
+                                self.gps_accuracy_factor(dist_apart_m, min_gps_accuracy),
+                                self.display_text(dist_apart_m, min_gps_accuracy)]
+                    for _devicename, (dist_apart_m, min_gps_accuracy) in self.row(Device).items()}
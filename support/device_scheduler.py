@@ -0,0 +1,210 @@
+#<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>
+#
+#   DEVICE UPDATE SCHEDULER
+#
+#   The 5-sec polling loop used to run the iCloud update check and the
+#   info message logic for every tracked Device on every pass even though
+#   most devices are sitting in a zone waiting for an update hours away.
+#
+#   The DeviceScheduler keeps a priority queue (heapq) of the next deadline
+#   for each Device. The deadline is the earliest of:
+#       - The next update time (less the next update countdown display window)
+#       - The passthru zone delay expire time
+#       - The Stat Zone timer expire time
+#
+#   This is a due Device filter for the 5-sec loop. The loop still runs every
+#   5-secs (the info messages, countdowns, iOS App battery and the periodic
+#   tasks need it). On each pass it asks the scheduler which Devices are due and
+#   only those Devices (or ones that have been triggered by an external event or
+#   have an update pending) are processed. The other devices cost nothing.
+#   next_deadline_secs is only used for the debug log.
+#
+#   A Device whose zone change is being held by the GeofenceHysteresis has a new
+#   location that has not been used. It is not an update pending, it is due at
+#   its recheck time (next_update_secs).
+#
+#<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>
+
+from ..global_variables     import GlobalVariables as Gb
+from ..const                import (NOT_SET, HIGH_INTEGER, )
+from ..helpers.messaging    import (log_debug_msg, log_exception, _trace, _traceha, )
+from ..helpers.time_util    import (secs_to_time, )
+
+import heapq
+import threading
+
+# The 'Next Update' sensor displays a countdown when the update is within 90-secs.
+# The device is considered due at the start of that window so the countdown, the
+# iCloud prefetch and the old location 15-sec early update still work.
+NEXT_UPDATE_COUNTDOWN_SECS = 90
+
+
+#<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>
+class DeviceScheduler(object):
+
+    def __init__(self):
+        self._lock = threading.RLock()      # Devices are scheduled from the DeviceUpdatePool threads
+        self.initialize()
+
+    def initialize(self):
+        self.deadline_heap          = []        # [(deadline_secs, devicename)] priority queue
+        self.deadline_by_devicename = {}        # Current deadline for each device in the heap
+        self.due_devicenames        = set()     # Devices whose deadline has been reached
+        self.triggered_devicenames  = {}        # Devices woken up by an event {devicename: reason}
+
+    def __repr__(self):
+        return (f"<DeviceScheduler: Scheduled-{len(self.deadline_by_devicename)}, "
+                f"Due-{len(self.due_devicenames)}>")
+
+#--------------------------------------------------------------------
+    @staticmethod
+    def device_deadline_secs(Device):
+        '''
+        Get the earliest time this Device needs to be looked at by the 5-sec loop
+
+        Return:
+            deadline secs
+        '''
+        # A held zone change is rechecked at the next update time, not at the start
+        # of the countdown window
+        if Gb.GeofenceHysteresis and Gb.GeofenceHysteresis.is_held(Device):
+            deadline_secs = Device.next_update_secs
+        else:
+            deadline_secs = Device.next_update_secs - NEXT_UPDATE_COUNTDOWN_SECS
+
+        if Device.passthru_zone_expire_secs > 0:
+            deadline_secs = min(deadline_secs, Device.passthru_zone_expire_secs)
+
+        if (Gb.is_stat_zone_used
+                and Device.StatZone is not None
+                and Device.StatZone.timer > 0):
+            deadline_secs = min(deadline_secs, Device.StatZone.timer)
+
+        return deadline_secs
+
+#--------------------------------------------------------------------
+    def schedule_device(self, Device):
+        '''
+        Calculate the Device's deadline and add it to the queue. Any prior entry
+        for the Device is left in the heap and discarded when it is popped.
+        '''
+        try:
+            devicename    = Device.devicename
+            deadline_secs = self.device_deadline_secs(Device)
+
+            with self._lock:
+                self.due_devicenames.discard(devicename)
+                self.triggered_devicenames.pop(devicename, None)
+
+                if self.deadline_by_devicename.get(devicename) == deadline_secs:
+                    return
+
+                self.deadline_by_devicename[devicename] = deadline_secs
+                heapq.heappush(self.deadline_heap, (deadline_secs, devicename))
+
+        except Exception as err:
+            log_exception(err)
+
+#--------------------------------------------------------------------
+    def schedule_all_devices(self):
+        '''
+        Rebuild the queue from the current Device values. This picks up any
+        next update time changes that were not made through schedule_device.
+        '''
+        with self._lock:
+            due_devicenames       = self.due_devicenames
+            triggered_devicenames = self.triggered_devicenames
+
+            self.initialize()
+            for Device in Gb.Devices_by_devicename_tracked.values():
+                self.schedule_device(Device)
+
+            self.due_devicenames.update(due_devicenames & set(Gb.Devices_by_devicename_tracked))
+            self.triggered_devicenames.update(triggered_devicenames)
+
+#--------------------------------------------------------------------
+    def trigger_device(self, devicename, reason=''):
+        '''
+        Wake the Device up on the next 5-sec loop pass. Used when an external event
+        (service call, iOS App trigger, etc) needs the Device to be updated.
+        '''
+        self.triggered_devicenames[devicename] = reason
+
+#--------------------------------------------------------------------
+    def refresh_due_devices(self):
+        '''
+        Pop the heap entries whose deadline has been reached and move the device
+        to the due list. Stale entries (the device was rescheduled) are discarded.
+        '''
+        with self._lock:
+            while self.deadline_heap and self.deadline_heap[0][0] <= Gb.this_update_secs:
+                deadline_secs, devicename = heapq.heappop(self.deadline_heap)
+
+                if self.deadline_by_devicename.get(devicename) != deadline_secs:
+                    continue
+
+                self.deadline_by_devicename.pop(devicename, None)
+                self.due_devicenames.add(devicename)
+
+#--------------------------------------------------------------------
+    @staticmethod
+    def is_update_pending(Device):
+        '''
+        See if there is a non-time reason the Device needs to be looked at. These
+        are the conditions that cause an iCloud update before the next update time.
+        '''
+        return (Device.icloud_initial_locate_done is False
+                or Device.is_tracking_resumed
+                or Device.icloud_update_retry_flag
+                or Device.outside_no_exit_trigger_flag
+                or Device.sensor_zone == NOT_SET
+                or (Device.loc_data_secs > Device.last_update_loc_secs
+                        and (Gb.GeofenceHysteresis is None
+                                or Gb.GeofenceHysteresis.is_held(Device) is False)))
+
+#--------------------------------------------------------------------
+    def is_device_due(self, Device):
+        '''
+        Return:
+            True - The Device's deadline was reached, it was triggered, it has never
+                    been scheduled or it has an update pending
+            False - Nothing to do for this Device
+        '''
+        devicename = Device.devicename
+
+        return (devicename in self.due_devicenames
+                or devicename in self.triggered_devicenames
+                or devicename not in self.deadline_by_devicename
+                or self.is_update_pending(Device))
+
+#--------------------------------------------------------------------
+    @property
+    def next_deadline_secs(self):
+        '''
+        Return the secs of the earliest valid deadline in the queue
+        '''
+        with self._lock:
+            while self.deadline_heap:
+                deadline_secs, devicename = self.deadline_heap[0]
+                if self.deadline_by_devicename.get(devicename) == deadline_secs:
+                    return deadline_secs
+
+                heapq.heappop(self.deadline_heap)
+
+        return HIGH_INTEGER
+
+#--------------------------------------------------------------------
+    def log_schedule(self):
+        '''
+        Write the scheduled deadline of each Device to the debug log
+        '''
+        if Gb.log_debug_flag is False:
+            return
+
+        deadlines = ', '.join([f"{devicename}-{secs_to_time(deadline_secs)}"
+                        for devicename, deadline_secs in sorted(self.deadline_by_devicename.items(),
+                                                                key=lambda item: item[1])])
+        log_msg = ( f"Device Scheduler > NextDeadline-{secs_to_time(self.next_deadline_secs)}, "
+                    f"Due-{', '.join(sorted(self.due_devicenames)) or 'None'}, "
+                    f"Scheduled-{deadlines}")
+        log_debug_msg(log_msg)
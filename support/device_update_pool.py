@@ -0,0 +1,157 @@
+#<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>
+#
+#   DEVICE UPDATE POOL
+#
+#   The tracked devices were updated one after the other in the 5-sec loop.
+#   A slow Waze route lookup or iCloud location refresh for one device held
+#   the master update-in-process flag and pushed every other device's update
+#   back until the next pass (or until the 180-sec flag reset).
+#
+#   Each device's update is now run as a job on a small worker thread pool.
+#   A lock for each device makes sure only one update for a device is running
+#   at a time. A device that is still being updated is skipped on the next
+#   5-sec loop pass while the other devices continue to be updated.
+#
+#   Each job has its own copy of Gb.this_update_secs, this_update_time and
+#   trace_prefix, set when it is submitted (see global_variables.py).
+#
+#   A pool with max_workers=0 runs the update inline on the calling thread.
+#   This is used by the replay harness so a replay is deterministic.
+#
+#<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>
+
+from ..global_variables     import GlobalVariables as Gb
+from ..const                import (EVLOG_NOTICE, )
+from ..helpers.messaging    import (post_event, log_debug_msg, log_exception, _trace, _traceha, )
+from ..helpers.time_util    import (time_now_secs, secs_since, secs_to_time_age_str, )
+
+from concurrent.futures     import ThreadPoolExecutor
+import threading
+
+DEVICE_UPDATE_MAX_WORKERS   = 4         # Number of devices that can be updated at the same time
+DEVICE_UPDATE_STALLED_SECS  = 180       # Post a notice if a device update has been running this long
+
+
+#<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>
+class DeviceUpdatePool(object):
+
+    def __init__(self, max_workers=DEVICE_UPDATE_MAX_WORKERS):
+        self.max_workers            = max_workers
+        self.Executor               = None
+        self.lock_by_devicename     = {}    # Device update lock {devicename: threading.Lock}
+        self.started_secs_by_devicename = {}  # Device update in process {devicename: started secs}
+        self.stalled_msg_devicenames = set()  # Stalled update notice has been posted
+        self.icloud_refresh_lock    = threading.Lock()  # Only one iCloud location refresh at a time
+        self._locks_lock            = threading.Lock()
+
+    def __repr__(self):
+        return (f"<DeviceUpdatePool: Workers-{self.max_workers}, "
+                f"InProcess-{list(self.started_secs_by_devicename.keys())}>")
+
+#--------------------------------------------------------------------
+    def device_lock(self, devicename):
+        '''
+        Return the update lock for the device, create it if needed
+        '''
+        with self._locks_lock:
+            if devicename not in self.lock_by_devicename:
+                self.lock_by_devicename[devicename] = threading.Lock()
+
+            return self.lock_by_devicename[devicename]
+
+#--------------------------------------------------------------------
+    def is_device_update_in_process(self, devicename):
+        return devicename in self.started_secs_by_devicename
+
+    @property
+    def is_any_update_in_process(self):
+        return self.started_secs_by_devicename != {}
+
+#--------------------------------------------------------------------
+    def submit_device_update(self, Device, update_function):
+        '''
+        Run the Device's update function on the worker pool
+
+        Parameters:
+            Device - Device to be updated
+            update_function - function(Device) that does the update
+
+        Return:
+            True - The update was started
+            False - An update for this Device is still in process
+        '''
+        devicename = Device.devicename
+        DeviceLock = self.device_lock(devicename)
+
+        if DeviceLock.acquire(blocking=False) is False:
+            log_msg = ( f"Loop Control > Device update in process > "
+                        f"Updating-{devicename}, "
+                        f"Since-{secs_to_time_age_str(self.started_secs_by_devicename.get(devicename, 0))}")
+            log_debug_msg(log_msg)
+            return False
+
+        self.started_secs_by_devicename[devicename] = time_now_secs()
+
+        # The job uses this pass's update time and trace prefix while it runs
+        job_globals = Gb.job_globals()
+
+        try:
+            if self.max_workers == 0:
+                self._run_device_update(Device, update_function, DeviceLock, job_globals)
+                return True
+
+            if self.Executor is None:
+                self.Executor = ThreadPoolExecutor(max_workers=self.max_workers,
+                                                    thread_name_prefix='icloud3_device_update')
+
+            self.Executor.submit(self._run_device_update, Device, update_function, DeviceLock, job_globals)
+            return True
+
+        except Exception as err:
+            log_exception(err)
+            self._release_device_lock(devicename, DeviceLock)
+            return False
+
+#--------------------------------------------------------------------
+    def _run_device_update(self, Device, update_function, DeviceLock, job_globals):
+        try:
+            Gb.start_job_globals(job_globals)
+            update_function(Device)
+
+        except Exception as err:
+            log_exception(err)
+
+        finally:
+            Gb.end_job_globals()
+            self._release_device_lock(Device.devicename, DeviceLock)
+
+#--------------------------------------------------------------------
+    def _release_device_lock(self, devicename, DeviceLock):
+        self.started_secs_by_devicename.pop(devicename, None)
+        self.stalled_msg_devicenames.discard(devicename)
+        DeviceLock.release()
+
+#--------------------------------------------------------------------
+    def check_stalled_device_updates(self):
+        '''
+        Post a notice for any device update that has been running for over 3-minutes.
+        The other devices are not affected by it and continue to be updated.
+        '''
+        for devicename, started_secs in list(self.started_secs_by_devicename.items()):
+            if (devicename in self.stalled_msg_devicenames
+                    or secs_since(started_secs) <= DEVICE_UPDATE_STALLED_SECS):
+                continue
+
+            self.stalled_msg_devicenames.add(devicename)
+            event_msg =(f"{EVLOG_NOTICE}iCloud3 Notice > Device Update is taking a long time, "
+                        f"Started-{secs_to_time_age_str(started_secs)}")
+            post_event(devicename, event_msg)
+
+#--------------------------------------------------------------------
+    def shutdown(self):
+        '''
+        Stop the worker pool when HA is stopping
+        '''
+        if self.Executor:
+            self.Executor.shutdown(wait=False)
+            self.Executor = None
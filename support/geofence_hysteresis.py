@@ -0,0 +1,177 @@
+#<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>
+#
+#   GEOFENCE HYSTERESIS
+#
+#   A Device near the edge of a zone with a poor gps accuracy bounces between
+#   the zone and not_home. Each bounce changed the zone, posted the 'Zone >'
+#   messages, ran determine_interval for every DeviceFmZone and wrote all of the
+#   sensors.
+#
+#   The zone change from the iCloud location is now checked before the update
+#   is done:
+#       - Exit (zone to not_home) - The exit is held if the location is within
+#           the zone radius + the exit band + the gps accuracy (up to the
+#           gps_accuracy_threshold)
+#       - Enter (not_home to a zone) - The enter is held if the location is
+#           not at least the enter band + the gps accuracy (up to the
+#           gps_accuracy_threshold) inside the zone radius
+#   A held change is used when it is still there after the dwell time. The
+#   Device is rechecked when the dwell time is up. A change outside of the band
+#   is used right away.
+#
+#   The location of a held change is still used to update the sensors but the
+#   Device stays in its current zone (see _update_current_zone) and the next
+#   update time is not later than the recheck time.
+#
+#   The bands and dwell time are in the zone_hysteresis configuration parameter,
+#   {'all': {exit_band, enter_band, dwell_time}, zone: {...}}. A zone's entry
+#   overrides the 'all' values. The bands default to 0 (off) so the zone changes
+#   are used right away as they were before until a band is set in the
+#   configuration file.
+#
+#   Only the zone changes from the iCloud location are checked, the iOS App
+#   Enter Zone and Exit Zone triggers are used as they are. The Stationary Zone
+#   has its own timer and is not checked.
+#
+#<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>
+
+from ..global_variables     import GlobalVariables as Gb
+from ..const                import (NOT_HOME, NOT_SET,
+                                    HYST_ALL_ZONES, HYST_EXIT_BAND, HYST_ENTER_BAND, HYST_DWELL_TIME, )
+from ..helpers.common       import (is_statzone, )
+from ..helpers.messaging    import (post_event, _trace, _traceha, )
+from ..helpers.time_util    import (secs_to_time, )
+from ..helpers.dist_util    import (format_dist_m, )
+
+MIN_RECHECK_SECS = 15       # Shortest time until a held zone change is rechecked
+
+
+#<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>
+class GeofenceHysteresis(object):
+
+    def __init__(self):
+        self.held_by_devicename = {}    # {devicename: [zone changing to, held since secs, recheck secs]}
+
+    def __repr__(self):
+        return f"<GeofenceHysteresis: Held-{self.held_by_devicename}>"
+
+#--------------------------------------------------------------------
+    @staticmethod
+    def zone_parameters(zone):
+        '''
+        Return:
+            exit_band_m, enter_band_m, dwell_secs for the zone
+        '''
+        zone_hysteresis = Gb.zone_hysteresis.get(HYST_ALL_ZONES, {}).copy()
+        zone_hysteresis.update(Gb.zone_hysteresis.get(zone, {}))
+
+        return (zone_hysteresis.get(HYST_EXIT_BAND, 0),
+                zone_hysteresis.get(HYST_ENTER_BAND, 0),
+                zone_hysteresis.get(HYST_DWELL_TIME, 0) * 60)
+
+    @staticmethod
+    def _is_hysteresis_zone(zone):
+        return (zone in Gb.Zones_by_zone
+                    and zone not in Gb.DeletedZones_by_zone
+                    and zone != NOT_HOME
+                    and is_statzone(zone) is False
+                    and Gb.Zones_by_zone[zone].radius_m > 1)
+
+#--------------------------------------------------------------------
+    def release(self, Device):
+        self.held_by_devicename.pop(Device.devicename, None)
+
+    def is_held(self, Device):
+        return Device.devicename in self.held_by_devicename
+
+    def is_zone_change_held(self, Device, zone_selected):
+        held_zone_change = self.held_by_devicename.get(Device.devicename)
+        return held_zone_change is not None and held_zone_change[0] == zone_selected
+
+    def recheck_secs(self, Device):
+        '''
+        Return:
+            Secs until the held zone change is rechecked, 0 if it is not held
+        '''
+        held_zone_change = self.held_by_devicename.get(Device.devicename)
+        if held_zone_change is None:
+            return 0
+
+        return max(held_zone_change[2] - Gb.this_update_secs, MIN_RECHECK_SECS)
+
+#--------------------------------------------------------------------
+    def hold_zone_change_secs(self, Device, zone_selected):
+        '''
+        See if the zone change from the Device's current zone to the zone selected
+        should be held because the location is near the zone's edge.
+
+        Return:
+            0 - Use the zone change
+            secs - The zone change is held, recheck the location in this many secs
+        '''
+        from_zone = Device.loc_data_zone
+
+        if (zone_selected == from_zone
+                or from_zone == NOT_SET
+                or Device.icloud_initial_locate_done is False):
+            self.release(Device)
+            return 0
+
+        latitude  = Device.loc_data_latitude
+        longitude = Device.loc_data_longitude
+
+        # Exiting a zone
+        if zone_selected == NOT_HOME and self._is_hysteresis_zone(from_zone):
+            Zone = Gb.Zones_by_zone[from_zone]
+            exit_band_m, enter_band_m, dwell_secs = self.zone_parameters(from_zone)
+            gps_accuracy_m = min(Device.loc_data_gps_accuracy, Gb.gps_accuracy_threshold)
+            hold_radius_m  = Zone.radius_m + exit_band_m + gps_accuracy_m
+
+            if (exit_band_m <= 0
+                    or Zone.is_location_in_zone(latitude, longitude, hold_radius_m) is False):
+                self.release(Device)
+                return 0
+
+            change_msg = (f"Exit Held > {Zone.display_as}, "
+                            f"Distance-{format_dist_m(Zone.distance_m(latitude, longitude))}, "
+                            f"HoldWithin-{format_dist_m(hold_radius_m)}")
+
+        # Entering a zone
+        elif from_zone == NOT_HOME and self._is_hysteresis_zone(zone_selected):
+            Zone = Gb.Zones_by_zone[zone_selected]
+            exit_band_m, enter_band_m, dwell_secs = self.zone_parameters(zone_selected)
+            gps_accuracy_m = min(Device.loc_data_gps_accuracy, Gb.gps_accuracy_threshold)
+            enter_radius_m = Zone.radius_m - min(enter_band_m + gps_accuracy_m, Zone.radius_m / 2)
+
+            if (enter_band_m <= 0
+                    or Zone.is_location_in_zone(latitude, longitude, enter_radius_m)):
+                self.release(Device)
+                return 0
+
+            change_msg = (f"Enter Held > {Zone.display_as}, "
+                            f"Distance-{format_dist_m(Zone.distance_m(latitude, longitude))}, "
+                            f"EnterWithin-{format_dist_m(enter_radius_m)}")
+
+        else:
+            self.release(Device)
+            return 0
+
+        # Start the dwell timer or use the change if it has been held long enough
+        held_zone, held_secs, _ = self.held_by_devicename.get(Device.devicename, [None, 0, 0])
+        if held_zone != zone_selected:
+            held_secs = Gb.this_update_secs
+
+        held_elapsed_secs = Gb.this_update_secs - held_secs
+        if held_elapsed_secs >= dwell_secs:
+            self.release(Device)
+            return 0
+
+        recheck_secs = max(dwell_secs - held_elapsed_secs, MIN_RECHECK_SECS)
+        self.held_by_devicename[Device.devicename] = \
+                [zone_selected, held_secs, Gb.this_update_secs + recheck_secs]
+        post_event(Device.devicename,
+                    f"Zone Change {change_msg}, "
+                    f"GPS-±{Device.loc_data_gps_accuracy}m, "
+                    f"Recheck-{secs_to_time(Gb.this_update_secs + recheck_secs)}")
+
+        return recheck_secs
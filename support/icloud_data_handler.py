@@ -20,6 +20,8 @@ from ..helpers.messaging    import (post_event, post_error_msg, post_monitor_msg
 from ..helpers.time_util    import (time_now_secs, secs_to_time, secs_since, secs_to, )
 from .pyicloud_ic3          import (PyiCloudAPIResponseException, PyiCloud2FARequiredException, )
 
+import time
+
 
 #<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>
 #
@@ -226,6 +228,7 @@ def update_PyiCloud_RawData_data(Device, results_msg_flag=True):
             return update_all_devices_wih_latest_raw_data(Device)
 
         pyicloud_start_call_time = time_now_secs()
+        refresh_rtt_secs = {}
 
         # Do not refresh data for monitored device, will update it after refresh of another device
         if Device.is_monitored:
@@ -238,7 +241,9 @@ def update_PyiCloud_RawData_data(Device, results_msg_flag=True):
                         or Device.next_update_secs > (famshr_secs + 5)))
                     or Device.icloud_initial_locate_done is False):
 
+                refresh_started = time.perf_counter()
                 Gb.PyiCloud.FamilySharing.refresh_client(requested_by_devicename=Device.devicename)
+                refresh_rtt_secs[FAMSHR] = time.perf_counter() - refresh_started
 
 
         # Refresh FmF Data
@@ -248,7 +253,9 @@ def update_PyiCloud_RawData_data(Device, results_msg_flag=True):
                         or Device.next_update_secs > (fmf_secs + 5)))
                     or Device.icloud_initial_locate_done is False):
 
+                refresh_started = time.perf_counter()
                 Gb.PyiCloud.FindMyFriends.refresh_client(requested_by_devicename=Device.devicename)
+                refresh_rtt_secs[FMF] = time.perf_counter() - refresh_started
 
         Gb.pyicloud_refresh_time[Device.tracking_method] = time_now_secs()
         Gb.pyicloud_location_update_cnt += 1
@@ -257,6 +264,11 @@ def update_PyiCloud_RawData_data(Device, results_msg_flag=True):
         if update_all_devices_wih_latest_raw_data(Device) is False:
             return False
 
+        # Save the refresh round trip time and location ages for the prefetch planner
+        if Gb.IcloudPrefetchPlanner:
+            for tracking_method, rtt_secs in refresh_rtt_secs.items():
+                Gb.IcloudPrefetchPlanner.refresh_completed(tracking_method, rtt_secs)
+
         if is_PyiCloud_RawData_data_useable(Device, results_msg_flag=False) is False:
             return False
 
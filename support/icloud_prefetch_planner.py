@@ -0,0 +1,222 @@
+#<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>
+#
+#   ICLOUD LOCATION PREFETCH PLANNER
+#
+#   The iCloud location data is prefetched in the 5-sec loop before a Device's
+#   update so the data is available when the update is done. The prefetch used
+#   fixed times (10-secs between refreshes, 5-secs before the update) and only
+#   picked the first Device that needed it.
+#
+#   The planner learns:
+#       - The refresh_client round trip time for FamShr and FmF
+#       - The age of the iCloud location for each Device when it is refreshed
+#
+#   The refresh is started the round trip time (p90) plus one 5-sec loop pass
+#   before the earliest Device update so the data arrives just before it is
+#   needed. All other Devices using the same tracking method whose updates fall
+#   within the batch window are included if the prefetched location will not be
+#   too old when they are updated. One refresh is done for all of them and their
+#   own update uses the prefetched data instead of doing another refresh.
+#
+#<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>
+
+from ..global_variables     import GlobalVariables as Gb
+from ..const                import (FAMSHR, FMF, )
+from ..helpers.messaging    import (log_debug_msg, log_exception, _trace, _traceha, )
+from ..helpers.time_util    import (time_now_secs, secs_since, secs_to, )
+
+from collections            import deque
+
+PREFETCH_SAMPLE_CNT         = 50        # Refresh times and location ages kept
+PREFETCH_MIN_REFRESH_SECS   = 10        # At least 10-secs between prefetch refreshes
+PREFETCH_LOOP_SECS          = 5         # The prefetch is checked on each 5-sec loop pass
+PREFETCH_DEFAULT_RTT_SECS   = 3         # Round trip time used until some have been timed
+PREFETCH_BATCH_WINDOW_SECS  = 30        # Devices due within this time after the earliest are batched
+PREFETCH_MAX_LOC_AGE_SECS   = 3600      # Ignore location ages over 1-hour (device offline)
+APPROACHING_ZONE_DIST       = 1         # km, Prefetch for devices approaching a zone
+APPROACHING_ZONE_LOC_AGE_SECS = 15
+
+
+#<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>
+class IcloudPrefetchPlanner(object):
+
+    def __init__(self):
+        self.initialize()
+
+    def initialize(self):
+        self.rtt_secs_by_method     = {FAMSHR: deque(maxlen=PREFETCH_SAMPLE_CNT),
+                                        FMF: deque(maxlen=PREFETCH_SAMPLE_CNT)}
+        self.loc_age_secs_by_devicename = {}    # {devicename: deque(location age secs)}
+        self.refresh_cnt            = 0         # iCloud refreshes (prefetch and device updates)
+        self.prefetch_cnt           = 0         # Prefetch refreshes
+        self.prefetch_device_cnt    = 0         # Devices covered by the prefetch refreshes
+        self.started_secs           = time_now_secs()
+
+    def __repr__(self):
+        return (f"<IcloudPrefetchPlanner: Refreshes-{self.refresh_cnt}, "
+                f"Prefetches-{self.prefetch_cnt}>")
+
+#--------------------------------------------------------------------
+    @staticmethod
+    def _percentile(values, pct, default=0):
+        if not values:
+            return default
+
+        sorted_values = sorted(values)
+        return sorted_values[round((len(sorted_values) - 1) * pct)]
+
+#--------------------------------------------------------------------
+    def refresh_completed(self, tracking_method, rtt_secs):
+        '''
+        Save the refresh_client round trip time and the age of the location data
+        received for each Device using the tracking method
+
+        Parameters:
+            tracking_method - FAMSHR or FMF
+            rtt_secs - Time the refresh_client call took
+        '''
+        try:
+            if tracking_method not in self.rtt_secs_by_method:
+                return
+
+            self.refresh_cnt += 1
+            self.rtt_secs_by_method[tracking_method].append(rtt_secs)
+
+            for Device in Gb.Devices_by_devicename_tracked.values():
+                if Device.tracking_method != tracking_method or Device.loc_data_secs == 0:
+                    continue
+
+                loc_age_secs = secs_since(Device.loc_data_secs)
+                if loc_age_secs > PREFETCH_MAX_LOC_AGE_SECS:
+                    continue
+
+                if Device.devicename not in self.loc_age_secs_by_devicename:
+                    self.loc_age_secs_by_devicename[Device.devicename] = deque(maxlen=PREFETCH_SAMPLE_CNT)
+                self.loc_age_secs_by_devicename[Device.devicename].append(loc_age_secs)
+
+        except Exception as err:
+            log_exception(err)
+
+#--------------------------------------------------------------------
+    def expected_rtt_secs(self, tracking_method):
+        return self._percentile(self.rtt_secs_by_method.get(tracking_method), .90,
+                                default=PREFETCH_DEFAULT_RTT_SECS)
+
+    def expected_loc_age_secs(self, Device):
+        return self._percentile(self.loc_age_secs_by_devicename.get(Device.devicename), .50)
+
+    def prefetch_lead_secs(self, tracking_method):
+        '''
+        Number of secs before the update the refresh must be started so the data
+        is there when the update is done on the next 5-sec loop pass
+        '''
+        return round(self.expected_rtt_secs(tracking_method)) + PREFETCH_LOOP_SECS
+
+#--------------------------------------------------------------------
+    @staticmethod
+    def _is_prefetch_candidate(Device):
+        return (Device.is_tracking_method_FAMSHR_FMF
+                    and Device.is_tracking_paused is False
+                    and Gb.DeviceUpdatePool.is_device_update_in_process(Device.devicename) is False)
+
+    @staticmethod
+    def _is_approaching_zone(Device):
+        '''
+        Going towards a TrackFmZone, less than 1km away and the location is older
+        than 15-secs
+        '''
+        return (Device.DeviceFmZoneTracked is not None
+                    and Device.DeviceFmZoneTracked.is_going_towards
+                    and Device.DeviceFmZoneTracked.zone_dist < APPROACHING_ZONE_DIST
+                    and secs_since(Device.loc_data_secs) > APPROACHING_ZONE_LOC_AGE_SECS)
+
+#--------------------------------------------------------------------
+    def get_prefetch_devices(self):
+        '''
+        Determine if the iCloud data should be refreshed now and the Devices that
+        will use the refreshed data
+
+        Return:
+            [Devices] - The first Device is used to request the refresh, the others
+                        are batched with it. [] if no refresh is needed.
+        '''
+        try:
+            # A Device that has not been located yet is refreshed right away
+            for Device in Gb.Devices_by_devicename_tracked.values():
+                if (Device.icloud_initial_locate_done is False
+                        and self._is_prefetch_candidate(Device)):
+                    return [Device]
+
+            if (secs_since(Gb.pyicloud_refresh_time[FAMSHR]) < PREFETCH_MIN_REFRESH_SECS
+                    and secs_since(Gb.pyicloud_refresh_time[FMF]) < PREFETCH_MIN_REFRESH_SECS):
+                return []
+
+            # Devices sorted by the time to their next update
+            due_Devices = sorted([Device for Device in Gb.Devices_by_devicename_tracked.values()
+                                        if self._is_prefetch_candidate(Device)],
+                                key=lambda Device: Device.next_update_secs)
+            if due_Devices == []:
+                return []
+
+            # Find the earliest Device that has reached its prefetch lead time
+            trigger_Device = None
+            for Device in due_Devices:
+                if secs_since(Gb.pyicloud_refresh_time[Device.tracking_method]) < PREFETCH_MIN_REFRESH_SECS:
+                    continue
+
+                secs_to_next_update = secs_to(Device.next_update_secs)
+                if (secs_to_next_update <= self.prefetch_lead_secs(Device.tracking_method)
+                        or self._is_approaching_zone(Device)):
+                    trigger_Device = Device
+                    break
+
+            if trigger_Device is None:
+                return []
+
+            if self._is_approaching_zone(trigger_Device):
+                trigger_Device.old_loc_threshold_secs = APPROACHING_ZONE_LOC_AGE_SECS
+
+            # Batch the other Devices due in the window whose prefetched location will
+            # not be older than its old location threshold when it is updated
+            batch_end_secs = trigger_Device.next_update_secs + PREFETCH_BATCH_WINDOW_SECS
+            prefetch_Devices = [trigger_Device]
+            for Device in due_Devices:
+                if (Device is trigger_Device
+                        or Device.tracking_method != trigger_Device.tracking_method
+                        or Device.next_update_secs > batch_end_secs):
+                    continue
+
+                loc_age_at_update_secs = max(0, secs_to(Device.next_update_secs)) \
+                                            + self.expected_loc_age_secs(Device)
+                if loc_age_at_update_secs <= Device.old_loc_threshold_secs:
+                    prefetch_Devices.append(Device)
+
+            return prefetch_Devices
+
+        except Exception as err:
+            log_exception(err)
+            return []
+
+#--------------------------------------------------------------------
+    def prefetch_started(self, prefetch_Devices):
+        self.prefetch_cnt += 1
+        self.prefetch_device_cnt += len(prefetch_Devices)
+
+#--------------------------------------------------------------------
+    def log_prefetch_stats(self):
+        '''
+        Write the refresh counts, round trip times and location ages to the debug log
+        '''
+        if Gb.log_debug_flag is False:
+            return
+
+        hours = max(secs_since(self.started_secs) / 3600, 1/60)
+        loc_ages = ', '.join([f"{devicename}-{self._percentile(loc_ages, .50)}s"
+                                for devicename, loc_ages in self.loc_age_secs_by_devicename.items()])
+        log_msg = ( f"iCloud Prefetch Planner > "
+                    f"Refreshes-{self.refresh_cnt} ({round(self.refresh_cnt / hours, 1)}/hr), "
+                    f"Prefetches-{self.prefetch_cnt}, Devices-{self.prefetch_device_cnt}, "
+                    f"RTT(p90)-FamShr-{round(self.expected_rtt_secs(FAMSHR), 2)}s, "
+                    f"FmF-{round(self.expected_rtt_secs(FMF), 2)}s, "
+                    f"LocAge(p50)-{loc_ages or 'None'}")
+        log_debug_msg(log_msg)
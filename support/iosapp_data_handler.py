@@ -32,16 +32,23 @@ from ..support              import iosapp_interface as iosapp_interface
 #   updated with the new location information.
 #
 #<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>
-def check_iosapp_state_trigger_change(Device):
+def check_iosapp_state_trigger_change(Device, iosapp_states=None):
+    '''
+    Parameters:
+        iosapp_states - {entity_type: State} from the iOS App state change listener
+                mailbox. The entity's state is read from hass.states if it is not there.
+    '''
     try:
         Device.iosapp_data_updated_flag = False
         Device.iosapp_data_change_reason = ''
         Device.iosapp_data_reject_reason = ''
 
+        if iosapp_states is None:
+            iosapp_states = {}
         iosapp_data_state_not_set_flag = (Device.iosapp_data_state == NOT_SET)
 
         # Get the state data
-        device_trkr_attrs = get_iosapp_device_trkr_entity_attrs(Device)
+        device_trkr_attrs = get_iosapp_device_trkr_entity_attrs(Device, iosapp_states.get(DEVICE_TRACKER))
         if device_trkr_attrs is None:
             return
 
@@ -51,8 +58,9 @@ def check_iosapp_state_trigger_change(Device):
 
         # Get the trigger data
         entity_id                = Device.iosapp_entity[TRIGGER]
-        iosapp_data_trigger      = device_trkr_attrs["trigger"]                   = entity_io.get_state(entity_id)
-        iosapp_data_trigger_secs = device_trkr_attrs[f"trigger_{TIMESTAMP_SECS}"] = entity_io.get_last_changed_time(entity_id)
+        TriggerState             = iosapp_states.get(TRIGGER)
+        iosapp_data_trigger      = device_trkr_attrs["trigger"]                   = entity_io.get_state(entity_id, TriggerState)
+        iosapp_data_trigger_secs = device_trkr_attrs[f"trigger_{TIMESTAMP_SECS}"] = entity_io.get_last_changed_time(entity_id, TriggerState)
         iosapp_data_trigger_time = device_trkr_attrs[f"trigger_{TIMESTAMP_TIME}"] = secs_to_time(iosapp_data_trigger_secs)
 
         # If not a zone enter/exit trigger (periodic, Sig Location Change, Background refresh, etc)
@@ -364,23 +372,29 @@ def check_if_iosapp_is_alive(Device):
         log_exception(err)
 
 #--------------------------------------------------------------------
-def get_iosapp_device_trkr_entity_attrs(Device):
+def get_iosapp_device_trkr_entity_attrs(Device, DeviceTrkrState=None):
     '''
     Return the state and attributes of the ios app device tracker.
     The ic3 device tracker state and attributes are returned if
     the ios app data is not available or an error occurs.
 
+    Parameters:
+        DeviceTrkrState - device_tracker State from the state change event (optional)
+
     Return:
         device_trkr_attrs - iOSApp device tracker attrinutes if available
         None -  error or no data is available
     '''
     try:
         entity_id = Device.iosapp_entity[DEVICE_TRACKER]
+        if DeviceTrkrState is None:
+            DeviceTrkrState = Gb.hass.states.get(entity_id)
+
         device_trkr_attrs = {}
-        device_trkr_attrs[DEVICE_TRACKER] =  entity_io.get_state(entity_id)
+        device_trkr_attrs[DEVICE_TRACKER] =  entity_io.get_state(entity_id, DeviceTrkrState)
 
-        device_trkr_attrs.update(entity_io.get_attributes(entity_id))
-        device_trkr_attrs[f"state_{TIMESTAMP_SECS}"] = entity_io.get_last_changed_time(entity_id)
+        device_trkr_attrs.update(entity_io.get_attributes(entity_id, DeviceTrkrState))
+        device_trkr_attrs[f"state_{TIMESTAMP_SECS}"] = entity_io.get_last_changed_time(entity_id, DeviceTrkrState)
         device_trkr_attrs[f"state_{TIMESTAMP_TIME}"] = secs_to_time(device_trkr_attrs[f"state_{TIMESTAMP_SECS}"])
 
         if (device_trkr_attrs == {}
@@ -0,0 +1,183 @@
+#<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>
+#
+#   IOS APP STATE CHANGE LISTENER
+#
+#   The iOS App device_tracker, last_update_trigger and battery entities were
+#   read for every device on every 5-sec loop pass to see if anything changed.
+#
+#   iCloud3 now subscribes to the state changes of these entities. A change is
+#   put into the Device's mailbox (the newest state of each entity). A location
+#   change starts the Device update on the DeviceUpdatePool right away so a zone
+#   enter/exit is not held until the next 5-sec loop pass. The update is
+#   submitted from an HA executor thread, only the mailbox is updated in the HA
+#   event loop. The Device update drains the mailbox. Devices with no iOS App
+#   activity cost nothing.
+#
+#   If the subscription can not be set up, the 5-sec loop polls the iOS App
+#   entities as it did before.
+#
+#<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>
+
+from ..global_variables     import GlobalVariables as Gb
+from ..const                import (DEVICE_TRACKER, TRIGGER, BATTERY_LEVEL, BATTERY_STATUS, )
+from ..helpers.messaging    import (log_info_msg, log_debug_msg, log_exception, _trace, _traceha, )
+
+from homeassistant.core     import callback
+from homeassistant.helpers.event import track_state_change_event
+import threading
+
+IOSAPP_LOCATION_ENTITIES = [DEVICE_TRACKER, TRIGGER]
+IOSAPP_BATTERY_ENTITIES  = [BATTERY_LEVEL, BATTERY_STATUS]
+IOSAPP_LISTEN_ENTITIES   = IOSAPP_LOCATION_ENTITIES + IOSAPP_BATTERY_ENTITIES
+
+_mailbox_lock = threading.Lock()
+
+
+#<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>
+def subscribe_to_iosapp_state_changes():
+    '''
+    Listen for state changes of the iOS App entities of all the Devices. This is
+    called during startup after the iOS App entities have been assigned.
+    '''
+    unsubscribe_from_iosapp_state_changes()
+
+    Gb.Devices_by_iosapp_entity_id = {}
+    Gb.iosapp_mailbox_by_devicename = {}
+    for Device in Gb.Devices:
+        if Device.iosapp_monitor_flag is False:
+            continue
+
+        Gb.iosapp_mailbox_by_devicename[Device.devicename] = {}
+        for entity_type in IOSAPP_LISTEN_ENTITIES:
+            entity_id = Device.iosapp_entity.get(entity_type)
+            if entity_id and entity_id.endswith('.None') is False:
+                Gb.Devices_by_iosapp_entity_id[entity_id] = (Device, entity_type)
+
+    if Gb.Devices_by_iosapp_entity_id == {}:
+        return
+
+    try:
+        Gb.iosapp_state_change_unsub = \
+                track_state_change_event(Gb.hass, list(Gb.Devices_by_iosapp_entity_id.keys()),
+                                        _async_iosapp_state_changed)
+        Gb.iosapp_state_change_listener_active = True
+
+        # Put the current state of each entity in the mailbox so everything is
+        # processed on the first pass after starting
+        for entity_id, (Device, entity_type) in Gb.Devices_by_iosapp_entity_id.items():
+            if State := Gb.hass.states.get(entity_id):
+                _post_to_mailbox(Device, entity_type, State)
+
+        log_info_msg(f"iOS App State Change Listener > Entities-{len(Gb.Devices_by_iosapp_entity_id)}")
+
+    except Exception as err:
+        log_exception(err)
+        Gb.iosapp_state_change_listener_active = False
+
+#--------------------------------------------------------------------
+def unsubscribe_from_iosapp_state_changes():
+    try:
+        if Gb.iosapp_state_change_unsub:
+            Gb.iosapp_state_change_unsub()
+
+    except Exception as err:
+        log_exception(err)
+
+    Gb.iosapp_state_change_unsub = None
+    Gb.iosapp_state_change_listener_active = False
+
+#--------------------------------------------------------------------
+@callback
+def _async_iosapp_state_changed(event):
+    '''
+    An iOS App entity changed. Save it in the Device's mailbox and start the
+    Device update if it is a location change. Runs in the HA event loop so
+    nothing is done here that would block (starting the update pool, logging to
+    the file), the update is submitted on an HA executor thread.
+    '''
+    try:
+        entity_id = event.data.get('entity_id')
+        State     = event.data.get('new_state')
+        if State is None or entity_id not in Gb.Devices_by_iosapp_entity_id:
+            return
+
+        Device, entity_type = Gb.Devices_by_iosapp_entity_id[entity_id]
+        _post_to_mailbox(Device, entity_type, State)
+
+        if entity_type not in IOSAPP_LOCATION_ENTITIES:
+            return
+
+        # The 5-sec loop updates the Device if the update can not be started now
+        Gb.DeviceScheduler.trigger_device(Device.devicename, f"iOSApp-{entity_type}")
+        Gb.hass.async_add_executor_job(_submit_iosapp_device_update, Device)
+
+    except Exception as err:
+        log_exception(err)
+
+#--------------------------------------------------------------------
+def _submit_iosapp_device_update(Device):
+    '''
+    Start the Device update for an iOS App location change. This is run on an HA
+    executor thread.
+    '''
+    try:
+        if (Gb.start_icloud3_inprocess_flag
+                or Gb.all_tracking_paused_flag
+                or Device.is_tracking_paused
+                or Device.devicename not in Gb.Devices_by_devicename_tracked
+                or Gb.DeviceUpdatePool.is_device_update_in_process(Device.devicename)):
+            return
+
+        Gb.DeviceUpdatePool.submit_device_update(Device,
+                                    Gb.iCloud3.iosapp_state_change_update_device)
+
+    except Exception as err:
+        log_exception(err)
+
+#--------------------------------------------------------------------
+def _post_to_mailbox(Device, entity_type, State):
+    with _mailbox_lock:
+        if Device.devicename not in Gb.iosapp_mailbox_by_devicename:
+            Gb.iosapp_mailbox_by_devicename[Device.devicename] = {}
+        Gb.iosapp_mailbox_by_devicename[Device.devicename][entity_type] = State
+
+#--------------------------------------------------------------------
+def drain_iosapp_mailbox(Device, entity_types=None):
+    '''
+    Remove and return the iOS App entity states received for the Device
+
+    Parameters:
+        entity_types - List of entity types (DEVICE_TRACKER, TRIGGER, ...) to return,
+                        all of them if None
+
+    Return:
+        {entity_type: State} - The newest state of each entity that changed
+    '''
+    with _mailbox_lock:
+        mailbox = Gb.iosapp_mailbox_by_devicename.get(Device.devicename)
+        if not mailbox:
+            return {}
+
+        if entity_types is None:
+            Gb.iosapp_mailbox_by_devicename[Device.devicename] = {}
+            return mailbox
+
+        return {entity_type: mailbox.pop(entity_type)
+                        for entity_type in entity_types
+                        if entity_type in mailbox}
+
+#--------------------------------------------------------------------
+def is_iosapp_mailbox_empty(Device, entity_types=IOSAPP_LOCATION_ENTITIES):
+    mailbox = Gb.iosapp_mailbox_by_devicename.get(Device.devicename, {})
+
+    return not any(entity_type in mailbox for entity_type in entity_types)
+
+#--------------------------------------------------------------------
+def is_iosapp_polling_needed(Device):
+    '''
+    The iOS App entities must be polled if the Device uses the iOS App and
+    the state change listener is not running
+    '''
+    return (Device.iosapp_monitor_flag
+                and Gb.data_source_use_iosapp
+                and Gb.iosapp_state_change_listener_active is False)
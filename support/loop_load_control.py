@@ -0,0 +1,216 @@
+#<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>
+#
+#   5-SEC LOOP OVERRUN DETECTION AND LOAD SHEDDING
+#
+#   When a 5-sec loop pass takes longer than 5-secs, the next HA timer call
+#   finds the update-in-process flag set and returns. These skipped passes,
+#   the lag of the HA timer call behind the wall clock and the device update
+#   backlog on the DeviceUpdatePool are counted here.
+#
+#   The overload level is used to defer low value work so the zone enter/exit
+#   and tracked device updates are not delayed:
+#       Level 1 - Defer the per-minute info message refresh and the nearby
+#                   devices Event Log messages
+#       Level 2 - Also defer the monitored device updates
+#
+#   The highest level used is set by the 'load_shedding' configuration
+#   parameter (off, normal (level 1, the default), full (level 2)). The zone
+#   enter/exit and iOS App trigger processing of the tracked devices is never
+#   deferred.
+#
+#   A device update backlog is only an overload when there are more device
+#   updates in process than DeviceUpdatePool workers (level 1) or more than
+#   twice as many (level 2). All of the workers being busy is normal.
+#
+#<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>
+
+from ..global_variables     import GlobalVariables as Gb
+from ..const                import (EVLOG_NOTICE,
+                                    LOAD_SHEDDING_OFF, LOAD_SHEDDING_NORMAL, LOAD_SHEDDING_FULL, )
+from ..helpers.messaging    import (post_event, log_debug_msg, _trace, _traceha, )
+from ..helpers.time_util    import (time_now_secs, secs_since, secs_to_time, )
+
+import time
+
+LOOP_INTERVAL_SECS          = 5         # HA calls the 5-sec loop every 5-secs
+OVERLOAD_LAG_SECS           = 5         # HA timer call lag that indicates an overload
+OVERLOAD_HEAVY_LAG_SECS     = 15
+OVERLOAD_RECENT_SECS        = 60        # An overrun within this time keeps the level at 1
+OVERLOAD_HEAVY_OVERRUN_CNT  = 3         # Overruns within OVERLOAD_HEAVY_SECS that set level 2
+OVERLOAD_HEAVY_SECS         = 300
+OVERLOAD_HEAVY_BACKLOG_MULT = 2         # Backlog over this many times the worker count sets level 2
+
+SHED_INFO_MSG_REFRESH       = 'info_msg_refresh'
+SHED_NEARBY_DEVICES_MSG     = 'nearby_devices_msg'
+SHED_MONITORED_DEVICES      = 'monitored_devices'
+
+SHED_TASK_LEVEL = {
+        SHED_INFO_MSG_REFRESH: 1,
+        SHED_NEARBY_DEVICES_MSG: 1,
+        SHED_MONITORED_DEVICES: 2,
+}
+MAX_SHED_LEVEL = {
+        LOAD_SHEDDING_OFF: 0,
+        LOAD_SHEDDING_NORMAL: 1,
+        LOAD_SHEDDING_FULL: 2,
+}
+
+
+#<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>
+class LoopLoadControl(object):
+
+    def __init__(self):
+        self.initialize()
+
+    def initialize(self):
+        self.overrun_cnt        = 0         # Passes that took longer than 5-secs
+        self.skipped_tick_cnt   = 0         # HA timer calls skipped, prior pass still running
+        self.overrun_secs_list  = []        # Times of recent overruns and skipped ticks
+        self.last_overrun_secs  = 0
+        self.tick_lag_secs      = 0         # Lag of the current HA timer call behind the wall clock
+        self.max_tick_lag_secs  = 0
+        self.shed_level         = 0
+        self.shed_cnt_by_task   = {}        # Number of times each task was deferred
+        self.deferred_tasks     = set()     # Tasks deferred that are run when the overload clears
+
+    def __repr__(self):
+        return (f"<LoopLoadControl: Level-{self.shed_level}, Overruns-{self.overrun_cnt}, "
+                f"Skipped-{self.skipped_tick_cnt}>")
+
+#--------------------------------------------------------------------
+    @property
+    def max_shed_level(self):
+        return MAX_SHED_LEVEL.get(Gb.load_shedding, 1)
+
+#--------------------------------------------------------------------
+    def tick_started(self, ha_timer_datetime):
+        '''
+        Save the lag of this HA timer call behind the wall clock
+
+        Parameters:
+            ha_timer_datetime - The time the HA timer call was scheduled for
+        '''
+        try:
+            self.tick_lag_secs = max(0, round(time.time() - ha_timer_datetime.timestamp(), 1))
+            self.max_tick_lag_secs = max(self.max_tick_lag_secs, self.tick_lag_secs)
+
+        except Exception:
+            self.tick_lag_secs = 0
+
+        if self.tick_lag_secs >= OVERLOAD_LAG_SECS:
+            self._add_overrun()
+
+#--------------------------------------------------------------------
+    def tick_skipped(self):
+        '''
+        The prior 5-sec loop pass is still running and this one is being skipped
+        '''
+        self.skipped_tick_cnt += 1
+        self._add_overrun()
+
+#--------------------------------------------------------------------
+    def tick_finished(self, loop_secs):
+        '''
+        Count the overrun if the pass took longer than 5-secs and set the
+        overload level for the next pass
+        '''
+        if loop_secs > LOOP_INTERVAL_SECS:
+            self.overrun_cnt += 1
+            self._add_overrun()
+
+        self._set_shed_level()
+
+#--------------------------------------------------------------------
+    def _add_overrun(self):
+        self.last_overrun_secs = time_now_secs()
+        self.overrun_secs_list.append(self.last_overrun_secs)
+        self.overrun_secs_list = [overrun_secs for overrun_secs in self.overrun_secs_list
+                                        if secs_since(overrun_secs) <= OVERLOAD_HEAVY_SECS]
+
+#--------------------------------------------------------------------
+    def _set_shed_level(self):
+        '''
+        Determine the overload level from the recent overruns, the HA timer lag
+        and the device update backlog on the worker pool
+        '''
+        update_backlog_cnt = len(Gb.DeviceUpdatePool.started_secs_by_devicename) \
+                                    if Gb.DeviceUpdatePool else 0
+        max_workers        = max(Gb.DeviceUpdatePool.max_workers, 1) if Gb.DeviceUpdatePool else 1
+
+        if (len(self.overrun_secs_list) >= OVERLOAD_HEAVY_OVERRUN_CNT
+                or self.tick_lag_secs >= OVERLOAD_HEAVY_LAG_SECS
+                or update_backlog_cnt > max_workers * OVERLOAD_HEAVY_BACKLOG_MULT):
+            shed_level = 2
+        elif ((self.last_overrun_secs > 0 and secs_since(self.last_overrun_secs) <= OVERLOAD_RECENT_SECS)
+                or update_backlog_cnt > max_workers):
+            shed_level = 1
+        else:
+            shed_level = 0
+
+        shed_level = min(shed_level, self.max_shed_level)
+        if shed_level == self.shed_level:
+            return
+
+        if shed_level > 0 and self.shed_level == 0:
+            event_msg =(f"{EVLOG_NOTICE}iCloud3 Notice > 5-sec Loop Overloaded, Deferring low priority "
+                        f"tasks, Level-{shed_level}, Overruns-{self.overrun_cnt}, "
+                        f"SkippedPasses-{self.skipped_tick_cnt}, Lag-{self.tick_lag_secs}s, "
+                        f"UpdatesInProcess-{update_backlog_cnt}")
+            post_event(event_msg)
+        elif shed_level == 0:
+            log_debug_msg(f"5-sec Loop Load Control > Overload Cleared, Deferred-{self.deferred_tasks}")
+
+        self.shed_level = shed_level
+
+#--------------------------------------------------------------------
+    def is_task_runnable(self, task, task_due_flag=True):
+        '''
+        See if a low priority task can be run on this pass. A task that is due but
+        is skipped because of the overload level is saved as deferred and is run
+        on the first pass after the overload clears.
+
+        Parameters:
+            task - SHED_INFO_MSG_REFRESH, SHED_NEARBY_DEVICES_MSG, SHED_MONITORED_DEVICES
+            task_due_flag - The task's normal run time has been reached
+
+        Return:
+            True - Run the task
+            False - Skip the task
+        '''
+        if task_due_flag is False and task not in self.deferred_tasks:
+            return False
+
+        if self.shed_level >= SHED_TASK_LEVEL.get(task, 99):
+            if task_due_flag:
+                self.deferred_tasks.add(task)
+                self.shed_cnt_by_task[task] = self.shed_cnt_by_task.get(task, 0) + 1
+            return False
+
+        self.deferred_tasks.discard(task)
+        return True
+
+#--------------------------------------------------------------------
+    @property
+    def stats_attrs(self):
+        return {'overload_level': self.shed_level,
+                'overrun_cnt': self.overrun_cnt,
+                'skipped_pass_cnt': self.skipped_tick_cnt,
+                'last_overrun': secs_to_time(self.last_overrun_secs),
+                'timer_lag_secs': self.tick_lag_secs,
+                'timer_lag_max_secs': self.max_tick_lag_secs,
+                'deferred_task_cnt': self.shed_cnt_by_task.copy(), }
+
+#--------------------------------------------------------------------
+    def log_load_control(self):
+        '''
+        Write the overrun counts to the debug log
+        '''
+        if Gb.log_debug_flag is False:
+            return
+
+        log_msg = ( f"5-sec Loop Load Control > Level-{self.shed_level}, "
+                    f"Overruns-{self.overrun_cnt}, SkippedPasses-{self.skipped_tick_cnt}, "
+                    f"LastOverrun-{secs_to_time(self.last_overrun_secs)}, "
+                    f"Lag-{self.tick_lag_secs}s (Max-{self.max_tick_lag_secs}s), "
+                    f"Deferred-{self.shed_cnt_by_task}")
+        log_debug_msg(log_msg)
@@ -0,0 +1,186 @@
+#<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>
+#
+#   5-SEC LOOP TIMING STATISTICS
+#
+#   Time each phase of the 5-sec loop (special time control, iCloud prefetch,
+#   iOS App check, iCloud refresh, zone selection, determine interval, sensor
+#   writes, EvLog refresh) for the loop and for each device. The last
+#   LOOP_STATS_SAMPLE_CNT times of each phase are kept and the p50/p95/max
+#   times are displayed on the sensor.icloud3_loop_stats entity and written
+#   to the debug log.
+#
+#   Usage:
+#       with Gb.LoopStats.timer(LOOP_PHASE_ICLOUD_REFRESH, Device):
+#           icloud_data_handler.request_icloud_data_update(Device)
+#
+#<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>
+
+from ..global_variables     import GlobalVariables as Gb
+from ..helpers.messaging    import (log_debug_msg, log_exception, _trace, _traceha, )
+from ..helpers.time_util    import (datetime_now, )
+
+from collections            import deque
+from contextlib             import contextmanager
+import time
+
+LOOP_STATS_SAMPLE_CNT           = 240       # Times kept for each phase (20-mins of 5-sec loops)
+
+LOOP_PHASE_LOOP                 = 'loop'
+LOOP_PHASE_SPECIAL_TIME         = 'special_time_control'
+LOOP_PHASE_PREFETCH             = 'icloud_prefetch'
+LOOP_PHASE_DEVICE_UPDATE        = 'device_update'
+LOOP_PHASE_IOSAPP_CHECK         = 'iosapp_check'
+LOOP_PHASE_ICLOUD_REFRESH       = 'icloud_refresh'
+LOOP_PHASE_ZONE_SELECT          = 'zone_selection'
+LOOP_PHASE_DETERMINE_INTERVAL   = 'determine_interval'
+LOOP_PHASE_SENSOR_WRITE         = 'sensor_write'
+LOOP_PHASE_EVLOG_REFRESH        = 'evlog_refresh'
+
+LOOP_PHASES = [ LOOP_PHASE_LOOP, LOOP_PHASE_SPECIAL_TIME, LOOP_PHASE_PREFETCH,
+                LOOP_PHASE_DEVICE_UPDATE, LOOP_PHASE_IOSAPP_CHECK, LOOP_PHASE_ICLOUD_REFRESH,
+                LOOP_PHASE_ZONE_SELECT, LOOP_PHASE_DETERMINE_INTERVAL,
+                LOOP_PHASE_SENSOR_WRITE, LOOP_PHASE_EVLOG_REFRESH, ]
+
+
+#<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>
+class LoopStats(object):
+
+    def __init__(self, sample_cnt=LOOP_STATS_SAMPLE_CNT):
+        self.sample_cnt = sample_cnt
+        self.initialize()
+
+    def initialize(self):
+        self.times_by_phase = {}            # {phase: deque(msecs)}
+        self.times_by_devicename = {}       # {devicename: {phase: deque(msecs)}}
+        self.started_datetime = datetime_now()
+
+    def __repr__(self):
+        return (f"<LoopStats: Phases-{len(self.times_by_phase)}, "
+                f"Devices-{len(self.times_by_devicename)}>")
+
+#--------------------------------------------------------------------
+    @contextmanager
+    def timer(self, phase, Device=None):
+        '''
+        Time the code in the with block and save it for the phase (and device)
+        '''
+        started = time.perf_counter()
+        try:
+            yield
+
+        finally:
+            self.add_time(phase, (time.perf_counter() - started) * 1000, Device)
+
+#--------------------------------------------------------------------
+    def add_time(self, phase, msecs, Device=None):
+        '''
+        Save a phase time. A deque with a maxlen is used so the oldest time
+        is dropped when a new one is added.
+        '''
+        try:
+            if phase not in self.times_by_phase:
+                self.times_by_phase[phase] = deque(maxlen=self.sample_cnt)
+            self.times_by_phase[phase].append(msecs)
+
+            if Device is None:
+                return
+
+            device_times = self.times_by_devicename.setdefault(Device.devicename, {})
+            if phase not in device_times:
+                device_times[phase] = deque(maxlen=self.sample_cnt)
+            device_times[phase].append(msecs)
+
+        except Exception as err:
+            log_exception(err)
+
+#--------------------------------------------------------------------
+    @staticmethod
+    def percentiles(times):
+        '''
+        Return:
+            {'cnt', 'p50', 'p95', 'max'} in msecs for the list of times
+        '''
+        if not times:
+            return {'cnt': 0, 'p50': 0, 'p95': 0, 'max': 0}
+
+        sorted_times = sorted(times)
+        last_idx     = len(sorted_times) - 1
+
+        return {'cnt': len(sorted_times),
+                'p50': round(sorted_times[round(last_idx * .50)], 1),
+                'p95': round(sorted_times[round(last_idx * .95)], 1),
+                'max': round(sorted_times[-1], 1)}
+
+#--------------------------------------------------------------------
+    def phase_stats(self, phase, devicename=None):
+        if devicename:
+            times = self.times_by_devicename.get(devicename, {}).get(phase)
+        else:
+            times = self.times_by_phase.get(phase)
+
+        return self.percentiles(list(times or []))
+
+#--------------------------------------------------------------------
+    @property
+    def loop_p95_msecs(self):
+        return self.phase_stats(LOOP_PHASE_LOOP)['p95']
+
+#--------------------------------------------------------------------
+    @staticmethod
+    def _format_stats(stats):
+        return f"{stats['p50']}/{stats['p95']}/{stats['max']}ms (#{stats['cnt']})"
+
+#--------------------------------------------------------------------
+    @property
+    def stats_attrs(self):
+        '''
+        Return the sensor.icloud3_loop_stats attributes:
+            phase: 'p50/p95/max ms (#cnt)' for each phase
+            devicename: {phase: 'p50/p95/max ms (#cnt)'} for each device
+        '''
+        attrs = {}
+        attrs['data_source']  = 'iCloud3'
+        attrs['stats_since']  = self.started_datetime
+        attrs['stats_format'] = 'p50/p95/max msecs (#samples)'
+
+        if Gb.LoopLoadControl:
+            attrs.update(Gb.LoopLoadControl.stats_attrs)
+        if Gb.WazeRouteCache:
+            attrs.update(Gb.WazeRouteCache.stats_attrs)
+
+        for phase in LOOP_PHASES:
+            if phase in self.times_by_phase:
+                attrs[phase] = self._format_stats(self.phase_stats(phase))
+
+        for devicename in sorted(self.times_by_devicename.keys()):
+            attrs[devicename] = {phase: self._format_stats(self.phase_stats(phase, devicename))
+                                    for phase in LOOP_PHASES
+                                    if phase in self.times_by_devicename[devicename]}
+
+        return attrs
+
+#--------------------------------------------------------------------
+    def log_loop_stats(self):
+        '''
+        Write the loop stats to the debug log
+        '''
+        if Gb.log_debug_flag is False:
+            return
+
+        log_msg = "5-sec Loop Stats > (p50/p95/max msecs) "
+        log_msg += ', '.join([f"{phase}-{self._format_stats(self.phase_stats(phase))}"
+                                for phase in LOOP_PHASES
+                                if phase in self.times_by_phase])
+        log_debug_msg(log_msg)
+
+        for devicename in sorted(self.times_by_devicename.keys()):
+            log_msg = f"5-sec Loop Stats > {devicename} > "
+            log_msg += ', '.join([f"{phase}-{self._format_stats(self.phase_stats(phase, devicename))}"
+                                for phase in LOOP_PHASES
+                                if phase in self.times_by_devicename[devicename]])
+            log_debug_msg(log_msg)
+
+#--------------------------------------------------------------------
+    def update_loop_stats_sensor(self):
+        if Gb.LoopStatsSensor:
+            Gb.LoopStatsSensor.async_update_sensor()
@@ -0,0 +1,236 @@
+#<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>
+#
+#   NEAR DEVICE CLUSTERS
+#
+#   A Device near another Device that was just updated uses that Device's
+#   results (copy_near_device_results) instead of calculating its own. The
+#   NearDevice was selected for each Device when it was updated and the
+#   NearDevice pointers of the other Devices were followed to make sure they did
+#   not loop back to the Device (with a loop counter and a 5-sec timer guard).
+#
+#   The Devices that are near each other are now put in clusters. The Devices
+#   in the same or adjoining NEAR_DEVICE_DISTANCE grid cells are checked using
+#   the Gb.DeviceDistances matrix (distance and gps accuracy factor) and joined
+#   with a union-find. The Devices in each cluster are then ranked. The Devices
+#   that can be used as a NearDevice are first, the one with the newest location
+#   then the one closest to the others, as the NearDevice was selected before.
+#   The first one is the leader. A Device uses the closest Device ranked ahead
+#   of it that it is near as its NearDevice. A Device never uses one ranked
+#   behind it and the leader never has a NearDevice, so there can not be a loop.
+#
+#   The clusters are built again when a distance between Devices changes and at
+#   the start of each 5-sec loop pass. The DeviceUpdatePool jobs build and read
+#   the clusters at the same time so this is done while holding the lock, and the
+#   new cluster lists replace the old ones (they are not changed in place).
+#
+#<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>
+
+from ..global_variables     import GlobalVariables as Gb
+from ..const                import (NEAR_DEVICE_DISTANCE, HIGH_INTEGER, )
+from ..helpers.messaging    import (log_debug_msg, log_exception, _trace, _traceha, )
+
+import math
+import threading
+
+M_PER_LAT_DEGREE = 111000
+
+
+#<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>
+class NearDeviceClusters(object):
+
+    def __init__(self):
+        self.clusters              = []     # [[Devices]] ranked clusters with more than one Device
+        self.Cluster_by_devicename = {}     # {devicename: ranked cluster Devices}
+        self.rank_by_devicename    = {}     # {devicename: position in the ranked cluster}
+        self.rebuild_flag          = True   # The distances changed since the clusters were built
+        self._lock                 = threading.RLock()
+
+    def __repr__(self):
+        return (f"<NearDeviceClusters: "
+                f"{[[Device.devicename for Device in Cluster] for Cluster in self.clusters]}>")
+
+#--------------------------------------------------------------------
+    def new_pass(self):
+        self.rebuild_flag = True
+
+    def distances_changed(self):
+        self.rebuild_flag = True
+
+#--------------------------------------------------------------------
+    @staticmethod
+    def _distance_m(Device, _Device):
+        entry = Gb.DeviceDistances.rows.get(Device.devicename, {}).get(_Device.devicename)
+        return entry[0] if entry else HIGH_INTEGER
+
+    @staticmethod
+    def is_near_device_pair(Device, _Device):
+        '''
+        Are the Devices near each other using the distance and gps accuracy factor
+        in the Device distance matrix
+        '''
+        entry = Gb.DeviceDistances.rows.get(Device.devicename, {}).get(_Device.devicename)
+        if entry is None:
+            return False
+
+        dist_m, min_gps_accuracy = entry
+        return (dist_m <= NEAR_DEVICE_DISTANCE
+                    and Gb.DeviceDistances.gps_accuracy_factor(dist_m, min_gps_accuracy) <= NEAR_DEVICE_DISTANCE
+                    and (dist_m > 0 or min_gps_accuracy > 0)           # Not located yet
+                    and Device.is_inzone_stationary is False
+                    and _Device.is_inzone_stationary is False)
+
+    @staticmethod
+    def can_be_near_device(Device):
+        '''
+        The Device's results can be used by the other Devices in the cluster
+        '''
+        return (Device.is_tracked
+                    and Device.DeviceFmZoneHome.interval_secs > 0
+                    and Device.old_loc_poor_gps_cnt == 0
+                    and Device.is_online)
+
+#--------------------------------------------------------------------
+    @staticmethod
+    def _candidate_pairs(Devices):
+        '''
+        Put the Devices in NEAR_DEVICE_DISTANCE grid cells and return the pairs of
+        Devices in the same or adjoining cells
+
+        Return:
+            [(Device, _Device)]
+        '''
+        Located_Devices = [Device for Device in Devices
+                                if Device.loc_data_latitude and Device.loc_data_longitude]
+        if len(Located_Devices) < 2:
+            return []
+
+        max_abs_lat   = min(max([abs(Device.loc_data_latitude) for Device in Located_Devices]), 89)
+        lat_cell_deg  = NEAR_DEVICE_DISTANCE / M_PER_LAT_DEGREE
+        long_cell_deg = lat_cell_deg / math.cos(math.radians(max_abs_lat))
+
+        Devices_by_cell = {}
+        for Device in Located_Devices:
+            cell = (math.floor(Device.loc_data_latitude / lat_cell_deg),
+                    math.floor(Device.loc_data_longitude / long_cell_deg))
+            Devices_by_cell.setdefault(cell, []).append(Device)
+
+        candidate_pairs = []
+        for (lat_cell, long_cell), Cell_Devices in Devices_by_cell.items():
+            for lat_offset in (-1, 0, 1):
+                for long_offset in (-1, 0, 1):
+                    for Device in Cell_Devices:
+                        for _Device in Devices_by_cell.get((lat_cell + lat_offset, long_cell + long_offset), []):
+                            if Device.devicename < _Device.devicename:
+                                candidate_pairs.append((Device, _Device))
+
+        return candidate_pairs
+
+#--------------------------------------------------------------------
+    def build_clusters(self):
+        '''
+        Join the Devices that are near each other with a union-find, then rank the
+        Devices in each cluster
+        '''
+        try:
+            Devices = list(Gb.Devices_by_devicename.values())
+            parent  = {Device.devicename: Device.devicename for Device in Devices}
+
+            def find(devicename):
+                while parent[devicename] != devicename:
+                    parent[devicename] = parent[parent[devicename]]
+                    devicename = parent[devicename]
+                return devicename
+
+            for Device, _Device in self._candidate_pairs(Devices):
+                if self.is_near_device_pair(Device, _Device):
+                    parent[find(Device.devicename)] = find(_Device.devicename)
+
+            # Group by the root, keeping the configuration order
+            Devices_by_root = {}
+            for Device in Devices:
+                Devices_by_root.setdefault(find(Device.devicename), []).append(Device)
+
+            clusters = [self._ranked_cluster(Cluster)
+                                for Cluster in Devices_by_root.values() if len(Cluster) > 1]
+            Cluster_by_devicename = {}
+            rank_by_devicename    = {}
+            for Cluster in clusters:
+                for rank, Device in enumerate(Cluster):
+                    Cluster_by_devicename[Device.devicename] = Cluster
+                    rank_by_devicename[Device.devicename]    = rank
+
+            with self._lock:
+                self.clusters              = clusters
+                self.Cluster_by_devicename = Cluster_by_devicename
+                self.rank_by_devicename    = rank_by_devicename
+
+        except Exception as err:
+            log_exception(err)
+
+    def _ranked_cluster(self, Cluster):
+        '''
+        Rank the cluster's Devices. The Devices that can be used as a NearDevice are
+        first, the newest location first, then the closest to the other Devices.
+
+        Return:
+            [Devices] - The leader is the first one if it can be used
+        '''
+        def rank_key(Device):
+            return (self.can_be_near_device(Device) is False,
+                    -Device.loc_data_secs,
+                    sum(self._distance_m(Device, _Device)
+                            for _Device in Cluster if _Device is not Device))
+
+        return sorted(Cluster, key=rank_key)
+
+#--------------------------------------------------------------------
+    def near_device(self, Device):
+        '''
+        Return:
+            The closest Device ranked ahead of the Device in its cluster that it is
+            near and can be used as its NearDevice, or None
+        '''
+        with self._lock:
+            if self.rebuild_flag:
+                self.rebuild_flag = False
+                self.build_clusters()
+
+            Cluster = self.Cluster_by_devicename.get(Device.devicename)
+            rank    = self.rank_by_devicename.get(Device.devicename, 0)
+
+        if Cluster is None or Device.is_tracked is False:
+            return None
+
+        Near_Devices = [_Device for _Device in Cluster[:rank]
+                                if (self.can_be_near_device(_Device)
+                                        and self.is_near_device_pair(Device, _Device))]
+
+        return min(Near_Devices, key=lambda _Device: self._distance_m(Device, _Device), default=None)
+
+    def is_using_device(self, Device, _Device):
+        '''
+        Is the _Device ranked behind the Device in its cluster so it can use the
+        Device's results and the Device can not use the _Device's results
+        '''
+        with self._lock:
+            Cluster_by_devicename = self.Cluster_by_devicename
+            rank_by_devicename    = self.rank_by_devicename
+
+        Cluster = Cluster_by_devicename.get(Device.devicename)
+
+        return (Cluster is not None
+                    and Cluster_by_devicename.get(_Device.devicename) is Cluster
+                    and rank_by_devicename[_Device.devicename]
+                            > rank_by_devicename[Device.devicename])
+
+#--------------------------------------------------------------------
+    def log_clusters(self):
+        if Gb.log_debug_flag is False or self.clusters == []:
+            return
+
+        clusters_msg = ''
+        for Cluster in self.clusters:
+            Leader = Cluster[0] if self.can_be_near_device(Cluster[0]) else None
+            clusters_msg += (f"{Leader.devicename if Leader else 'NoLeader'}-"
+                            f"{[Device.devicename for Device in Cluster]}, ")
+        log_debug_msg(f"Near Device Clusters > {clusters_msg}")
@@ -0,0 +1,205 @@
+#<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>
+#
+#   PERIODIC TASK REGISTRY
+#
+#   The hourly, midnight, 1am, every minute, 15-minute and 30-minute tasks were
+#   run by comparing parts of the this_update_time string to '00:00', '00',
+#   ['00', '15', '30', '45'], etc. on every 5-sec loop pass. If the pass with
+#   that exact second was skipped because the prior pass was still running,
+#   the task was not run.
+#
+#   Tasks are now registered with an interval and an offset from midnight and
+#   kept in a priority queue (heapq) by their next run time. Each 5-sec loop
+#   pass runs the tasks whose run time has been reached. A task that is late
+#   is still run (once, any other missed runs are counted) and the next run
+#   time is set to the next interval boundary after the current time.
+#
+#   The run times are set from the local time of day. When the local time zone
+#   offset changes (daylight saving time starts or ends), all of the tasks are
+#   rescheduled on the next pass so the midnight and hourly tasks are not run an
+#   hour off.
+#
+#   Usage:
+#       Gb.PeriodicTasks.register('midnight', self._timer_tasks_midnight,
+#                                   interval_secs=86400, offset_secs=0)
+#       Gb.PeriodicTasks.run_due_tasks()
+#
+#<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>
+
+from ..global_variables     import GlobalVariables as Gb
+from ..helpers.messaging    import (log_debug_msg, log_exception, _trace, _traceha, )
+from ..helpers.time_util    import (time_now_secs, time_to_secs, secs_to_time, )
+
+import homeassistant.util.dt as dt_util
+import heapq
+import time
+
+ONE_DAY_SECS = 86400
+TIME_ZONE_OFFSET_ROUND_SECS = 900       # Time zone offsets are multiples of 15-minutes
+
+
+#<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>
+class PeriodicTask(object):
+
+    def __init__(self, name, task_function, interval_secs, offset_secs=0):
+        self.name          = name
+        self.task_function = task_function
+        self.interval_secs = interval_secs      # Run every interval_secs
+        self.offset_secs   = offset_secs        # Secs after the interval boundary (1am = 3600)
+        self.next_run_secs = 0
+        self.last_run_secs = 0
+        self.run_cnt       = 0
+        self.missed_cnt    = 0                  # Runs that were missed and not made up
+        self.late_cnt      = 0                  # Runs that were done after the scheduled pass
+        self.total_msecs   = 0.0
+        self.max_msecs     = 0.0
+        self.last_msecs    = 0.0
+
+    def __repr__(self):
+        return (f"<PeriodicTask: {self.name}, Every-{self.interval_secs}s, "
+                f"Next-{secs_to_time(self.next_run_secs)}>")
+
+#--------------------------------------------------------------------
+    def set_next_run_secs(self, now_secs, local_time_secs):
+        '''
+        Set the next run time to the next interval boundary (plus offset) after now
+
+        Parameters:
+            now_secs - Current time (secs)
+            local_time_secs - Current local time of day (secs since midnight)
+        '''
+        secs_past_boundary  = (local_time_secs - self.offset_secs) % self.interval_secs
+        self.next_run_secs  = now_secs + self.interval_secs - secs_past_boundary
+
+    @property
+    def avg_msecs(self):
+        return round(self.total_msecs / self.run_cnt, 1) if self.run_cnt else 0
+
+
+#<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>
+class PeriodicTaskRegistry(object):
+
+    def __init__(self):
+        self.Tasks_by_name = {}
+        self.task_heap     = []         # [(next_run_secs, seq, task_name)] priority queue
+        self._seq          = 0          # Keeps tasks with the same run time in registration order
+        self.local_offset_secs = None   # Local time zone offset the run times were set with
+
+    def __repr__(self):
+        return f"<PeriodicTaskRegistry: Tasks-{list(self.Tasks_by_name.keys())}>"
+
+#--------------------------------------------------------------------
+    @staticmethod
+    def _now_secs():
+        '''
+        Return the current time and local time of day. The 5-sec loop pass times are
+        used so all tasks in a pass see the same time.
+        '''
+        if Gb.this_update_secs > 0 and Gb.this_update_time:
+            return Gb.this_update_secs, time_to_secs(Gb.this_update_time)
+
+        return time_now_secs(), time_to_secs(dt_util.now().strftime('%H:%M:%S'))
+
+    @staticmethod
+    def _local_offset_secs(now_secs, local_time_secs):
+        offset_secs = (local_time_secs - now_secs) % ONE_DAY_SECS
+        return (round(offset_secs / TIME_ZONE_OFFSET_ROUND_SECS)
+                    * TIME_ZONE_OFFSET_ROUND_SECS) % ONE_DAY_SECS
+
+#--------------------------------------------------------------------
+    def register(self, name, task_function, interval_secs, offset_secs=0):
+        '''
+        Add a task or replace the one with the same name
+
+        Parameters:
+            name - Task name used in the stats
+            task_function - function() to run
+            interval_secs - Run every interval secs (60=every minute, 86400=daily)
+            offset_secs - Secs after each interval boundary (daily at 1am: 86400, 3600)
+        '''
+        Task = PeriodicTask(name, task_function, interval_secs, offset_secs % interval_secs)
+        self.Tasks_by_name[name] = Task
+
+        now_secs, local_time_secs = self._now_secs()
+        self.local_offset_secs = self._local_offset_secs(now_secs, local_time_secs)
+        self._schedule_task(Task, now_secs, local_time_secs)
+
+        return Task
+
+#--------------------------------------------------------------------
+    def _schedule_task(self, Task, now_secs, local_time_secs):
+        Task.set_next_run_secs(now_secs, local_time_secs)
+        self._seq += 1
+        heapq.heappush(self.task_heap, (Task.next_run_secs, self._seq, Task.name))
+
+#--------------------------------------------------------------------
+    def reschedule_all_tasks(self):
+        '''
+        Recalculate the next run time of all tasks (the local time zone offset changed)
+        '''
+        self.task_heap = []
+        now_secs, local_time_secs = self._now_secs()
+        self.local_offset_secs = self._local_offset_secs(now_secs, local_time_secs)
+        for Task in self.Tasks_by_name.values():
+            self._schedule_task(Task, now_secs, local_time_secs)
+
+#--------------------------------------------------------------------
+    def run_due_tasks(self):
+        '''
+        Run the tasks whose next run time has been reached. Late tasks are run once
+        and the runs missed before it are counted.
+        '''
+        now_secs, local_time_secs = self._now_secs()
+
+        local_offset_secs = self._local_offset_secs(now_secs, local_time_secs)
+        if local_offset_secs != self.local_offset_secs:
+            log_debug_msg(f"Periodic Tasks > Time Zone Offset Changed, Rescheduling Tasks, "
+                            f"Offset-{self.local_offset_secs}s to {local_offset_secs}s")
+            self.reschedule_all_tasks()
+
+        while self.task_heap and self.task_heap[0][0] <= now_secs:
+            next_run_secs, seq, name = heapq.heappop(self.task_heap)
+
+            Task = self.Tasks_by_name.get(name)
+            if Task is None or Task.next_run_secs != next_run_secs:
+                continue
+
+            late_secs = now_secs - next_run_secs
+            if late_secs >= Task.interval_secs:
+                Task.missed_cnt += late_secs // Task.interval_secs
+            if late_secs > 0:
+                Task.late_cnt += 1
+
+            self._run_task(Task, now_secs)
+            self._schedule_task(Task, now_secs, local_time_secs)
+
+#--------------------------------------------------------------------
+    @staticmethod
+    def _run_task(Task, now_secs):
+        started = time.perf_counter()
+        try:
+            Task.task_function()
+
+        except Exception as err:
+            log_exception(err)
+
+        Task.last_msecs     = (time.perf_counter() - started) * 1000
+        Task.total_msecs   += Task.last_msecs
+        Task.max_msecs      = max(Task.max_msecs, Task.last_msecs)
+        Task.last_run_secs  = now_secs
+        Task.run_cnt       += 1
+
+#--------------------------------------------------------------------
+    def log_task_stats(self):
+        '''
+        Write the run counts and times of each task to the debug log
+        '''
+        if Gb.log_debug_flag is False:
+            return
+
+        log_msg = "Periodic Tasks > (runs/late/missed, avg/max msecs, next run) "
+        log_msg += ', '.join([f"{Task.name}-{Task.run_cnt}/{Task.late_cnt}/{Task.missed_cnt}, "
+                                f"{Task.avg_msecs}/{round(Task.max_msecs, 1)}ms, "
+                                f"{secs_to_time(Task.next_run_secs)}"
+                                for Task in self.Tasks_by_name.values()])
+        log_debug_msg(log_msg)
@@ -206,26 +206,29 @@ def update_service_handler(action_entry=None, action_fname=None, devicename=None
         else:
             Devices = [Device for Device in Gb.Devices_by_devicename_tracked.values()]
 
+        # The Device actions are run when the Device's update in process finishes
+        # so they do not change the Device in the middle of an update
         if action == CMD_PAUSE:
             if devicename is None:
                 Gb.all_tracking_paused_flag = True
                 Gb.EvLog.display_user_message('Tracking is Paused', alert=True)
             for Device in Devices:
-                Device.pause_tracking
+                Gb.UpdateCompletion.run_when_update_complete(_handle_action_device_pause, Device)
 
         elif action == CMD_RESUME:
             Gb.all_tracking_paused_flag = False
             Gb.EvLog.display_user_message('', clear_alert=True)
             for Device in Devices:
-                Device.resume_tracking
+                Gb.UpdateCompletion.run_when_update_complete(_handle_action_device_resume, Device)
 
         elif action == CMD_LOCATE:
             for Device in Devices:
-                _handle_action_device_locate(Device, action_option)
+                Gb.UpdateCompletion.run_when_update_complete(_handle_action_device_locate,
+                                                            Device, action_option)
 
         elif action == CMD_REQUEST_LOCATION:
             for Device in Devices:
-                _handle_action_device_location(Device)
+                Gb.UpdateCompletion.run_when_update_complete(_handle_action_device_location, Device)
 
     if devicename == 'startup_log':
         pass
@@ -386,6 +389,13 @@ def _on_off_text(condition):
 def close_reopen_ic3_debug_log_file():
     close_reopen_ic3_debug_log_file()
 
+#--------------------------------------------------------------------
+def _handle_action_device_pause(Device):
+    Device.pause_tracking
+
+def _handle_action_device_resume(Device):
+    Device.resume_tracking
+
 #--------------------------------------------------------------------
 def _handle_action_device_location(Device):
     '''
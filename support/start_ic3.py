@@ -33,12 +33,13 @@ from ..const            import (
                                 CONF_OLD_LOCATION_ADJUSTMENT,
                                 CONF_TFZ_TRACKING_MAX_DISTANCE, CONF_TRACK_FROM_BASE_ZONE, CONF_TRACK_FROM_HOME_ZONE,
                                 CONF_TRAVEL_TIME_FACTOR, CONF_PASSTHRU_ZONE_TIME, CONF_DISTANCE_BETWEEN_DEVICES,
-                                CONF_LOG_LEVEL,
+                                CONF_LOG_LEVEL, CONF_LOAD_SHEDDING, CONF_ZONE_HYSTERESIS,
                                 CONF_DISPLAY_ZONE_FORMAT, CONF_DEVICE_TRACKER_STATE_FORMAT,
                                 CONF_CENTER_IN_ZONE, CONF_DISCARD_POOR_GPS_INZONE,
                                 CONF_WAZE_USED, CONF_WAZE_REGION, CONF_WAZE_MAX_DISTANCE, CONF_WAZE_MIN_DISTANCE,
                                 CONF_WAZE_REALTIME, CONF_WAZE_HISTORY_DATABASE_USED, CONF_WAZE_HISTORY_MAX_DISTANCE,
-                                CONF_WAZE_HISTORY_TRACK_DIRECTION,
+                                CONF_WAZE_HISTORY_TRACK_DIRECTION, CONF_WAZE_ROUTE_CACHE_SIZE, CONF_WAZE_ROUTE_CACHE_TIME,
+                                CONF_WAZE_HISTORY_MATCH_RADIUS, CONF_WAZE_HISTORY_NEAREST_CNT,
                                 CONF_STAT_ZONE_FNAME, CONF_STAT_ZONE_STILL_TIME, CONF_STAT_ZONE_INZONE_INTERVAL,
                                 CONF_STAT_ZONE_BASE_LATITUDE,
                                 CONF_STAT_ZONE_BASE_LONGITUDE, CONF_DISPLAY_TEXT_AS,
@@ -54,6 +55,7 @@ from ..device               import iCloud3_Device
 from ..zone                 import iCloud3_Zone, iCloud3_StationaryZone
 from ..support.waze         import Waze
 from ..support.waze_history import WazeRouteHistory as WazeHist
+from ..support.zone_spatial_index import ZoneSpatialIndex
 from ..support              import iosapp_interface
 from ..support              import iosapp_data_handler
 from ..support              import service_handler
@@ -206,6 +208,8 @@ def initialize_global_variables():
     Gb.travel_time_factor              = DEFAULT_GENERAL_CONF[CONF_TRAVEL_TIME_FACTOR]
     Gb.track_from_base_zone            = DEFAULT_GENERAL_CONF[CONF_TRACK_FROM_BASE_ZONE]
     Gb.track_from_home_zone            = DEFAULT_GENERAL_CONF[CONF_TRACK_FROM_HOME_ZONE]
+    Gb.load_shedding                   = DEFAULT_GENERAL_CONF[CONF_LOAD_SHEDDING]
+    Gb.zone_hysteresis                 = DEFAULT_GENERAL_CONF[CONF_ZONE_HYSTERESIS]
     Gb.gps_accuracy_threshold          = DEFAULT_GENERAL_CONF[CONF_GPS_ACCURACY_THRESHOLD]
     Gb.old_location_threshold          = DEFAULT_GENERAL_CONF[CONF_OLD_LOCATION_THRESHOLD] * 60
     Gb.old_location_adjustment         = DEFAULT_GENERAL_CONF[CONF_OLD_LOCATION_ADJUSTMENT] * 60
@@ -220,6 +224,10 @@ def initialize_global_variables():
     Gb.waze_history_database_used      = DEFAULT_GENERAL_CONF[CONF_WAZE_HISTORY_DATABASE_USED]
     Gb.waze_history_max_distance       = DEFAULT_GENERAL_CONF[CONF_WAZE_HISTORY_MAX_DISTANCE]
     Gb.waze_history_track_direction    = DEFAULT_GENERAL_CONF[CONF_WAZE_HISTORY_TRACK_DIRECTION]
+    Gb.waze_history_match_radius       = DEFAULT_GENERAL_CONF[CONF_WAZE_HISTORY_MATCH_RADIUS]
+    Gb.waze_history_nearest_cnt        = DEFAULT_GENERAL_CONF[CONF_WAZE_HISTORY_NEAREST_CNT]
+    Gb.waze_route_cache_size           = DEFAULT_GENERAL_CONF[CONF_WAZE_ROUTE_CACHE_SIZE]
+    Gb.waze_route_cache_time           = DEFAULT_GENERAL_CONF[CONF_WAZE_ROUTE_CACHE_TIME]
 
     # Tracking method control vaiables
     # Used to reset Gb.tracking_method  after pyicloud/icloud account successful reset
@@ -269,6 +277,8 @@ def set_global_variables_from_conf_parameters(evlog_msg=True):
         Gb.gps_accuracy_threshold       = Gb.conf_general[CONF_GPS_ACCURACY_THRESHOLD]
         Gb.discard_poor_gps_inzone_flag = Gb.conf_general[CONF_DISCARD_POOR_GPS_INZONE]
         Gb.distance_between_device_flag = Gb.conf_general[CONF_DISTANCE_BETWEEN_DEVICES]
+        Gb.load_shedding                = Gb.conf_general[CONF_LOAD_SHEDDING]
+        Gb.zone_hysteresis              = Gb.conf_general[CONF_ZONE_HYSTERESIS]
 
         Gb.tfz_tracking_max_distance   = Gb.conf_general[CONF_TFZ_TRACKING_MAX_DISTANCE]
 
@@ -342,6 +352,10 @@ def ha_startup_completed(dummy_parameter):
 
 def ha_stopping(dummy_parameter):
     post_event("HA Shutting Down")
+    if Gb.DeviceUpdatePool:
+        Gb.DeviceUpdatePool.shutdown()
+    if Gb.WazeRouteFanout:
+        Gb.WazeRouteFanout.shutdown()
     close_ic3_debug_log_file()
 
 #------------------------------------------------------------------------------
@@ -489,6 +503,14 @@ def set_waze_conf_parameters():
 
     Gb.waze_history_max_distance    = Gb.conf_general[CONF_WAZE_HISTORY_MAX_DISTANCE]
     Gb.waze_history_track_direction = Gb.conf_general[CONF_WAZE_HISTORY_TRACK_DIRECTION]
+    Gb.waze_history_match_radius    = Gb.conf_general[CONF_WAZE_HISTORY_MATCH_RADIUS]
+    Gb.waze_history_nearest_cnt     = Gb.conf_general[CONF_WAZE_HISTORY_NEAREST_CNT]
+    Gb.waze_route_cache_size        = Gb.conf_general[CONF_WAZE_ROUTE_CACHE_SIZE]
+    Gb.waze_route_cache_time        = Gb.conf_general[CONF_WAZE_ROUTE_CACHE_TIME]
+
+    # The realtime setting or cache size may have changed
+    if Gb.WazeRouteCache:
+        Gb.WazeRouteCache.clear()
 
     # Update Waze & WazeHist with updated parameters
     create_Waze_object()
@@ -915,6 +937,12 @@ def create_Zones_object():
         for from_zone in conf_device[CONF_TRACK_FROM_ZONES]:
             Gb.TrackedZones_by_zone[from_zone] = Gb.Zones_by_zone[from_zone]
 
+    # Index the zones that were just set up and clear the zone selections that
+    # used the old zones
+    Gb.ZoneIndex = ZoneSpatialIndex(Gb.Zones)
+    if Gb.ZoneSelectCache is not None:
+        Gb.ZoneSelectCache.zones_changed()
+
 #<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>
 #
 #   ICLOUD3 STARTUP MODULES -- STAGE 1
@@ -934,6 +962,7 @@ def create_Waze_object():
     '''
     try:
         if Gb.Waze:
+            Gb.Waze.close()
             Gb.Waze.__init__(   Gb.distance_method_waze_flag,
                                 Gb.waze_min_distance,
                                 Gb.waze_max_distance,
@@ -1843,10 +1872,10 @@ def setup_trackable_devices():
             else:
                 event_msg += f"{CRLF_DOT}Notifications: WAITING FOR NOTIFY SERVICE TO START"
 
-        # Initialize distance_to_other_devices, add other devicenames to this Device's field
+        # Initialize distance_to_other_devices, add other devicenames to this Device's row
+        Gb.DeviceDistances.initialize_device(Device)
         for _devicename, _Device in Gb.Devices_by_devicename.items():
             if devicename != _devicename:
-                Device.dist_to_other_devices[_devicename] = [0, 0, '0m/±0m']
                 Device.near_device_distance         = 0       # Distance to the NearDevice device
                 Device.near_device_checked_secs     = 0       # When the nearby devices were last updated
                 Device.dist_apart_msg               = ''      # Distance to all other devices msg set in icloud3_main
@@ -9,6 +9,8 @@ from ..const                import (NOT_SET,
 from ..support              import start_ic3
 from ..support              import pyicloud_ic3_interface
 from ..support              import icloud_data_handler
+from ..support              import iosapp_state_listener
+from ..support              import zone_change_listener
 from ..support              import determine_interval as det_interval
 
 from ..helpers.common       import (instr, obscure_field, )
@@ -89,6 +91,7 @@ def stage_2_prepare_configuration():
             start_ic3.initialize_PyiCloud()
 
         start_ic3.create_Zones_object()
+        zone_change_listener.subscribe_to_zone_changes()
         start_ic3.create_Waze_object()
 
         Gb.WazeHist.load_track_from_zone_table()
@@ -261,6 +264,7 @@ def stage_5_configure_tracked_devices():
         Gb.EvLog.setup_event_log_trackable_device_info()
 
         start_ic3.setup_trackable_devices()
+        iosapp_state_listener.subscribe_to_iosapp_state_changes()
         start_ic3.display_inactive_devices()
         Gb.EvLog.update_event_log_display("")
         start_ic3.display_object_lists()
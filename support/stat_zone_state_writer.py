@@ -0,0 +1,71 @@
+#<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>
+#
+#   STATIONARY ZONE STATE WRITER
+#
+#   The Stationary Zone's HA zone entity was written (hass.states.async_set) as
+#   soon as it was moved to the Device's location or back to its base location,
+#   from the Device update thread. When many Devices went into a Stationary Zone
+#   at the same time, this was a burst of zone entity writes.
+#
+#   The zone entity attributes are now queued when the Stationary Zone is moved
+#   (the newest attributes for each zone replace the older ones) and written at
+#   the end of the 5-sec loop pass in one job run in the HA event loop.
+#
+#   Usage:
+#       Gb.StatZoneStateWriter.queue_zone_state(StatZone, attrs)
+#       Gb.StatZoneStateWriter.write_pending_zone_states()
+#
+#<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>
+
+from ..global_variables     import GlobalVariables as Gb
+from ..helpers.messaging    import (log_exception, _trace, _traceha, )
+
+from homeassistant.core     import callback
+import threading
+
+
+#<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>
+class StatZoneStateWriter(object):
+
+    def __init__(self):
+        self.attrs_by_entity_id = {}        # {zone entity_id: attributes to write}
+        self._lock              = threading.Lock()
+
+    def __repr__(self):
+        return f"<StatZoneStateWriter: Pending-{list(self.attrs_by_entity_id.keys())}>"
+
+#--------------------------------------------------------------------
+    def queue_zone_state(self, StatZone, attrs):
+        '''
+        Save the Stationary Zone's attributes to be written at the end of the pass
+        '''
+        with self._lock:
+            self.attrs_by_entity_id[f"zone.{StatZone.zone}"] = attrs.copy()
+
+#--------------------------------------------------------------------
+    def write_pending_zone_states(self):
+        '''
+        Write the queued zone states in one job in the HA event loop
+        '''
+        if self.attrs_by_entity_id == {}:
+            return
+
+        with self._lock:
+            attrs_by_entity_id = self.attrs_by_entity_id
+            self.attrs_by_entity_id = {}
+
+        try:
+            Gb.hass.loop.call_soon_threadsafe(self._async_write_zone_states, attrs_by_entity_id)
+
+        except Exception as err:
+            log_exception(err)
+
+    @staticmethod
+    @callback
+    def _async_write_zone_states(attrs_by_entity_id):
+        for entity_id, attrs in attrs_by_entity_id.items():
+            try:
+                Gb.hass.states.async_set(entity_id, 0, attrs, force_update=True)
+
+            except Exception as err:
+                log_exception(err)
@@ -0,0 +1,117 @@
+#<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>
+#
+#   UPDATE COMPLETION SIGNAL
+#
+#   The EvLog Action requests (pause, resume, locate) that had to wait for the
+#   5-sec loop pass to finish looped on time.sleep(2) checking the master
+#   update-in-process flag. This tied up an executor thread and added up to
+#   2-secs of delay.
+#
+#   The 5-sec loop now signals the start and end of each pass. A request is run
+#   right away if nothing is being updated. Otherwise it is queued and the 5-sec
+#   loop runs it on its own thread at the start of the first pass after the
+#   pass and all of the DeviceUpdatePool device updates have finished.
+#
+#   Usage:
+#       Gb.UpdateCompletion.run_when_update_complete(function, Device, arg)
+#       Gb.UpdateCompletion.run_queued_requests()     (5-sec loop)
+#
+#<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>
+
+from ..global_variables     import GlobalVariables as Gb
+from ..helpers.messaging    import (log_debug_msg, log_exception, _trace, _traceha, )
+
+import threading
+
+
+#<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>
+class UpdateCompletion(object):
+
+    def __init__(self):
+        self._lock              = threading.RLock()
+        self.pass_in_process_flag = False   # A 5-sec loop pass is running
+        self.pass_cnt           = 0         # Number of 5-sec loop passes completed
+        self.queued_requests    = []        # [(function, Device, args)] run when the updates finish
+
+    def __repr__(self):
+        return (f"<UpdateCompletion: InProcess-{self.pass_in_process_flag}, "
+                f"Queued-{len(self.queued_requests)}>")
+
+#--------------------------------------------------------------------
+    def is_update_in_process(self):
+        '''
+        Return:
+            True - The 5-sec loop pass is running or a Device is being updated on
+                    the DeviceUpdatePool
+            False - Nothing is being updated
+        '''
+        return (self.pass_in_process_flag
+                    or (Gb.DeviceUpdatePool is not None
+                            and Gb.DeviceUpdatePool.is_any_update_in_process))
+
+#--------------------------------------------------------------------
+    def pass_started(self):
+        '''
+        A request being run now finishes before the pass is started
+        '''
+        with self._lock:
+            self.pass_in_process_flag = True
+
+    def pass_finished(self):
+        with self._lock:
+            self.pass_in_process_flag = False
+            self.pass_cnt += 1
+
+#--------------------------------------------------------------------
+    def run_when_update_complete(self, update_function, Device=None, *args):
+        '''
+        Run the function now if nothing is being updated. Otherwise queue it, the
+        5-sec loop runs it when the updates are finished.
+
+        Parameters:
+            update_function - function(Device, *args) or function(*args) if no Device
+            Device - The Device the request is for, None for a global request
+
+        Return:
+            True - The function was run
+            False - The function was queued
+        '''
+        with self._lock:
+            if self.is_update_in_process() is False:
+                self._run_request(update_function, Device, args)
+                return True
+
+            self.queued_requests.append((update_function, Device, args))
+
+        log_debug_msg(f"Update Completion > Request Queued > {update_function.__name__}, "
+                        f"{Device.devicename if Device else 'All Devices'}")
+        return False
+
+#--------------------------------------------------------------------
+    def run_queued_requests(self):
+        '''
+        Run the queued requests if the 5-sec loop pass and all of the Device
+        updates are finished. This is called by the 5-sec loop before a pass
+        is started.
+        '''
+        with self._lock:
+            if self.queued_requests == [] or self.is_update_in_process():
+                return
+
+            run_requests = self.queued_requests
+            self.queued_requests = []
+
+            for update_function, Device, args in run_requests:
+                self._run_request(update_function, Device, args)
+
+#--------------------------------------------------------------------
+    @staticmethod
+    def _run_request(update_function, Device, args):
+        try:
+            if Device is None:
+                update_function(*args)
+            else:
+                update_function(Device, *args)
+
+        except Exception as err:
+            log_exception(err)
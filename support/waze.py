@@ -153,6 +153,12 @@ class Waze(object):
 
                         return (WAZE_NO_DATA, 0, 0, 0)
 
+                    if Gb.WazeRouteCache:
+                        Gb.WazeRouteCache.save_route(from_zone,
+                                                Device.loc_data_latitude,
+                                                Device.loc_data_longitude,
+                                                route_time, route_dist_km)
+
                     # Add a time/distance record to the waze history database
                     try:
                         if (Gb.waze_history_database_used
@@ -258,14 +264,28 @@ class Waze(object):
             location_id = -2
             waze_source_msg = "Using Previous Waze Location Info "
 
+        elif (Gb.WazeRouteCache
+                and (route := Gb.WazeRouteCache.get_route(from_zone,
+                                            Device.loc_data_latitude,
+                                            Device.loc_data_longitude))):
+            # Another Device near this location (or this one) got the route recently
+            route_time, route_dist_km = route
+            location_id = -3
+            waze_source_msg = "Using Waze Route Cache "
+
         elif check_hist_db is False or Gb.WazeHist.use_wazehist_flag is False:
             location_id = 0
 
         else:
             # Get waze data from Waze History and update usage counter
-            # for that location. (location id is 0 if not in history)
+            # for that location. (location id is 0 if not in history). The
+            # Waze Route Fan-out may have already looked it up.
             route_time, route_dist_km, location_id  = \
-                    Gb.WazeHist.get_location_time_dist(
+                    Gb.WazeRouteFanout.get_wazehist_location(
+                                            Device, from_zone,
+                                            Device.loc_data_latitude,
+                                            Device.loc_data_longitude) \
+                    or Gb.WazeHist.get_location_time_dist(
                                             from_zone,
                                             Device.loc_data_latitude,
                                             Device.loc_data_longitude)
@@ -276,6 +296,12 @@ class Waze(object):
                 Gb.WazeHist.update_usage_cnt(location_id)
                 waze_source_msg = f"Using Route History Database, Recd-{location_id} "
 
+                if Gb.WazeRouteCache:
+                    Gb.WazeRouteCache.save_route(from_zone,
+                                            Device.loc_data_latitude,
+                                            Device.loc_data_longitude,
+                                            route_time, route_dist_km)
+
             else:
                 # Zone's location changed in WazeHist or invalid data. Get from Waze later
                 location_id = 0
@@ -307,35 +333,23 @@ class Waze(object):
                 log_info_msg(log_msg)
                 return (WAZE_NO_DATA, 0, 0)
 
-            retry_cnt = 0
-            while retry_cnt < 3:
-                try:
-                    retry_msg = '' if retry_cnt == 0 else (f" (#{retry_cnt})")
-                    # if route_from == ZONE:
-                    #     Device.display_info_msg( f"GetWazeInfoFrom-{DeviceFmZone.from_zone_display_as}{retry_msg}")
-                    # elif route_from == 'moved':
-                    #     Device.display_info_msg( f"GetWazeMovedFrom-LastLocation{retry_msg}")
-                    waze_call_start_time = time_now_secs()
-
-                    route_time, route_dist_km = \
-                            self.WazeRouteCalc.calc_route_info(from_lat, from_long, to_lat, to_long)
+            # The route may have been requested with the Device's other track from zone
+            # routes. The connection errors, timeouts and server errors are retried by
+            # the WazeRouteCalculator.
+            waze_call_start_time = time_now_secs()
 
-                    retry_cnt += 1
-                    if route_time < 0:
-                        continue
+            route_time, route_dist_km = \
+                    Gb.WazeRouteFanout.get_route(Device, from_lat, from_long, to_lat, to_long) \
+                    or Gb.WazeRouteFanout.calc_route_info(from_lat, from_long, to_lat, to_long)
 
-                    route_time    = round(route_time, 2)
-                    route_dist_km = round(route_dist_km, 2)
+            if route_time >= 0:
+                route_time    = round(route_time, 2)
+                route_dist_km = round(route_dist_km, 2)
 
-                    Device.count_waze_locates += 1
-                    Device.time_waze_calls += (time_now_secs() - waze_call_start_time)
+                Device.count_waze_locates += 1
+                Device.time_waze_calls += (time_now_secs() - waze_call_start_time)
 
-                    return (WAZE_USED, route_time, route_dist_km)
-
-                except Exception as err:
-                    if retry_cnt > 3:
-                        log_msg = (f"Waze Server Error (#{retry_cnt}), Retrying, Type-{err}")
-                        log_info_msg(log_msg)
+                return (WAZE_USED, route_time, route_dist_km)
 
         except Exception as err:
             # log_exception(err)
@@ -386,5 +400,16 @@ class Waze(object):
 
         return waze_time_msg
 
+    def close(self):
+        '''
+        Close the Waze Route Calculator's connections, iCloud3 is being restarted
+        '''
+        if self.WazeRouteCalc is not None:
+            self.WazeRouteCalc.close()
+
+    def log_request_stats(self):
+        if self.WazeRouteCalc is not None:
+            self.WazeRouteCalc.log_request_stats()
+
     def __repr__(self):
         return (f"<Waze>")
\ No newline at end of file
@@ -7,13 +7,16 @@ from ..helpers.messaging    import (broadcast_info_msg,
                                     log_info_msg, log_error_msg, log_exception,
                                     _trace, _traceha, )
 from ..helpers.time_util    import (datetime_now, secs_to_time_str, mins_to_time_str, )
-from ..helpers.dist_util    import (mi_to_km, calc_distance_km, format_dist_km,)
+from ..helpers.dist_util    import (mi_to_km, calc_distance_km, format_dist_km,
+                                    calc_gps_bounding_box, calc_distance_approx_m, )
 from ..support.waze_route_calc_ic3 import WRCError
 
 import homeassistant.util.dt as dt_util
 
 import traceback
 import time
+import math
+import threading
 import sqlite3
 from sqlite3 import Error
 
@@ -84,6 +87,16 @@ LOC_DIST         = 6
 LOC_ADDED        = 7
 LOC_LAST_USED    = 8
 LOC_USAGE_CNT    = 9
+LOC_GRID_LAT     = 10
+LOC_GRID_LONG    = 11
+
+# The locations are also indexed by the zone and the grid cell of the location
+# (WAZEHIST_GRID_CELL_DEG, about 110m). The nearest location within the
+# waze_history_match_radius is found by reading the records in the cells around
+# the location instead of needing an exact lat_long_key (4-decimal) match. The
+# radius defaults to 0, the exact match is used until it is set in the
+# configuration file.
+WAZEHIST_GRID_CELL_DEG = .001
 
 # Create the locations table
 CREATE_LOCATIONS_TABLE = '''
@@ -98,27 +111,78 @@ CREATE_LOCATIONS_TABLE = '''
         distance     DECIMAL (8, 2) DEFAULT (0),
         added        TEXT,
         last_used    TEXT,
-        usage_cnt    INTEGER DEFAULT (1)
+        usage_cnt    INTEGER DEFAULT (1),
+        grid_lat     INTEGER DEFAULT (0),
+        grid_long    INTEGER DEFAULT (0)
     );'''
 
+CREATE_LOCATIONS_GRID_INDEX = '''
+    CREATE INDEX IF NOT EXISTS locations_zone_id_grid
+        ON locations (zone_id, grid_lat, grid_long);'''
+
+# Added to an existing database by _add_locations_grid_cells - [grid_lat, grid_long, loc_id]
+ADD_LOCATIONS_GRID_LAT_COLUMN  = 'ALTER TABLE locations ADD COLUMN grid_lat INTEGER DEFAULT (0);'
+ADD_LOCATIONS_GRID_LONG_COLUMN = 'ALTER TABLE locations ADD COLUMN grid_long INTEGER DEFAULT (0);'
+UPDATE_LOCATION_GRID_CELL = '''
+    UPDATE locations
+        SET grid_lat = ?,
+            grid_long = ?
+        WHERE loc_id = ?
+    '''
+
+# One record for each zone and location, the lookups are index searches instead of
+# full table scans. Added to an existing database by _add_locations_index.
+LOCATIONS_INDEX = 'locations_zone_id_lat_long_key'
+CREATE_LOCATIONS_INDEX = f'''
+    CREATE UNIQUE INDEX IF NOT EXISTS {LOCATIONS_INDEX}
+        ON locations (zone_id, lat_long_key);'''
+
+GET_LOCATIONS_INDEX_COUNT = f'''
+    SELECT count(*) FROM sqlite_master
+        WHERE type = 'index' AND name = '{LOCATIONS_INDEX}';
+    '''
+
 GET_LOCATIONS_TABLE_RECD_COUNT = '''
     SELECT count(*) FROM locations;
     '''
 
-# Add location record - [zone_id, lat_long_key, distance, travel_time, added,
-#                        last_used, usage_cnt]
+# Get the location record - [zone_id, lat_long_key]
+GET_LOCATION_RECORD = '''
+    SELECT * FROM locations
+        WHERE zone_id = ? AND lat_long_key = ?
+    '''
+
+# Get the location records in the grid cells around a location -
+#       [zone_id, min grid_lat, max grid_lat, min grid_long, max grid_long]
+GET_GRID_LOCATION_RECORDS = '''
+    SELECT * FROM locations
+        WHERE zone_id = ?
+            AND grid_lat BETWEEN ? AND ?
+            AND grid_long BETWEEN ? AND ?
+    '''
+
+# Add location record or update the one for the zone & location -
+#       [zone_id, lat_long_key, latitude, longitude, travel_time, distance,
+#        added, last_used, usage_cnt, grid_lat, grid_long]
 ADD_LOCATION_RECORD = '''
     INSERT INTO locations(
         zone_id, lat_long_key, latitude, longitude,
-        time, distance, added, last_used, usage_cnt)
-    VALUES(?,?,?,?,?,?,?,?,?)
+        time, distance, added, last_used, usage_cnt, grid_lat, grid_long)
+    VALUES(?,?,?,?,?,?,?,?,?,?,?)
+    ON CONFLICT (zone_id, lat_long_key) DO UPDATE
+        SET latitude  = excluded.latitude,
+            longitude = excluded.longitude,
+            time      = excluded.time,
+            distance  = excluded.distance,
+            last_used = excluded.last_used,
+            usage_cnt = locations.usage_cnt + 1
     '''
 
-# Update locations table, location_data [last_used, usage_cnt, id]
+# Update locations table, location_data [last_used, id]
 UPDATE_LOCATION_USED = '''
     UPDATE locations
         SET last_used = ? ,
-            usage_cnt = ?
+            usage_cnt = usage_cnt + 1
         WHERE loc_id = ?
     '''
 
@@ -130,28 +194,24 @@ UPDATE_LOCATION_TIME_DISTANCE = '''
         WHERE loc_id = ?
     '''
 
-# DB Maintenance - Select duplicate zone_id and lat_long_key records
-DUPLICATE_LOCATION_RECDS_SELECT = '''
-    SELECT * FROM locations
-        WHERE EXISTS (
-            SELECT 1 FROM locations loc2
-                WHERE locations.zone_id = loc2.zone_id
-                    AND locations.lat_long_key = loc2.lat_long_key
-                    AND locations.rowid > loc2.rowid
-        );
-    '''
-
-# DB Maintenance - Delete duplicate zone_id and lat_long_key records
+# DB Maintenance - Delete duplicate zone_id and lat_long_key records, the first one is kept.
+# Done before the unique index is added to a database created without it.
 DUPLICATE_LOCATION_RECDS_DELETE = '''
     DELETE FROM locations
-        WHERE EXISTS (
-            SELECT 1 FROM locations loc2
-                WHERE locations.zone_id = loc2.zone_id
-                    AND locations.lat_long_key = loc2.lat_long_key
-                    AND locations.rowid > loc2.rowid
+        WHERE rowid NOT IN (
+            SELECT min(rowid) FROM locations
+                GROUP BY zone_id, lat_long_key
         );
     '''
 
+def grid_cell(latitude, longitude):
+    '''
+    Return:
+        grid_lat, grid_long of the location's grid cell
+    '''
+    return (math.floor(latitude / WAZEHIST_GRID_CELL_DEG),
+            math.floor(longitude / WAZEHIST_GRID_CELL_DEG))
+
 #<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>
 class WazeRouteHistory(object):
     def __init__(self, wazehist_used, max_distance, track_direction):
@@ -167,9 +227,10 @@ class WazeRouteHistory(object):
         self.track_latitude  = 0      # used to update the icloud3_wazeist_track_gps sensor
         self.track_longitude = 0
 
-        self.last_lat_long_key = ''   # Last lat:long key read
-        self.last_location_recds    = []   # List of the last recds retrieved for the lat:long
-
+        # The Device updates (DeviceUpdatePool) and Waze route requests (WazeRouteFanout)
+        # run on worker threads and share the connection and cursor. Every execute and
+        # fetch (or commit) is done while holding the db_lock.
+        self.db_lock    = threading.RLock()
         self.connection = None
         self.cursor     = None
         wazehist_database = Gb.wazehist_database_filename
@@ -191,13 +252,16 @@ class WazeRouteHistory(object):
         """
 
         try:
-            self.connection = sqlite3.connect(wazehist_database, check_same_thread=False)
-            self.cursor     = self.connection.cursor()
+            with self.db_lock:
+                self.connection = sqlite3.connect(wazehist_database, check_same_thread=False)
+                self.cursor     = self.connection.cursor()
 
-            self._sql(CREATE_ZONES_TABLE)
-            self._sql(CREATE_LOCATIONS_TABLE)
+                self._sql(CREATE_ZONES_TABLE)
+                self._sql(CREATE_LOCATIONS_TABLE)
+                self._add_locations_index()
+                self._add_locations_grid_cells()
 
-            self.compress_wazehist_database()
+                self.compress_wazehist_database()
 
         except:
             post_internal_error(traceback.format_exc)
@@ -206,6 +270,59 @@ class WazeRouteHistory(object):
 
         return
 
+#--------------------------------------------------------------------
+    def _add_locations_index(self):
+        '''
+        Add the unique zone_id/lat_long_key index to a locations table created
+        without it. The duplicate records are deleted first. This is done once,
+        the index is kept in the database.
+        '''
+        try:
+            self.cursor.execute(GET_LOCATIONS_INDEX_COUNT)
+            if self.cursor.fetchone()[0] > 0:
+                return
+
+            self.cursor.execute(DUPLICATE_LOCATION_RECDS_DELETE)
+            deleted_cnt = self.cursor.rowcount
+            self.cursor.execute(CREATE_LOCATIONS_INDEX)
+            self.connection.commit()
+
+            post_event(f"Waze History Database > Added Zone/Location Index, "
+                        f"Deleted Duplicate Recds-{deleted_cnt}")
+
+        except:
+            self.connection.rollback()
+            post_internal_error(traceback.format_exc)
+
+#--------------------------------------------------------------------
+    def _add_locations_grid_cells(self):
+        '''
+        Add the grid cell columns to a locations table created without them and
+        set them for the records already there. Then add the grid cell index.
+        '''
+        try:
+            self.cursor.execute("PRAGMA table_info(locations);")
+            columns = [column[1] for column in self.cursor.fetchall()]
+
+            if 'grid_lat' not in columns:
+                self.cursor.execute(ADD_LOCATIONS_GRID_LAT_COLUMN)
+                self.cursor.execute(ADD_LOCATIONS_GRID_LONG_COLUMN)
+
+                self.cursor.execute("SELECT loc_id, latitude, longitude FROM locations;")
+                grid_data = [[*grid_cell(latitude, longitude), loc_id]
+                                    for loc_id, latitude, longitude in self.cursor.fetchall()]
+                self.cursor.executemany(UPDATE_LOCATION_GRID_CELL, grid_data)
+
+                post_event(f"Waze History Database > Added Location Grid Cells, "
+                            f"Records-{len(grid_data)}")
+
+            self.cursor.execute(CREATE_LOCATIONS_GRID_INDEX)
+            self.connection.commit()
+
+        except:
+            self.connection.rollback()
+            post_internal_error(traceback.format_exc)
+
 #--------------------------------------------------------------------
     def close_waze_history_database(self):
         '''
@@ -214,28 +331,42 @@ class WazeRouteHistory(object):
         if self.connection is None:
             return
 
-        try:
-            self.connection.commit()
-            self.connection.close()
+        with self.db_lock:
+            try:
+                self.connection.commit()
+                self.connection.close()
 
-        except:
-            pass
+            except:
+                pass
 
-        self.connection = None
-        self.cursor = None
+            self.connection = None
+            self.cursor = None
 
 #--------------------------------------------------------------------
     def _sql(self, sql):
         try:
-            self.cursor.execute(sql)
-            self.connection.commit()
+            with self.db_lock:
+                self.cursor.execute(sql)
+                self.connection.commit()
         except:
             post_internal_error(traceback.format_exc)
 
 #--------------------------------------------------------------------
     def _sql_data(self, sql, data):
-        self.cursor.execute(sql, data)
-        self.connection.commit()
+        with self.db_lock:
+            self.cursor.execute(sql, data)
+            self.connection.commit()
+
+#--------------------------------------------------------------------
+    def _fetchone(self, sql, data=()):
+        with self.db_lock:
+            self.cursor.execute(sql, data)
+            return self.cursor.fetchone()
+
+    def _fetchall(self, sql, data=()):
+        with self.db_lock:
+            self.cursor.execute(sql, data)
+            return self.cursor.fetchall()
 
 #--------------------------------------------------------------------
     def _add_record(self, sql, data):
@@ -246,10 +377,11 @@ class WazeRouteHistory(object):
         :return     rowid   - id of the added row
         '''
         try:
-            self.cursor.execute(sql, data)
-            self.connection.commit()
+            with self.db_lock:
+                self.cursor.execute(sql, data)
+                self.connection.commit()
 
-            return self.cursor.lastrowid
+                return self.cursor.lastrowid
 
         except Exception as err:
             log_exception(err)
@@ -263,8 +395,7 @@ class WazeRouteHistory(object):
                     data    - list containing the data to be added that matches the sql stmt
         '''
         try:
-            self.cursor.execute(sql, data)
-            self.connection.commit()
+            self._sql_data(sql, data)
             return True
 
         except:
@@ -273,26 +404,28 @@ class WazeRouteHistory(object):
             # post_internal_error(traceback.format_exc)
             return False
 #--------------------------------------------------------------------
-    def _delete_record(self, table, criteria=''):
+    def _delete_record(self, table, criteria='', data=()):
         '''
         Select a record from a table
         :param      sql     - sql statement that will select the record
                     criteria- sql select stmt WHERE clause
+                    data    - values for the ? parameters in the criteria
         '''
         sql = (f"DELETE FROM {table}")
         if criteria:
             sql += (f" WHERE {criteria}")
 
-        self.cursor.execute(sql)
-        self.connection.commit()
+        self._sql_data(sql, data)
 
 #--------------------------------------------------------------------
-    def _get_record(self, table, criteria=''):
+    def _get_record(self, table, criteria='', data=()):
         '''
         Select a record from a table
         :param      sql     - sql statement that will select the record
                     criteria- sql select stmt WHERE clause
-                                ("lat_long_key='27.3023:-80.9738'", "location_id=342")
+                                ("lat_long_key=?", "loc_id=?")
+                    data    - values for the ? parameters in the criteria
+                                (['27.3023:-80.9738'], [342])
         '''
         try:
 
@@ -301,8 +434,7 @@ class WazeRouteHistory(object):
                 sql += (f" WHERE {criteria}")
 
 
-            self.cursor.execute(sql)
-            record = self.cursor.fetchone()
+            record = self._fetchone(sql, data)
 
             try:
                 if table == 'locations':
@@ -319,7 +451,7 @@ class WazeRouteHistory(object):
                 post_monitor_msg(   Gb.devicename,
                                     f"WazeHistDB > Get Record, "
                                     f"Table-{table}, "
-                                    f"Criteria-{criteria}, "
+                                    f"Criteria-{criteria} {list(data)}, "
                                     f"{monitor_msg}")
             return record
 
@@ -328,12 +460,13 @@ class WazeRouteHistory(object):
             return []
 
 #--------------------------------------------------------------------
-    def _get_all_records(self, table, criteria='', orderby=''):
+    def _get_all_records(self, table, criteria='', orderby='', data=()):
         '''
         Select a record from a table
         :param      sql     - sql statement that will select the record
                     criteria- sql select stmt WHERE clause
-                                ("lat_long_key='27.3023:-80.9738'", "location_id=342")
+                                ("lat_long_key=?", "zone_id=?")
+                    data    - values for the ? parameters in the criteria
         '''
         try:
 
@@ -343,8 +476,7 @@ class WazeRouteHistory(object):
             if orderby:
                 sql += (f"ORDER BY {orderby} ")
 
-            self.cursor.execute(sql)
-            records = self.cursor.fetchall()
+            records = self._fetchall(sql, data)
 
             post_monitor_msg(   Gb.devicename,
                                 f"WazeHistDB > Get All Records, "
@@ -370,6 +502,9 @@ class WazeRouteHistory(object):
                             -1 ==>  This zone's base location is different than the base location
                                     in the zones table and the zone time/dist values need to be
                                     recalculated. Get the info from Waze and do not update the db.
+
+        The nearest location within the waze_history_match_radius is used. The exact
+        lat_long_key location is used if the radius is 0.
         '''
         if self.connection is None:
             return
@@ -381,27 +516,65 @@ class WazeRouteHistory(object):
                     or Gb.waze_history_max_distance == 0):
                 return (0, 0, 0)
 
+            if Gb.waze_history_match_radius > 0:
+                return self._get_nearest_location_time_dist(zone_id, latitude, longitude)
+
             lat_long_key = (f"{latitude:.04f}:{longitude:.04f}")
-            if self.last_lat_long_key != lat_long_key:
-                criteria     = (f" lat_long_key='{lat_long_key}'")
-                orderby      = 'zone_id, usage_cnt DESC'
-                self.last_location_recds = self._get_all_records('locations', criteria=criteria, orderby=orderby)
+            record = self._fetchone(GET_LOCATION_RECORD, (zone_id, lat_long_key))
 
-            if self.last_location_recds == []:
-                self.last_lat_long_key = ''
+            if record is None:
                 return (0, 0, 0)
 
-            self.last_lat_long_key = lat_long_key
-            for record in self.last_location_recds:
-                if record[LOC_ZONE_ID] == zone_id:
-                    return (record[LOC_TIME], record[LOC_DIST], record[LOC_ID])
-
-            return (0, 0, 0)
+            return (record[LOC_TIME], record[LOC_DIST], record[LOC_ID])
 
         except:
             post_internal_error(traceback.format_exc)
             return (0, 0, 0)
 
+#--------------------------------------------------------------------
+    def _get_nearest_location_time_dist(self, zone_id, latitude, longitude):
+        '''
+        Get the time & distance of the nearest location record within the
+        waze_history_match_radius. The records in the grid cells around the location
+        are read. If waze_history_nearest_cnt is more than 1, the time & distance are
+        interpolated from that many of the nearest records, weighted by their
+        distance from the location.
+
+        Return: time, distance, location_id of the nearest record (0, 0, 0 if none)
+        '''
+        gps = (latitude, longitude)
+        min_lat, max_lat, min_long, max_long = \
+                calc_gps_bounding_box(gps, Gb.waze_history_match_radius)
+        min_grid_lat, min_grid_long = grid_cell(min_lat, min_long)
+        max_grid_lat, max_grid_long = grid_cell(max_lat, max_long)
+
+        records = self._fetchall(GET_GRID_LOCATION_RECORDS,
+                    (zone_id, min_grid_lat, max_grid_lat, min_grid_long, max_grid_long))
+
+        near_recds = []
+        for record in records:
+            dist_m = calc_distance_approx_m(gps, (record[LOC_LAT], record[LOC_LONG]))
+            if dist_m <= Gb.waze_history_match_radius:
+                near_recds.append((dist_m, record[LOC_ID], record))
+
+        if near_recds == []:
+            return (0, 0, 0)
+
+        near_recds = sorted(near_recds)[:max(Gb.waze_history_nearest_cnt, 1)]
+        nearest_dist_m, nearest_loc_id, nearest_recd = near_recds[0]
+
+        if len(near_recds) == 1 or nearest_dist_m < 1:
+            return (nearest_recd[LOC_TIME], nearest_recd[LOC_DIST], nearest_loc_id)
+
+        weights    = [1 / dist_m for dist_m, loc_id, record in near_recds]
+        weight_sum = sum(weights)
+        route_time    = sum(weight * record[LOC_TIME]
+                            for weight, (dist_m, loc_id, record) in zip(weights, near_recds))
+        route_dist_km = sum(weight * record[LOC_DIST]
+                            for weight, (dist_m, loc_id, record) in zip(weights, near_recds))
+
+        return (round(route_time / weight_sum, 2), round(route_dist_km / weight_sum, 2), nearest_loc_id)
+
 #--------------------------------------------------------------------
     def add_location_record(self, zone_id, latitude, longitude, time, distance):
 
@@ -418,9 +591,12 @@ class WazeRouteHistory(object):
             datetime     = datetime_now()
 
             location_data = [zone_id, lat_long_key, latitude, longitude,
-                             time, distance, datetime, datetime, 1]
+                             time, distance, datetime, datetime, 1, *grid_cell(latitude, longitude)]
 
-            location_id = self._add_record(ADD_LOCATION_RECORD, location_data)
+            # Adds the record or updates the one already there for the zone & location
+            with self.db_lock:
+                self._add_record(ADD_LOCATION_RECORD, location_data)
+                location_id = self._fetchone(GET_LOCATION_RECORD, (zone_id, lat_long_key))[LOC_ID]
 
             self._update_sensor_ic3_wazehist_track(latitude, longitude)
 
@@ -443,27 +619,18 @@ class WazeRouteHistory(object):
             if location_id < 1:
                 return
 
-            sql = (f"SELECT * FROM locations WHERE loc_id={location_id}")
-
-            self.cursor.execute(sql)
-            record = self.cursor.fetchone()
-
-            cnt = record[LOC_USAGE_CNT] + 1
-            usage_data = [datetime_now(), cnt, location_id]
-
+            usage_data = [datetime_now(), location_id]
             self._update_record(UPDATE_LOCATION_USED, usage_data)
 
-            self.cursor.execute(sql)
-            record = self.cursor.fetchone()
-
-            if self.wazehist_recalculate_time_dist_running_flag is False:
+            if self.wazehist_recalculate_time_dist_running_flag is False and Gb.evlog_trk_monitors_flag:
+                record = self._fetchone("SELECT * FROM locations WHERE loc_id = ?", (location_id,))
                 post_monitor_msg(   Gb.devicename,
                                     f"WazeHistDB > Update Usage Cnt, "
                                     f"recdId={location_id}, "
                                     f"Zone-{record[LOC_ZONE_ID]}, "
                                     f"Time-{record[LOC_TIME]}, "
                                     f"Dist-{record[LOC_DIST]}, "
-                                    f"Cnt-{cnt}")
+                                    f"Cnt-{record[LOC_USAGE_CNT]}")
 
         except:
             post_internal_error(traceback.format_exc)
@@ -475,18 +642,10 @@ class WazeRouteHistory(object):
         if self.connection is None:
             return
 
-        self.cursor.execute(DUPLICATE_LOCATION_RECDS_SELECT)
-        records = self.cursor.fetchall()
-
-        if records != []:
-            post_event(f"Waze History Database > Deleted Duplicate Recds, Count-{len(records)}")
-            self.cursor.execute(DUPLICATE_LOCATION_RECDS_DELETE)
-            self.connection.commit()
-
+        # Duplicate zone/location records are prevented by the locations index
         self._sql("VACUUM;")
 
-        self.cursor.execute(GET_LOCATIONS_TABLE_RECD_COUNT)
-        recd_cnt = self.cursor.fetchone()[0]
+        recd_cnt = self._fetchone(GET_LOCATIONS_TABLE_RECD_COUNT)[0]
 
         post_event(f"Waze History Database > Compressed, Record Count-{recd_cnt}")
 
@@ -520,8 +679,7 @@ class WazeRouteHistory(object):
             # for from_zone, Zone in Gb.TrackedZones_by_zone.items():
             for from_zone, Zone in Gb.TrackedZones_by_zone.items():
                 # criteria = (f"zone='{from_zone}'")
-                criteria = (f"entity_id='{Zone.entity_id}'")
-                wazehist_zone_recd = self._get_record('zones', criteria)
+                wazehist_zone_recd = self._get_record('zones', 'entity_id=?', [Zone.entity_id])
 
                 if wazehist_zone_recd:
                     # Fix the zone name if it different than the HA entity registry file. It was probably changed
@@ -661,9 +819,9 @@ class WazeRouteHistory(object):
 
         '''
         Device = Gb.Devices[0]
-        criteria = (f"zone_id={abs(zone_id)}")
         orderby  = "lat_long_key"
-        records  = self._get_all_records('locations', criteria=criteria, orderby=orderby)
+        records  = self._get_all_records('locations', criteria='zone_id=?', orderby=orderby,
+                                            data=[abs(zone_id)])
 
         total_recds_cnt = len(records)
         event_msg =(f"{EVLOG_NOTICE}Waze History > Recalculate Time/Distance Started, "
@@ -689,8 +847,7 @@ class WazeRouteHistory(object):
                 # increase the usage count of the last recd and delete this recd
                 if record[LOC_LAT_LONG_KEY] == last_recd_lat_long_key:
                     self.update_usage_cnt(last_recd_loc_id)
-                    criteria = (f"loc_id={record[LOC_ID]};")
-                    self._delete_record('locations', criteria)
+                    self._delete_record('locations', 'loc_id=?', [record[LOC_ID]])
                     log_msg = (f"Waze History > updated, (#{recd_cnt}), "
                                 f"deleted duplicate record, "
                                 f"LocationKey-{record[LOC_LAT_LONG_KEY]}, "
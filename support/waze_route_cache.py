@@ -0,0 +1,134 @@
+#<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>
+#
+#   WAZE ROUTE CACHE
+#
+#   Each Device's route from a track from zone was requested from Waze (or read
+#   from the Waze History Database) on every update that was not using the
+#   previous results. Devices at the same place (family members together, a
+#   Device and its watch) and a Device that moved a few meters requested the
+#   same route again.
+#
+#   The route time and distance are saved for all of the Devices by the track
+#   from zone and the location rounded to WAZE_ROUTE_CACHE_CELL_DEG degrees
+#   (about 50m), and the Waze realtime setting. A saved route is used until it is
+#   older than the waze_route_cache_time (minutes). The waze_route_cache_size is
+#   the number of routes saved, the least recently used route is removed when it
+#   is full. A cache time or size of 0 turns the cache off.
+#
+#   The cache is cleared when a tracked from zone is moved.
+#
+#   Usage:
+#       route_time, route_dist_km = Gb.WazeRouteCache.get_route(from_zone, latitude, longitude)
+#       Gb.WazeRouteCache.save_route(from_zone, latitude, longitude, route_time, route_dist_km)
+#       Gb.WazeRouteCache.clear()
+#
+#<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>
+
+from ..global_variables     import GlobalVariables as Gb
+from ..helpers.messaging    import (log_debug_msg, _trace, _traceha, )
+
+from collections            import OrderedDict
+import threading
+import time
+
+WAZE_ROUTE_CACHE_CELL_DEG = .0005      # Location rounding (degrees), about 50m
+
+
+#<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>
+class WazeRouteCache(object):
+
+    def __init__(self):
+        self.routes    = OrderedDict()  # {(from_zone, lat cell, long cell, realtime):
+                                        #       (route_time, route_dist_km, saved secs)}
+        self._lock     = threading.Lock()
+        self.hit_cnt   = 0              # Since iCloud3 was started, shown on the loop stats sensor
+        self.miss_cnt  = 0
+        self.log_hit_cnt  = 0           # Since the last log_cache_stats
+        self.log_miss_cnt = 0
+
+    def __repr__(self):
+        return (f"<WazeRouteCache: Routes-{len(self.routes)}, "
+                f"Hits-{self.hit_cnt}, Misses-{self.miss_cnt}>")
+
+#--------------------------------------------------------------------
+    @property
+    def is_cache_used(self):
+        return Gb.waze_route_cache_size > 0 and Gb.waze_route_cache_time > 0
+
+    @staticmethod
+    def _route_key(from_zone, latitude, longitude):
+        return (from_zone,
+                round(latitude / WAZE_ROUTE_CACHE_CELL_DEG),
+                round(longitude / WAZE_ROUTE_CACHE_CELL_DEG),
+                Gb.waze_realtime)
+
+#--------------------------------------------------------------------
+    def get_route(self, from_zone, latitude, longitude, count_flag=True):
+        '''
+        Return:
+            route_time, route_dist_km for the saved route or None if it is not
+            saved or is too old
+        '''
+        if self.is_cache_used is False:
+            return None
+
+        route_key = self._route_key(from_zone, latitude, longitude)
+        with self._lock:
+            route = self.routes.get(route_key)
+            if route and time.time() - route[2] > Gb.waze_route_cache_time * 60:
+                self.routes.pop(route_key)
+                route = None
+
+            if route:
+                self.routes.move_to_end(route_key)
+
+            if count_flag:
+                if route:
+                    self.hit_cnt     += 1
+                    self.log_hit_cnt += 1
+                else:
+                    self.miss_cnt     += 1
+                    self.log_miss_cnt += 1
+
+        return route[:2] if route else None
+
+#--------------------------------------------------------------------
+    def save_route(self, from_zone, latitude, longitude, route_time, route_dist_km):
+        if self.is_cache_used is False or route_time <= 0 or route_dist_km <= 0:
+            return
+
+        route_key = self._route_key(from_zone, latitude, longitude)
+        with self._lock:
+            self.routes[route_key] = (route_time, route_dist_km, time.time())
+            self.routes.move_to_end(route_key)
+
+            while len(self.routes) > Gb.waze_route_cache_size:
+                self.routes.popitem(last=False)
+
+#--------------------------------------------------------------------
+    def clear(self):
+        '''
+        A tracked from zone was moved
+        '''
+        with self._lock:
+            self.routes = OrderedDict()
+
+#--------------------------------------------------------------------
+    @property
+    def stats_attrs(self):
+        total_cnt = self.hit_cnt + self.miss_cnt
+        return {'waze_route_cache_hits': self.hit_cnt,
+                'waze_route_cache_misses': self.miss_cnt,
+                'waze_route_cache_hit_pct': round(self.hit_cnt / total_cnt * 100) if total_cnt else 0,
+                'waze_route_cache_routes': len(self.routes), }
+
+#--------------------------------------------------------------------
+    def log_cache_stats(self):
+        if Gb.log_debug_flag is False or self.is_cache_used is False:
+            return
+
+        total_cnt = self.log_hit_cnt + self.log_miss_cnt
+        log_debug_msg(f"Waze Route Cache > Hits-{self.log_hit_cnt}, Misses-{self.log_miss_cnt} "
+                        f"({round(self.log_hit_cnt / total_cnt * 100) if total_cnt else 0}%), "
+                        f"Routes-{len(self.routes)}/{Gb.waze_route_cache_size}")
+        self.log_hit_cnt = self.log_miss_cnt = 0
@@ -12,6 +12,14 @@
 #       2.  The from/to GPS cordinates are passed to the calculator on each request
 #           rather than a new object being created each time requiring a second request
 #           to retrieve the distance/time results.
+#       3.  The requests are sent using a requests.Session that is kept for the life of
+#           the calculator so the connection to waze.com is reused (keep-alive) instead
+#           of a new TCP/TLS connection being opened for each route. The requests have
+#           connect and read timeouts so a Waze server that does not answer can not
+#           hold up the Device update. A connection error, timeout or server error is
+#           retried WAZE_MAX_RETRIES times with a jittered backoff. All of the attempts
+#           for a route must finish within WAZE_MAX_CALL_SECS. The time each request
+#           takes is saved for the Waze request statistics.
 #
 #   The original code can be found on Kovács Bálint's GitHub repo at
 #   https://github.com/kovacsbalu/WazeRouteCalculator.
@@ -20,9 +28,26 @@
 
 import logging
 import requests
+import random
 import re
+import threading
+import time
+from collections import deque
+from requests.adapters import HTTPAdapter
 
-from ..helpers.messaging  import (_traceha, log_exception, log_warning_msg, log_error_msg, log_info_msg, )
+from ..global_variables   import GlobalVariables as Gb
+from ..helpers.messaging  import (_traceha, log_exception, log_warning_msg, log_error_msg, log_info_msg,
+                                    log_debug_msg, )
+
+WAZE_CONNECT_TIMEOUT_SECS = 5       # Time to connect to the Waze server
+WAZE_READ_TIMEOUT_SECS    = 15      # Time to wait for the Waze route after connecting
+WAZE_MAX_RETRIES          = 2       # Retries after a connection error, timeout or server error
+WAZE_RETRY_BACKOFF_SECS   = .5      # First retry wait time, doubled for each retry (+/-50% jitter)
+WAZE_RETRY_STATUS_CODES   = [429, 500, 502, 503, 504]
+WAZE_MAX_CALL_SECS        = 25      # Longest time for all of the attempts for a route
+WAZE_MIN_ATTEMPT_SECS     = 2       # A retry is not started with less time than this left
+WAZE_POOL_MAXSIZE         = 10      # Connections kept to the Waze server
+WAZE_LATENCY_SAMPLE_CNT   = 100     # Request times kept for the statistics
 
 #<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>
 class WRCError(Exception):
@@ -85,6 +110,110 @@ class WazeRouteCalculator(object):
         self.start_coords = ''
         self.end_coords = ''
 
+        self.session = None
+        self._session_lock = threading.Lock()
+        self._stats_lock = threading.Lock()     # The Waze requests are sent from several threads
+        self.request_msecs = deque(maxlen=WAZE_LATENCY_SAMPLE_CNT)  # Time each request took
+        self.request_cnt = 0
+        self.retry_cnt = 0
+        self.error_cnt = 0
+
+    def _get_session(self):
+        '''
+        Create the requests session with the connection pool the first time it is used
+        '''
+        with self._session_lock:
+            if self.session is None:
+                self.session = requests.Session()
+                self.session.headers.update(self.HEADERS)
+                self.session.mount(self.WAZE_URL, HTTPAdapter(pool_connections=1,
+                                                                pool_maxsize=WAZE_POOL_MAXSIZE))
+
+            return self.session
+
+    def close(self):
+        '''
+        Close the session and it's connections to the Waze server
+        '''
+        with self._session_lock:
+            if self.session is not None:
+                self.session.close()
+                self.session = None
+
+    def _get(self, url, url_options):
+        '''
+        Send the request, retrying a connection error, timeout or server error. The
+        timeouts are shortened and the retries are stopped so all of the attempts
+        finish within WAZE_MAX_CALL_SECS.
+
+        Return:
+            The response
+        Raises:
+            WRCError if all of the retries failed
+        '''
+        call_deadline = time.monotonic() + WAZE_MAX_CALL_SECS
+        error_msg = ''
+        attempt_cnt = 0
+        for retry_no in range(WAZE_MAX_RETRIES + 1):
+            if retry_no > 0:
+                backoff_secs = WAZE_RETRY_BACKOFF_SECS * (2 ** (retry_no - 1)) * random.uniform(.5, 1.5)
+                if call_deadline - time.monotonic() - backoff_secs < WAZE_MIN_ATTEMPT_SECS:
+                    break
+
+                self._add_request_stats(retry_cnt=1)
+                time.sleep(backoff_secs)
+
+            remaining_secs = max(call_deadline - time.monotonic(), .1)
+            timeout = (min(WAZE_CONNECT_TIMEOUT_SECS, remaining_secs),
+                        min(WAZE_READ_TIMEOUT_SECS, remaining_secs))
+
+            attempt_cnt += 1
+            request_started = time.perf_counter()
+            try:
+                response = self._get_session().get(url, params=url_options, timeout=timeout)
+
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as err:
+                self._add_request_stats(error_cnt=1)
+                error_msg = str(err)
+                continue
+
+            finally:
+                self._add_request_stats(request_msecs=(time.perf_counter() - request_started) * 1000)
+
+            if response.status_code in WAZE_RETRY_STATUS_CODES:
+                self._add_request_stats(error_cnt=1)
+                error_msg = f"HTTP Status-{response.status_code}"
+                # Give the connection back to the pool before retrying
+                response.close()
+                continue
+
+            return response
+
+        raise WRCError(f"Waze request failed, Attempts-{attempt_cnt}, {error_msg}")
+
+    def _add_request_stats(self, retry_cnt=0, error_cnt=0, request_msecs=None):
+        with self._stats_lock:
+            self.retry_cnt += retry_cnt
+            self.error_cnt += error_cnt
+            if request_msecs is not None:
+                self.request_cnt += 1
+                self.request_msecs.append(request_msecs)
+
+    def log_request_stats(self):
+        with self._stats_lock:
+            if Gb.log_debug_flag is False or self.request_cnt == 0:
+                return
+
+            request_msecs = sorted(self.request_msecs)
+            request_cnt, retry_cnt, error_cnt = self.request_cnt, self.retry_cnt, self.error_cnt
+            self.request_cnt = self.retry_cnt = self.error_cnt = 0
+
+        log_debug_msg(f"Waze Requests > Requests-{request_cnt}, Retries-{retry_cnt}, "
+                        f"Errors-{error_cnt}, "
+                        f"Median-{request_msecs[len(request_msecs) // 2]:.0f}ms, "
+                        f"Max-{request_msecs[-1]:.0f}ms "
+                        f"(Last {len(request_msecs)})")
+
 
     def get_route(self, from_lat, from_long, to_lat, to_long,):
         """Get route data from waze"""
@@ -103,11 +232,15 @@ class WazeRouteCalculator(object):
             "options": ','.join('%s:t' % route_option for route_option in self.route_options),
         }
 
+        response_json = None
         try:
-            response = requests.get(self.WAZE_URL + routing_server, params=url_options, headers=self.HEADERS)
+            response = self._get(self.WAZE_URL + routing_server, url_options)
             response.encoding = 'utf-8'
             response_json = self._check_response(response)
 
+        except WRCError as err:
+            log_warning_msg(f"Waze Route Error > {err}")
+
         except Exception as err:
             log_exception(err)
 
@@ -0,0 +1,203 @@
+#<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>
+#
+#   WAZE ROUTE FAN-OUT
+#
+#   determine_interval is run for each of the Device's track from zones one after
+#   the other. Each one requested the Waze route from the Device to the zone and
+#   the route for the distance moved since the last update (the same route for
+#   every zone), so a Device with 4 track from zones waited for up to 8 Waze
+#   requests one after the other.
+#
+#   Before the zones are updated, the Waze routes they will need (the zones that
+#   are in the Waze distance range and not in the Waze History Database and the
+#   distance moved route) are requested at the same time on a small worker pool.
+#   The results are saved for the Device and used by Waze.get_waze_distance. The
+#   Waze History Database lookups done to find these routes are also saved and
+#   used by Waze.get_history_time_distance so the database is not read again. The
+#   number of Waze requests running at the same time for all Devices (which are
+#   updated at the same time by the DeviceUpdatePool) is limited to max_workers.
+#
+#   A fan-out with max_workers=0 requests the routes inline on the calling thread.
+#   This is used by the replay harness so a replay is deterministic.
+#
+#<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>
+
+from ..global_variables     import GlobalVariables as Gb
+from ..const                import (LATITUDE, LONGITUDE, )
+from ..helpers.messaging    import (log_debug_msg, log_exception, _trace, _traceha, )
+
+from concurrent.futures     import ThreadPoolExecutor
+import threading
+
+WAZE_ROUTE_MAX_WORKERS  = 4         # Waze requests that can be running at the same time
+WAZE_ROUTE_WAIT_SECS    = 30        # Longest wait for a route (WazeRouteCalculator WAZE_MAX_CALL_SECS + 5)
+
+
+#<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>
+class WazeRouteFanout(object):
+
+    def __init__(self, max_workers=WAZE_ROUTE_MAX_WORKERS):
+        self.max_workers          = max_workers
+        self.Executor             = None
+        self.request_slots        = threading.BoundedSemaphore(max(max_workers, 1))
+        self.routes_by_devicename = {}  # {devicename: {(from_lat, from_long, to_lat, to_long):
+                                        #                   (route_time, route_dist_km)}}
+        self.wazehist_by_devicename = {}    # {devicename: {(from_zone, latitude, longitude):
+                                            #       (route_time, route_dist_km, location_id)}}
+        self.fanout_cnt           = 0   # Devices whose routes were requested at the same time
+        self.route_cnt            = 0   # Routes requested by the fan-out
+
+    def __repr__(self):
+        return (f"<WazeRouteFanout: Workers-{self.max_workers}, "
+                f"Devices-{list(self.routes_by_devicename.keys())}>")
+
+#--------------------------------------------------------------------
+    def calc_route_info(self, from_lat, from_long, to_lat, to_long):
+        '''
+        Request the route from Waze when one of the request slots is available
+
+        Return:
+            route_time, route_dist_km (-1, -1 if the route was not available)
+        '''
+        with self.request_slots:
+            return Gb.Waze.WazeRouteCalc.calc_route_info(from_lat, from_long, to_lat, to_long)
+
+#--------------------------------------------------------------------
+    @staticmethod
+    def _device_routes(Device, wazehist_locations):
+        '''
+        Get the routes Waze.get_route_time_distance will request for the Device's
+        track from zones. The Waze History Database lookups are saved in the
+        wazehist_locations dictionary.
+
+        Return:
+            [(from_lat, from_long, to_lat, to_long)]
+        '''
+        if (Gb.Waze is None
+                or Gb.Waze.WazeRouteCalc is None
+                or Gb.Waze.distance_method_waze_flag is False
+                or Gb.Waze.waze_manual_pause_flag
+                or Device.no_location_data):
+            return []
+
+        latitude  = Device.loc_data_latitude
+        longitude = Device.loc_data_longitude
+
+        routes = []
+        for from_zone, DeviceFmZone in Device.DeviceFmZones_by_zone.items():
+            dist_km = DeviceFmZone.distance_km
+            if (Device.loc_data_zone == from_zone
+                    or dist_km > Gb.Waze.waze_max_distance
+                    or dist_km < Gb.Waze.waze_min_distance):
+                continue
+
+            # The previous results or the Waze History Database will be used
+            if (Device.is_location_gps_good
+                    and Device.loc_data_distance_moved == 0
+                    and DeviceFmZone.waze_results):
+                continue
+
+            if dist_km < Gb.WazeHist.max_distance and Gb.WazeHist.use_wazehist_flag:
+                route_time, route_dist_km, location_id = \
+                        Gb.WazeHist.get_location_time_dist(from_zone, latitude, longitude) or (0, 0, 0)
+                wazehist_locations[(from_zone, latitude, longitude)] = \
+                        (route_time, route_dist_km, location_id)
+                if location_id > 0 and route_time > 0 and route_dist_km > 0:
+                    continue
+
+            if (Gb.WazeRouteCache
+                    and Gb.WazeRouteCache.get_route(from_zone, latitude, longitude, count_flag=False)):
+                continue
+
+            routes.append((latitude, longitude,
+                            DeviceFmZone.FromZone.latitude, DeviceFmZone.FromZone.longitude))
+
+        # The distance moved route is the same for all of the zones
+        if routes and Device.loc_data_distance_moved >= .5:
+            routes.append((Device.sensors[LATITUDE], Device.sensors[LONGITUDE], latitude, longitude))
+
+        return list(dict.fromkeys(routes))
+
+#--------------------------------------------------------------------
+    def request_device_routes(self, Device):
+        '''
+        Request the Waze routes for the Device's track from zones at the same time and
+        save the results. Nothing is done if only one route is needed, it is requested
+        when the zone is updated.
+        '''
+        try:
+            wazehist_locations = {}
+            routes = self._device_routes(Device, wazehist_locations)
+            self.wazehist_by_devicename[Device.devicename] = wazehist_locations
+            if len(routes) < 2:
+                return
+
+            if self.max_workers == 0:
+                route_results = [self.calc_route_info(*route) for route in routes]
+
+            else:
+                if self.Executor is None:
+                    self.Executor = ThreadPoolExecutor(max_workers=self.max_workers,
+                                                        thread_name_prefix='icloud3_waze_route')
+
+                Futures = [self.Executor.submit(self.calc_route_info, *route) for route in routes]
+                route_results = [self._future_result(Future) for Future in Futures]
+
+            self.routes_by_devicename[Device.devicename] = \
+                    {route: route_result
+                            for route, route_result in zip(routes, route_results)
+                            if route_result[0] >= 0}
+
+            self.fanout_cnt += 1
+            self.route_cnt  += len(routes)
+
+        except Exception as err:
+            log_exception(err)
+
+    @staticmethod
+    def _future_result(Future):
+        try:
+            return Future.result(timeout=WAZE_ROUTE_WAIT_SECS)
+
+        except Exception as err:
+            log_exception(err)
+            return (-1, -1)
+
+#--------------------------------------------------------------------
+    def get_route(self, Device, from_lat, from_long, to_lat, to_long):
+        '''
+        Return:
+            route_time, route_dist_km for a route requested by the fan-out or None
+        '''
+        return self.routes_by_devicename.get(Device.devicename, {}).get(
+                                    (from_lat, from_long, to_lat, to_long))
+
+    def get_wazehist_location(self, Device, from_zone, latitude, longitude):
+        '''
+        Return:
+            route_time, route_dist_km, location_id from the Waze History Database
+            lookup done by the fan-out or None if it was not looked up
+        '''
+        return self.wazehist_by_devicename.get(Device.devicename, {}).get(
+                                    (from_zone, latitude, longitude))
+
+    def release_device_routes(self, Device):
+        self.routes_by_devicename.pop(Device.devicename, None)
+        self.wazehist_by_devicename.pop(Device.devicename, None)
+
+#--------------------------------------------------------------------
+    def log_fanout_stats(self):
+        if Gb.log_debug_flag is False or self.fanout_cnt == 0:
+            return
+
+        log_debug_msg(f"Waze Route Fan-out > Devices-{self.fanout_cnt}, Routes-{self.route_cnt}")
+        self.fanout_cnt = self.route_cnt = 0
+
+#--------------------------------------------------------------------
+    def shutdown(self):
+        '''
+        Stop the worker pool when HA is stopping
+        '''
+        if self.Executor:
+            self.Executor.shutdown(wait=False)
+            self.Executor = None
@@ -0,0 +1,301 @@
+#<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>
+#
+#   ZONE CHANGE LISTENER
+#
+#   The zones were only loaded by start_ic3.create_Zones_object when iCloud3 was
+#   started. A zone that was added, moved or deleted was not used until iCloud3
+#   was restarted, which logs into iCloud again and relocates every device.
+#
+#   iCloud3 now listens for zone entity state changes (a tracker for the zone
+#   domain, the other entities' state changes are not passed to it). A change is
+#   saved in the pending zone changes (the newest state of each zone) and is
+#   applied at the start of the next 5-sec loop pass:
+#       - Added zone - A new iCloud3_Zone is created
+#       - Changed zone - A new iCloud3_Zone replaces the old one if the location,
+#           radius, passive or friendly name changed. The tracked from zones and
+#           the Devices' DeviceFmZones are pointed at the new one.
+#       - Deleted zone - The iCloud3_Zone is removed. If a Device is in the zone,
+#           it is kept in Zones_by_zone (not in the Zones list or the zone spatial
+#           index so it is not selected again) and the Device is updated so it
+#           exits the zone normally. It is removed on a later pass when no Device
+#           is in it.
+#   The Zones and the zone lists and the zone spatial index are replaced (not
+#   changed in place, a Device update from the last pass may still be using
+#   them) and the Waze History zone ids are
+#   reloaded and the Waze Route Cache is cleared if a tracked from zone moved.
+#   Deleting a tracked from zone still needs a restart to set up the Devices'
+#   DeviceFmZones again.
+#
+#   The Stationary Zones are set up by iCloud3 and their changes are ignored.
+#
+#<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>
+
+from ..global_variables     import GlobalVariables as Gb
+from ..const                import (ZONE, EVLOG_ALERT, CRLF_DOT, NON_ZONE_ITEM_LIST,
+                                    LATITUDE, LONGITUDE, RADIUS, PASSIVE, FRIENDLY_NAME, ID, )
+from ..zone                 import iCloud3_Zone
+from ..helpers.common       import (is_statzone, )
+from ..helpers.messaging    import (post_event, log_info_msg, log_exception, _trace, _traceha, )
+from ..helpers              import entity_io
+from ..support.zone_spatial_index import ZoneSpatialIndex
+from ..support              import determine_interval as det_interval
+
+from homeassistant.core     import callback
+from homeassistant.helpers.event import (async_track_state_change_filtered, TrackStates, )
+from homeassistant.util.async_ import run_callback_threadsafe
+import functools
+import threading
+
+ZONE_CHANGE_ATTRS = [LATITUDE, LONGITUDE, RADIUS, PASSIVE, FRIENDLY_NAME]
+
+_pending_lock = threading.Lock()
+
+
+#<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>
+def subscribe_to_zone_changes():
+    '''
+    Listen for zone entity state changes. This is called after the zones are set
+    up in create_Zones_object. The tracker is set up in the HA event loop.
+    '''
+    unsubscribe_from_zone_changes()
+
+    try:
+        ZoneTracker = run_callback_threadsafe(Gb.hass.loop,
+                                async_track_state_change_filtered,
+                                Gb.hass,
+                                TrackStates(False, set(), {ZONE}),
+                                _async_zone_state_changed).result()
+
+        Gb.zone_change_unsub = functools.partial(Gb.hass.loop.call_soon_threadsafe,
+                                                ZoneTracker.async_remove)
+        log_info_msg("Zone Change Listener > Listening for zone changes")
+
+    except Exception as err:
+        log_exception(err)
+
+#--------------------------------------------------------------------
+def unsubscribe_from_zone_changes():
+    try:
+        if Gb.zone_change_unsub:
+            Gb.zone_change_unsub()
+
+    except Exception as err:
+        log_exception(err)
+
+    Gb.zone_change_unsub = None
+    Gb.DeletedZones_by_zone = {}
+    with _pending_lock:
+        Gb.zone_changes_pending = {}
+
+#--------------------------------------------------------------------
+@callback
+def _async_zone_state_changed(event):
+    '''
+    A zone entity was added, changed or deleted. Save the new state (None if it
+    was deleted). Runs in the HA event loop, the change is applied by the 5-sec loop.
+    '''
+    try:
+        entity_id = event.data.get('entity_id', '')
+        if entity_id.startswith('zone.') is False:
+            return
+
+        zone = entity_id.replace('zone.', '')
+        if is_statzone(zone) or zone in NON_ZONE_ITEM_LIST:
+            return
+
+        with _pending_lock:
+            Gb.zone_changes_pending[zone] = event.data.get('new_state')
+
+    except Exception as err:
+        log_exception(err)
+
+#--------------------------------------------------------------------
+def apply_pending_zone_changes():
+    '''
+    Add, update or remove the zones that changed since the last 5-sec loop pass.
+    Called at the start of the pass before any Devices are updated.
+    '''
+    if Gb.start_icloud3_inprocess_flag:
+        return
+
+    if Gb.DeletedZones_by_zone:
+        _remove_deleted_zones_not_in_use()
+
+    if Gb.zone_changes_pending == {}:
+        return
+
+    with _pending_lock:
+        zone_changes = Gb.zone_changes_pending
+        Gb.zone_changes_pending = {}
+
+    try:
+        Zones_by_zone  = Gb.Zones_by_zone.copy()
+        DeletedZones_by_zone = Gb.DeletedZones_by_zone.copy()
+        changes_msg    = ''
+        moved_tracked_zone_flag = False
+        ChangedZones_by_zone = {}
+
+        for zone, State in zone_changes.items():
+            Zone = Zones_by_zone.get(zone)
+
+            if State is None:
+                if Zone is None or zone in DeletedZones_by_zone:
+                    continue
+
+                changes_msg += f"{CRLF_DOT}Deleted-{Zone.display_as} ({zone})"
+
+                InZoneDevices = _devices_in_zone(zone)
+                if InZoneDevices:
+                    DeletedZones_by_zone[zone] = Zone
+                    _update_devices_in_deleted_zone(InZoneDevices)
+                    changes_msg += f", Kept until {', '.join([Device.fname for Device in InZoneDevices])} exits"
+                else:
+                    Zones_by_zone.pop(zone)
+                    Gb.zone_display_as.pop(zone, None)
+
+                if zone in Gb.TrackedZones_by_zone:
+                    _request_restart_for_deleted_tracked_zone(Zone)
+                continue
+
+            zone_data = entity_io.get_attributes(f"zone.{zone}", State)
+            if LATITUDE not in zone_data:
+                continue
+
+            # A deleted zone that is still in use was added again
+            if DeletedZones_by_zone.pop(zone, None):
+                changes_msg += f"{CRLF_DOT}Added-{Zone.display_as} ({zone})"
+
+            if Zone is None:
+                zone_data[ID] = zone.lower()
+                zone_data['unique_id'] = zone.lower()
+                Zones_by_zone[zone] = Zone = iCloud3_Zone(zone, zone_data)
+                changes_msg += (f"{CRLF_DOT}Added-{Zone.display_as} ({zone}), "
+                                f"r{Zone.radius_m}m")
+                continue
+
+            if _is_zone_data_changed(Zone, zone_data) is False:
+                continue
+
+            moved_flag = (zone_data[LATITUDE] != Zone.latitude or zone_data[LONGITUDE] != Zone.longitude)
+            zone_data[ID] = Zone.entity_id
+            zone_data['unique_id'] = Zone.unique_id
+
+            # A Device update may still be using the old Zone, it is not changed
+            Zones_by_zone[zone] = Zone = iCloud3_Zone(zone, zone_data)
+            ChangedZones_by_zone[zone] = (Zone, moved_flag)
+            changes_msg += (f"{CRLF_DOT}Updated-{Zone.display_as} ({zone}), "
+                            f"r{Zone.radius_m}m{', Moved' if moved_flag else ''}")
+
+            if moved_flag and zone in Gb.TrackedZones_by_zone:
+                moved_tracked_zone_flag = True
+
+        if changes_msg == '':
+            return
+
+        # Replace the zone lists so a Device update using the old ones is not affected
+        Gb.DeletedZones_by_zone = DeletedZones_by_zone
+        Gb.Zones_by_zone = Zones_by_zone
+        Gb.Zones         = [Zone for zone, Zone in Zones_by_zone.items()
+                                    if zone not in DeletedZones_by_zone]
+        Gb.ZoneIndex     = ZoneSpatialIndex(Gb.Zones)
+        Gb.ZoneDistanceCache.new_pass()
+        Gb.ZoneSelectCache.zones_changed()
+        _use_changed_tracked_zones(ChangedZones_by_zone)
+
+        if moved_tracked_zone_flag and Gb.WazeHist:
+            Gb.WazeHist.load_track_from_zone_table()
+        if moved_tracked_zone_flag and Gb.WazeRouteCache:
+            Gb.WazeRouteCache.clear()
+
+        post_event(f"Zones Changed > Applied without restarting{changes_msg}")
+
+    except Exception as err:
+        log_exception(err)
+
+#--------------------------------------------------------------------
+def _devices_in_zone(zone):
+    return [Device  for Device in Gb.Devices
+                    if Device.loc_data_zone == zone or Device.sensor_zone == zone]
+
+#--------------------------------------------------------------------
+def _update_devices_in_deleted_zone(InZoneDevices):
+    '''
+    The zone a Device is in was deleted. Locate the Device now so it exits the
+    zone instead of waiting for its (inzone) next update time.
+    '''
+    for Device in InZoneDevices:
+        det_interval.update_all_device_fm_zone_sensors_interval(Device, 0)
+        Device.icloud_update_reason = 'Zone Deleted'
+        Gb.DeviceScheduler.trigger_device(Device.devicename, 'Zone Deleted')
+
+#--------------------------------------------------------------------
+def _remove_deleted_zones_not_in_use():
+    '''
+    Remove the deleted zones that are no longer used by a Device. The Zones list
+    and the zone spatial index do not have them and are not changed.
+    '''
+    removed_zones = [zone   for zone in Gb.DeletedZones_by_zone
+                            if _devices_in_zone(zone) == []]
+    if removed_zones == []:
+        return
+
+    DeletedZones_by_zone = Gb.DeletedZones_by_zone.copy()
+    Zones_by_zone        = Gb.Zones_by_zone.copy()
+    for zone in removed_zones:
+        DeletedZones_by_zone.pop(zone, None)
+        Zones_by_zone.pop(zone, None)
+        Gb.zone_display_as.pop(zone, None)
+
+    Gb.DeletedZones_by_zone = DeletedZones_by_zone
+    Gb.Zones_by_zone        = Zones_by_zone
+    Gb.ZoneSelectCache.zones_changed()
+
+    log_info_msg(f"Deleted zones removed, No Devices are in them > {', '.join(removed_zones)}")
+
+#--------------------------------------------------------------------
+def _use_changed_tracked_zones(ChangedZones_by_zone):
+    '''
+    Replace the old Zone of a changed tracked from zone in the tracked zones list
+    and the Devices' DeviceFmZones. The previous Waze results are not used if the
+    zone moved.
+    '''
+    TrackedZones_by_zone = Gb.TrackedZones_by_zone.copy()
+
+    for zone, (Zone, moved_flag) in ChangedZones_by_zone.items():
+        if zone not in TrackedZones_by_zone:
+            continue
+
+        TrackedZones_by_zone[zone] = Zone
+        for Device in Gb.Devices:
+            if DeviceFmZone := Device.DeviceFmZones_by_zone.get(zone):
+                DeviceFmZone.FromZone = Zone
+                DeviceFmZone.from_zone_display_as = Zone.display_as
+                if moved_flag:
+                    DeviceFmZone.waze_results = None
+
+    Gb.TrackedZones_by_zone = TrackedZones_by_zone
+
+#--------------------------------------------------------------------
+def _is_zone_data_changed(Zone, zone_data):
+    zone_attrs = {  LATITUDE: Zone.latitude,
+                    LONGITUDE: Zone.longitude,
+                    RADIUS: Zone.radius_m,
+                    PASSIVE: Zone.passive,
+                    FRIENDLY_NAME: Zone.fname, }
+
+    for attr in ZONE_CHANGE_ATTRS:
+        new_value = zone_data.get(attr)
+        if attr == RADIUS and new_value is not None:
+            new_value = round(new_value)
+        if new_value is not None and new_value != zone_attrs[attr]:
+            return True
+
+    return False
+
+#--------------------------------------------------------------------
+def _request_restart_for_deleted_tracked_zone(Zone):
+    event_msg =(f"{EVLOG_ALERT}Tracked From Zone Deleted > {Zone.display_as} is used "
+                f"by the Devices as a Track From Zone. iCloud3 will be restarted.")
+    post_event(event_msg)
+
+    Gb.start_icloud3_request_flag = True
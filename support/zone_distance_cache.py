@@ -0,0 +1,72 @@
+#<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>
+#
+#   ZONE DISTANCE CACHE
+#
+#   The distance from a Device's location to the zones is calculated in several
+#   places during an update (_select_zone, _is_outside_zone_no_exit, moving the
+#   Stationary Zone, the DeviceFmZone distance_km properties), each one calling
+#   calc_distance_m for the same location and zone again.
+#
+#   The distances are saved in a row for each location, {zone gps: distance_m},
+#   the first time they are calculated. The other callers get the distance from
+#   the row. Devices at the same location (same iCloud/iOS App gps) share the
+#   row. The rows are cleared at the start of each 5-sec loop pass. Since the
+#   zone and device locations are part of the keys, a zone or Device that moves
+#   during the pass gets a new distance.
+#
+#<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>
+
+from ..global_variables     import GlobalVariables as Gb
+from ..helpers.messaging    import (log_debug_msg, _trace, _traceha, )
+from ..helpers.dist_util    import (calc_distance_m, )
+
+ZONE_DISTANCE_MAX_ROWS = 1000   # Clear the rows if there are more locations than this in a pass
+
+
+#<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>
+class ZoneDistanceCache(object):
+
+    def __init__(self):
+        self.rows       = {}        # {(latitude, longitude): {(zone latitude, zone longitude): distance_m}}
+        self.calc_cnt   = 0         # Distances calculated
+        self.hit_cnt    = 0         # Distances from a row
+
+    def __repr__(self):
+        return (f"<ZoneDistanceCache: Rows-{len(self.rows)}, "
+                f"Calculated-{self.calc_cnt}, Cached-{self.hit_cnt}>")
+
+#--------------------------------------------------------------------
+    def new_pass(self):
+        self.rows = {}
+
+#--------------------------------------------------------------------
+    def distance_m(self, Zone, latitude, longitude):
+        '''
+        Return the distance (meters) from the location to the zone center
+        '''
+        location = (latitude, longitude)
+        row = self.rows.get(location)
+        if row is None:
+            if len(self.rows) >= ZONE_DISTANCE_MAX_ROWS:
+                self.rows = {}
+            row = self.rows[location] = {}
+
+        zone_gps = (Zone.latitude, Zone.longitude)
+        dist_m = row.get(zone_gps)
+        if dist_m is None:
+            dist_m = row[zone_gps] = calc_distance_m(zone_gps, location)
+            self.calc_cnt += 1
+        else:
+            self.hit_cnt += 1
+
+        return dist_m
+
+#--------------------------------------------------------------------
+    def log_cache_stats(self):
+        if Gb.log_debug_flag is False:
+            return
+
+        total_cnt = self.calc_cnt + self.hit_cnt
+        log_debug_msg(f"Zone Distance Cache > Calculated-{self.calc_cnt}, Cached-{self.hit_cnt} "
+                        f"({round(self.hit_cnt / total_cnt * 100) if total_cnt else 0}%)")
+        self.calc_cnt = self.hit_cnt = 0
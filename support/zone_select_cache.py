@@ -0,0 +1,90 @@
+#<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>
+#
+#   ZONE SELECTION CACHE
+#
+#   _select_zone was run when the iCloud data was received (passthru zone
+#   check) and again in _update_current_zone, with the first results passed
+#   along in Device.selected_zone_results. A Device that was not moving (at
+#   Home, in a Stationary Zone) got the same answer on every update.
+#
+#   The _select_zone results are saved for each Device by its location rounded
+#   to ZONE_SELECT_LOCATION_QUANTUM degrees (about 3m). The cache is cleared when
+#   the zones change (zones loaded, a zone changed in HA, a Stationary Zone
+#   moved), tracked by Gb.zones_version.
+#
+#   Usage:
+#       results = Gb.ZoneSelectCache.get_results(Device, latitude, longitude)
+#       Gb.ZoneSelectCache.save_results(Device, latitude, longitude, results)
+#       Gb.ZoneSelectCache.zones_changed()
+#
+#<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>
+
+from ..global_variables     import GlobalVariables as Gb
+from ..helpers.messaging    import (log_debug_msg, _trace, _traceha, )
+
+ZONE_SELECT_LOCATION_QUANTUM = .00003   # Location rounding (degrees), about 3m
+ZONE_SELECT_MAX_LOCATIONS    = 20       # Locations saved for each Device
+
+
+#<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>
+class ZoneSelectCache(object):
+
+    def __init__(self):
+        self.results_by_devicename = {}     # {devicename: {location key: _select_zone results}}
+        self.zones_version = Gb.zones_version
+        self.hit_cnt       = 0
+        self.miss_cnt      = 0
+
+    def __repr__(self):
+        return (f"<ZoneSelectCache: Devices-{len(self.results_by_devicename)}, "
+                f"Hits-{self.hit_cnt}, Misses-{self.miss_cnt}>")
+
+#--------------------------------------------------------------------
+    def zones_changed(self):
+        '''
+        The zones were loaded again, changed or a Stationary Zone moved
+        '''
+        Gb.zones_version += 1
+        self.results_by_devicename = {}
+
+    @staticmethod
+    def _location_key(latitude, longitude):
+        return (round(latitude / ZONE_SELECT_LOCATION_QUANTUM),
+                round(longitude / ZONE_SELECT_LOCATION_QUANTUM))
+
+#--------------------------------------------------------------------
+    def get_results(self, Device, latitude, longitude):
+        '''
+        Return:
+            The _select_zone results for the location or None if they are not saved
+        '''
+        if self.zones_version != Gb.zones_version:
+            self.results_by_devicename = {}
+            self.zones_version = Gb.zones_version
+
+        results = self.results_by_devicename.get(Device.devicename, {}).get(
+                                    self._location_key(latitude, longitude))
+        if results is None:
+            self.miss_cnt += 1
+        else:
+            self.hit_cnt += 1
+
+        return results
+
+    def save_results(self, Device, latitude, longitude, results):
+        device_results = self.results_by_devicename.setdefault(Device.devicename, {})
+        if len(device_results) >= ZONE_SELECT_MAX_LOCATIONS:
+            device_results.pop(next(iter(device_results)))
+
+        device_results[self._location_key(latitude, longitude)] = results
+
+#--------------------------------------------------------------------
+    def log_cache_stats(self):
+        if Gb.log_debug_flag is False:
+            return
+
+        total_cnt = self.hit_cnt + self.miss_cnt
+        log_debug_msg(f"Zone Select Cache > Hits-{self.hit_cnt}, Misses-{self.miss_cnt} "
+                        f"({round(self.hit_cnt / total_cnt * 100) if total_cnt else 0}%), "
+                        f"ZonesVersion-{Gb.zones_version}")
+        self.hit_cnt = self.miss_cnt = 0
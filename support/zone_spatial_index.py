@@ -0,0 +1,236 @@
+#<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>
+#
+#   ZONE SPATIAL INDEX
+#
+#   _select_zone calculated the distance to every zone on every location update
+#   and built the zone distance list for the EvLog from all of them. With a few
+#   hundred zones, this was hundreds of distance calculations per update.
+#
+#   The zone centers are put in a grid of ZONE_INDEX_CELL_KM cells when the zones
+#   are set up in start_ic3.create_Zones_object. A zone with a radius less than
+#   the cell size can only contain a location if its center is in the location's
+#   cell or one of the 8 cells around it, so only those zones (and the few zones
+#   that are larger than a cell) get an exact distance check.
+#
+#   The 'nearest zones' list displayed in the EvLog is built from the cells
+#   around the location (expanding outward until the nearest zones are found)
+#   only when the message is displayed.
+#
+#   Stationary Zones move and are only used by their own Device. They are not
+#   indexed and are checked by _select_zone directly. The zones near the location
+#   where a Stationary Zone is being moved to are also found with the index.
+#
+#<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>
+
+from ..global_variables     import GlobalVariables as Gb
+from ..helpers.common       import (is_statzone, )
+from ..helpers.messaging    import (log_debug_msg, _trace, _traceha, )
+from ..helpers.dist_util    import (format_dist_m, )
+
+import math
+
+ZONE_INDEX_CELL_KM          = 1.0       # Grid cell size, zones with a larger radius are not put in the grid
+ZONE_INDEX_MAX_RINGS        = 25        # Scan all zones if the nearest zones are further away than this
+ZONES_DISTANCE_DISPLAY_CNT  = 10        # Zones displayed in the EvLog 'nearest zones' list
+KM_PER_LAT_DEGREE           = 110.0     # Slightly less than the actual value so cells are never too small
+
+
+#<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>
+class ZoneSpatialIndex(object):
+
+    def __init__(self, Zones=None):
+        self.Zones_by_cell   = {}       # {(lat cell, long cell): [Zones]}
+        self.LargeZones      = []       # Zones with a radius larger than the cell size
+        self.PassiveZones    = []       # Passive zones, not selected but a Stationary Zone can not be near them
+        self.zone_cnt        = 0
+        self.lat_cell_deg    = ZONE_INDEX_CELL_KM / KM_PER_LAT_DEGREE
+        self.long_cell_deg   = self.lat_cell_deg
+        self.min_cell        = (0, 0)
+        self.max_cell        = (0, 0)
+
+        if Zones is not None:
+            self.build(Zones)
+
+    def __repr__(self):
+        return (f"<ZoneSpatialIndex: Zones-{self.zone_cnt}, Cells-{len(self.Zones_by_cell)}, "
+                f"Large-{len(self.LargeZones)}>")
+
+#--------------------------------------------------------------------
+    @staticmethod
+    def is_indexed_zone(Zone):
+        '''
+        Zones that can be selected by _select_zone. Stationary Zones are not indexed.
+        '''
+        return (Zone.passive is False
+                    and Zone.radius_m > 1
+                    and is_statzone(Zone.zone) is False)
+
+#--------------------------------------------------------------------
+    def build(self, Zones):
+        '''
+        Put the zones in the grid cells. The longitude cell size is set using the
+        zone furthest from the equator so no cell is narrower than ZONE_INDEX_CELL_KM.
+        '''
+        self.Zones_by_cell = {}
+        self.LargeZones    = []
+        self.PassiveZones  = [Zone for Zone in Zones
+                                if (Zone.passive
+                                    and Zone.radius_m > 1
+                                    and is_statzone(Zone.zone) is False)]
+
+        IndexZones = [Zone for Zone in Zones if self.is_indexed_zone(Zone)]
+        self.zone_cnt = len(IndexZones)
+        if IndexZones == []:
+            return
+
+        max_abs_lat = min(max([abs(Zone.latitude) for Zone in IndexZones]) + .1, 89)
+        self.long_cell_deg = self.lat_cell_deg / math.cos(math.radians(max_abs_lat))
+
+        for Zone in IndexZones:
+            if Zone.radius_m > ZONE_INDEX_CELL_KM * 1000:
+                self.LargeZones.append(Zone)
+                continue
+
+            cell = self.cell(Zone.latitude, Zone.longitude)
+            self.Zones_by_cell.setdefault(cell, []).append(Zone)
+
+        if self.Zones_by_cell:
+            self.min_cell = (min([cell[0] for cell in self.Zones_by_cell]),
+                            min([cell[1] for cell in self.Zones_by_cell]))
+            self.max_cell = (max([cell[0] for cell in self.Zones_by_cell]),
+                            max([cell[1] for cell in self.Zones_by_cell]))
+
+        log_debug_msg(f"Zone Spatial Index > {self}")
+
+#--------------------------------------------------------------------
+    def cell(self, latitude, longitude):
+        return (math.floor(latitude / self.lat_cell_deg),
+                math.floor(longitude / self.long_cell_deg))
+
+    def _ring_zones(self, center_cell, ring):
+        '''
+        Return the zones in the cells that are 'ring' cells away from the center cell
+        '''
+        lat_cell, long_cell = center_cell
+        RingZones = []
+        for lat_offset in range(-ring, ring + 1):
+            for long_offset in range(-ring, ring + 1):
+                if max(abs(lat_offset), abs(long_offset)) != ring:
+                    continue
+
+                RingZones.extend(self.Zones_by_cell.get((lat_cell + lat_offset,
+                                                        long_cell + long_offset), []))
+
+        return RingZones
+
+#--------------------------------------------------------------------
+    def candidate_zones(self, latitude, longitude):
+        '''
+        Return the zones that may contain the location, the zones in the location's
+        cell and the cells next to it and the large zones
+        '''
+        center_cell = self.cell(latitude, longitude)
+
+        return self._ring_zones(center_cell, 0) + self._ring_zones(center_cell, 1) + self.LargeZones
+
+#--------------------------------------------------------------------
+    def zones_near(self, latitude, longitude, dist_m):
+        '''
+        Return the zones whose center may be within dist_m of the location, the zones
+        in the cells within dist_m of the location's cell, the large zones and the
+        passive zones. Used to check the location a Stationary Zone is moved to.
+        '''
+        center_cell = self.cell(latitude, longitude)
+        max_ring    = math.ceil(dist_m / (ZONE_INDEX_CELL_KM * 1000))
+
+        NearZones = []
+        for ring in range(0, max_ring + 1):
+            NearZones.extend(self._ring_zones(center_cell, ring))
+
+        return NearZones + self.LargeZones + self.PassiveZones
+
+#--------------------------------------------------------------------
+    def nearest_zones(self, latitude, longitude, cnt=ZONES_DISTANCE_DISPLAY_CNT):
+        '''
+        Get the zones closest to the location. The cells are searched in rings around
+        the location's cell until cnt zones are found and the next ring is further
+        away than the furthest one found.
+
+        Return:
+            [(distance_m, Zone)] sorted by distance
+        '''
+        center_cell = self.cell(latitude, longitude)
+        max_ring    = max(abs(center_cell[0] - self.min_cell[0]), abs(center_cell[0] - self.max_cell[0]),
+                        abs(center_cell[1] - self.min_cell[1]), abs(center_cell[1] - self.max_cell[1]))
+
+        if max_ring > ZONE_INDEX_MAX_RINGS:
+            zone_distances = [(Zone.distance_m(latitude, longitude), Zone)
+                                    for Zones in self.Zones_by_cell.values()
+                                    for Zone in Zones]
+
+        else:
+            zone_distances = []
+            for ring in range(0, max_ring + 1):
+                zone_distances.extend([(Zone.distance_m(latitude, longitude), Zone)
+                                    for Zone in self._ring_zones(center_cell, ring)])
+
+                if len(zone_distances) >= cnt:
+                    zone_distances.sort(key=lambda zone_dist: zone_dist[0])
+                    if zone_distances[cnt-1][0] <= ring * ZONE_INDEX_CELL_KM * 1000:
+                        break
+
+        zone_distances.extend([(Zone.distance_m(latitude, longitude), Zone) for Zone in self.LargeZones])
+        zone_distances.sort(key=lambda zone_dist: zone_dist[0])
+
+        return zone_distances[:cnt]
+
+
+#<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>
+class ZonesDistanceList(object):
+    '''
+    The 'nearest zones' list returned by _select_zone. The text is only built when
+    it is displayed in the EvLog.
+    '''
+
+    def __init__(self, Device, latitude, longitude):
+        self.Device    = Device
+        self.latitude  = latitude
+        self.longitude = longitude
+        self._display_text = None
+
+    def __repr__(self):
+        return f"<ZonesDistanceList: {self.Device.devicename}>"
+
+    def __str__(self):
+        return self.display_text()
+
+#--------------------------------------------------------------------
+    def zone_distances(self, cnt=ZONES_DISTANCE_DISPLAY_CNT):
+        '''
+        Return:
+            [(distance_m, Zone)] for the nearest zones and the Device's Stationary Zone
+        '''
+        if Gb.ZoneIndex is None:
+            zone_distances = [(Zone.distance_m(self.latitude, self.longitude), Zone)
+                                    for Zone in Gb.Zones
+                                    if ZoneSpatialIndex.is_indexed_zone(Zone)]
+        else:
+            zone_distances = Gb.ZoneIndex.nearest_zones(self.latitude, self.longitude, cnt)
+
+        StatZone = self.Device.StatZone
+        if StatZone is not None and StatZone.passive is False and StatZone.radius_m > 1:
+            zone_distances.append((StatZone.distance_m(self.latitude, self.longitude), StatZone))
+            zone_distances.sort(key=lambda zone_dist: zone_dist[0])
+
+        return zone_distances[:cnt]
+
+    def display_text(self):
+        '''
+        Return:
+            'zone-dist, zone-dist, ...' nearest zone first
+        '''
+        if self._display_text is None:
+            self._display_text = ', '.join([f" {Zone.display_as}-{format_dist_m(dist_m)}"
+                                                for dist_m, Zone in self.zone_distances()])
+
+        return self._display_text
@@ -0,0 +1,377 @@
+#<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>
+#
+#   HOT PATH BENCHMARKS
+#
+#   Time the functions that are called thousands of times an hour. The iCloud3
+#   environment (zones, devices, stub hass, iCloud and Waze) is set up with the
+#   replay harness so nothing is sent over the network.
+#
+#       select_zone_<n>         - iCloud3._select_zone with 50/200/1000 zones
+#       dist_to_devices_<n>     - Device.update_distance_to_other_devices with 5/20/50 devices
+#       evlog_post_event        - EventLog.post_event with a full evlog_table
+#       evlog_filter_recds      - EventLog._filtered_evlog_recds with a full evlog_table
+#       determine_interval_<x>  - determine_interval in a zone, near, away and far from Home
+#       famshr_update_30        - PyiCloud_FamilySharing.update_device_location_data, 30 devices
+#       wazehist_lookup_100k    - WazeRouteHistory.get_location_time_dist, 100k locations
+#
+#   The results (usecs per call) can be saved as the baseline. A later run is
+#   compared to the baseline and a benchmark is a regression if its median time
+#   is more than the threshold (default 25%) slower. The baseline depends on the
+#   machine it is run on so it is not committed, save it on the machine that runs
+#   the check (before the change being measured). A check without a baseline file
+#   fails, it does not pass without comparing anything.
+#
+#   This is a standalone script, not a pytest-benchmark suite. iCloud3 has no
+#   test suite or pytest setup to add it to, the script's exit code is used the
+#   same way a failing benchmark test would be.
+#
+#   This is a development tool like the replay harness. It is never imported by
+#   iCloud3.
+#
+#   Usage:
+#       python -m custom_components.icloud3.tools.hot_path_benchmarks --save-baseline
+#       python -m custom_components.icloud3.tools.hot_path_benchmarks --threshold 1.25
+#               (exit code 1 if any benchmark is a regression, 2 if there is no baseline)
+#
+#<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>
+
+from custom_components.icloud3.global_variables     import GlobalVariables as Gb
+from custom_components.icloud3.const                import (HOME, NOT_HOME, )
+from custom_components.icloud3.helpers.messaging    import (log_info_msg, log_exception, _trace, _traceha, )
+from custom_components.icloud3.helpers.time_util    import (time_now_secs, )
+from custom_components.icloud3.support              import determine_interval as det_interval
+from custom_components.icloud3.support.waze_history import (WazeRouteHistory, ADD_LOCATION_RECORD, grid_cell, )
+from custom_components.icloud3.tools.replay_harness import (ReplayHarness, SyntheticScenario, )
+
+from contextlib             import contextmanager
+import json
+import math
+import os
+import random
+import statistics
+import tempfile
+import time
+
+BENCHMARK_BASELINE_FILENAME = os.path.join(os.path.dirname(__file__), 'hot_path_benchmarks.json')
+BENCHMARK_REGRESSION_THRESHOLD = 1.25   # Regression if the median is 25% slower than the baseline
+BENCHMARK_ROUNDS            = 200
+BENCHMARK_WARMUP_ROUNDS     = 10
+BENCHMARK_POINT_CNT         = 50        # Locations cycled through by the location benchmarks
+WAZEHIST_LOCATION_CNT       = 100000
+
+
+#<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>
+class HotPathBenchmarks(object):
+
+    def __init__(self, rounds=BENCHMARK_ROUNDS, threshold=BENCHMARK_REGRESSION_THRESHOLD, seed=1):
+        self.rounds     = rounds
+        self.threshold  = threshold
+        self.rng        = random.Random(seed)
+        self.results    = {}        # {name: {'rounds', 'min', 'median', 'mean', 'max'}} usecs per call
+
+    def __repr__(self):
+        return f"<HotPathBenchmarks: Results-{len(self.results)}>"
+
+#--------------------------------------------------------------------
+    def run(self):
+        '''
+        Run all of the benchmarks
+
+        Return:
+            {benchmark name: {'rounds', 'min', 'median', 'mean', 'max'}} usecs per call
+        '''
+        for zone_cnt in [50, 200, 1000]:
+            self.bench_select_zone(zone_cnt)
+        self.bench_select_zone_stationary(300)
+
+        for device_cnt in [5, 20, 50]:
+            self.bench_dist_to_other_devices(device_cnt)
+
+        self.bench_event_log()
+        self.bench_determine_interval()
+        self.bench_famshr_update(30)
+        self.bench_wazehist_lookup(WAZEHIST_LOCATION_CNT)
+
+        return self.results
+
+#--------------------------------------------------------------------
+    def _benchmark(self, name, function, rounds=None):
+        '''
+        Call the function for the number of rounds and save the per call times
+
+        Parameters:
+            function - function(round_no) to time
+        '''
+        rounds = rounds or self.rounds
+        for round_no in range(BENCHMARK_WARMUP_ROUNDS):
+            function(round_no)
+
+        times = []
+        for round_no in range(rounds):
+            started = time.perf_counter()
+            function(round_no)
+            times.append((time.perf_counter() - started) * 1000000)
+
+        self.results[name] = {  'rounds': rounds,
+                                'min': round(min(times), 2),
+                                'median': round(statistics.median(times), 2),
+                                'mean': round(statistics.mean(times), 2),
+                                'max': round(max(times), 2), }
+
+        return self.results[name]
+
+#--------------------------------------------------------------------
+    @contextmanager
+    def _icloud3_environment(self, device_cnt=1, zone_cnt=10):
+        '''
+        Set up iCloud3 with the replay harness stubs for the benchmark
+        '''
+        Harness = ReplayHarness(SyntheticScenario(device_cnt=device_cnt, zone_cnt=zone_cnt))
+        try:
+            Harness.setup()
+            yield Harness
+
+        finally:
+            Harness.teardown()
+
+    def _points_around_home(self, max_dist_km, cnt=BENCHMARK_POINT_CNT):
+        '''
+        Return:
+            [(latitude, longitude)] random locations within max_dist_km of Home
+        '''
+        points = []
+        for point_no in range(cnt):
+            dist_km = self.rng.uniform(0, max_dist_km)
+            bearing = self.rng.uniform(0, 2 * math.pi)
+            points.append(self._offset_gps(Gb.HomeZone.latitude, Gb.HomeZone.longitude,
+                                            dist_km, bearing))
+
+        return points
+
+    @staticmethod
+    def _offset_gps(latitude, longitude, dist_km, bearing=0):
+        return (latitude + dist_km * math.cos(bearing) / 111.0,
+                longitude + dist_km * math.sin(bearing) / (111.0 * math.cos(math.radians(latitude))))
+
+    @staticmethod
+    def _set_device_location(Device, latitude, longitude, gps_accuracy=10):
+        Device.loc_data_latitude     = latitude
+        Device.loc_data_longitude    = longitude
+        Device.loc_data_gps_accuracy = gps_accuracy
+        Device.loc_data_secs         = time_now_secs()
+
+#--------------------------------------------------------------------
+    def bench_select_zone(self, zone_cnt):
+        with self._icloud3_environment(device_cnt=1, zone_cnt=zone_cnt):
+            Device = Gb.Devices[0]
+            self._set_device_location(Device, Gb.HomeZone.latitude, Gb.HomeZone.longitude)
+            points = self._points_around_home(25)
+
+            def select_zone(round_no):
+                latitude, longitude = points[round_no % len(points)]
+                Gb.ZoneDistanceCache.new_pass()
+                Gb.ZoneSelectCache.zones_changed()
+                Gb.iCloud3._select_zone(Device, latitude, longitude)
+
+            self._benchmark(f"select_zone_{zone_cnt}", select_zone)
+
+    def bench_select_zone_stationary(self, zone_cnt):
+        '''
+        The Device is not moving, the zone selection results come from the ZoneSelectCache
+        '''
+        with self._icloud3_environment(device_cnt=1, zone_cnt=zone_cnt):
+            Device = Gb.Devices[0]
+            self._set_device_location(Device, Gb.HomeZone.latitude, Gb.HomeZone.longitude)
+
+            def select_zone(round_no):
+                Gb.iCloud3._select_zone(Device)
+
+            self._benchmark(f"select_zone_stationary_{zone_cnt}", select_zone)
+
+#--------------------------------------------------------------------
+    def bench_dist_to_other_devices(self, device_cnt):
+        with self._icloud3_environment(device_cnt=device_cnt):
+            points = self._points_around_home(5, cnt=device_cnt)
+            for Device, (latitude, longitude) in zip(Gb.Devices, points):
+                self._set_device_location(Device, latitude, longitude)
+
+            def dist_to_other_devices(round_no):
+                Device = Gb.Devices[round_no % len(Gb.Devices)]
+                Device.loc_data_latitude += .00001 if round_no % 2 else -.00001
+                Device.update_distance_to_other_devices()
+
+            self._benchmark(f"dist_to_devices_{device_cnt}", dist_to_other_devices)
+
+#--------------------------------------------------------------------
+    def bench_event_log(self):
+        '''
+        Fill the evlog_table to its maximum size, then time adding an event and
+        extracting the records displayed for a device
+        '''
+        with self._icloud3_environment(device_cnt=4):
+            devicenames = [Device.devicename for Device in Gb.Devices]
+            for recd_no in range(Gb.EvLog.evlog_table_max_cnt):
+                Gb.EvLog.post_event(devicenames[recd_no % len(devicenames)],
+                                    f"Benchmark Event #{recd_no}, Zone-Home, Interval-15 min")
+
+            def post_event(round_no):
+                Gb.EvLog.post_event(devicenames[round_no % len(devicenames)],
+                                    f"Benchmark Event #{round_no}, Zone-Home, Interval-15 min")
+
+            def filtered_evlog_recds(round_no):
+                Gb.EvLog._filtered_evlog_recds(devicenames[round_no % len(devicenames)])
+
+            self._benchmark('evlog_post_event', post_event)
+            self._benchmark('evlog_filter_recds', filtered_evlog_recds, rounds=max(self.rounds // 10, 10))
+
+#--------------------------------------------------------------------
+    def bench_determine_interval(self):
+        '''
+        Time determine_interval for the Home zone in each of its main branches:
+        in Home, near Home, away (5km) and far away (50km)
+        '''
+        with self._icloud3_environment(device_cnt=1):
+            Device = Gb.Devices[0]
+            DeviceFmZone = Device.DeviceFmZoneHome
+            locations = {
+                    'inzone': (Gb.HomeZone.latitude, Gb.HomeZone.longitude),
+                    'near': self._offset_gps(Gb.HomeZone.latitude, Gb.HomeZone.longitude, .5),
+                    'away': self._offset_gps(Gb.HomeZone.latitude, Gb.HomeZone.longitude, 5),
+                    'far': self._offset_gps(Gb.HomeZone.latitude, Gb.HomeZone.longitude, 50), }
+
+            for branch, (latitude, longitude) in locations.items():
+                self._set_device_location(Device, latitude, longitude)
+                ZoneSelected, zone_selected, zone_selected_dist_m, zones_distance_list = \
+                        Gb.iCloud3._select_zone(Device)
+                Device.loc_data_zone = zone_selected if ZoneSelected else NOT_HOME
+
+                def determine_interval(round_no):
+                    det_interval.determine_interval(Device, DeviceFmZone)
+
+                self._benchmark(f"determine_interval_{branch}", determine_interval,
+                                rounds=max(self.rounds // 4, 10))
+
+#--------------------------------------------------------------------
+    def bench_famshr_update(self, device_cnt):
+        with self._icloud3_environment(device_cnt=device_cnt) as Harness:
+            famshr_payload = [Harness.Session._famshr_device_info(device)
+                                    for device in Harness.Scenario.devices]
+
+            def famshr_update(round_no):
+                Gb.PyiCloud.FamilySharing.update_device_location_data(None, famshr_payload)
+
+            self._benchmark(f"famshr_update_{device_cnt}", famshr_update, rounds=max(self.rounds // 4, 10))
+
+#--------------------------------------------------------------------
+    def bench_wazehist_lookup(self, location_cnt):
+        '''
+        Time a Waze History lookup with a database of location_cnt locations. Half
+        of the lookups are for a location in the database, half are not.
+        '''
+        with self._icloud3_environment(device_cnt=1):
+            wazehist_database = os.path.join(tempfile.mkdtemp(prefix='icloud3_bench_'),
+                                            'waze_location_history.db')
+            WazeHist = WazeRouteHistory(False, Gb.waze_history_max_distance, 'north_south')
+            WazeHist.open_waze_history_database(wazehist_database)
+
+            try:
+                points = self._points_around_home(30, cnt=location_cnt)
+                location_recds = [[1, f"{latitude:.04f}:{longitude:.04f}", round(latitude, 6),
+                                    round(longitude, 6), 10.0, 8.0, '', '', 1, *grid_cell(latitude, longitude)]
+                                    for latitude, longitude in points]
+                WazeHist.cursor.executemany(ADD_LOCATION_RECORD, location_recds)
+                WazeHist.connection.commit()
+
+                Gb.wazehist_zone_id = {HOME: 1}
+                Gb.waze_history_database_used = True
+                lookup_points = points[:BENCHMARK_POINT_CNT] + self._points_around_home(30)
+
+                def wazehist_lookup(round_no):
+                    latitude, longitude = lookup_points[round_no % len(lookup_points)]
+                    WazeHist.get_location_time_dist(HOME, latitude, longitude)
+
+                self._benchmark(f"wazehist_lookup_{location_cnt // 1000}k", wazehist_lookup,
+                                rounds=max(self.rounds // 4, 10))
+
+            finally:
+                WazeHist.close_waze_history_database()
+
+#--------------------------------------------------------------------
+    def save_baseline(self, filename=BENCHMARK_BASELINE_FILENAME):
+        with open(filename, 'w', encoding='utf8') as f:
+            json.dump(self.results, f, indent=4)
+
+    def compare_to_baseline(self, filename=BENCHMARK_BASELINE_FILENAME):
+        '''
+        Compare the median times to the baseline
+
+        Return:
+            [(name, baseline median, median, ratio)] for the benchmarks that are slower
+            than the threshold. None if there is no baseline file.
+        '''
+        if os.path.exists(filename) is False:
+            return None
+
+        with open(filename, 'r', encoding='utf8') as f:
+            baseline = json.load(f)
+
+        regressions = []
+        for name, result in self.results.items():
+            if name not in baseline or baseline[name]['median'] <= 0:
+                continue
+
+            ratio = result['median'] / baseline[name]['median']
+            if ratio > self.threshold:
+                regressions.append((name, baseline[name]['median'], result['median'], round(ratio, 2)))
+
+        return regressions
+
+#--------------------------------------------------------------------
+    def format_results(self, regressions=None):
+        regression_names = {regression[0]: regression for regression in regressions or []}
+        results_msg = ''
+        for name, result in self.results.items():
+            regression_msg = ''
+            if name in regression_names:
+                regression_msg = (f", REGRESSION-{regression_names[name][3]}x "
+                                    f"(Baseline-{regression_names[name][1]}us)")
+
+            results_msg += (f"\n{name:<28}{result['median']:>12.2f}us median, "
+                            f"{result['min']:.2f}/{result['mean']:.2f}/{result['max']:.2f}us "
+                            f"min/mean/max, #{result['rounds']}{regression_msg}")
+
+        return results_msg
+
+
+#<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>
+if __name__ == '__main__':
+    import argparse
+    import sys
+
+    parser = argparse.ArgumentParser(description='iCloud3 hot path benchmarks')
+    parser.add_argument('--rounds', type=int, default=BENCHMARK_ROUNDS)
+    parser.add_argument('--threshold', type=float, default=BENCHMARK_REGRESSION_THRESHOLD)
+    parser.add_argument('--baseline', default=BENCHMARK_BASELINE_FILENAME)
+    parser.add_argument('--save-baseline', action='store_true')
+    args = parser.parse_args()
+
+    if args.save_baseline is False and os.path.exists(args.baseline) is False:
+        print(f"Hot Path Benchmarks > No baseline file > {args.baseline}, "
+                f"Run with --save-baseline first to create it")
+        sys.exit(2)
+
+    Benchmarks = HotPathBenchmarks(rounds=args.rounds, threshold=args.threshold)
+    Benchmarks.run()
+
+    if args.save_baseline:
+        Benchmarks.save_baseline(args.baseline)
+        print(f"Hot Path Benchmarks > Baseline saved > {args.baseline}{Benchmarks.format_results()}")
+        sys.exit(0)
+
+    regressions = Benchmarks.compare_to_baseline(args.baseline)
+    if regressions is None:
+        print(f"Hot Path Benchmarks > No baseline file > {args.baseline}")
+        sys.exit(2)
+
+    print(f"Hot Path Benchmarks > Threshold-{args.threshold}x{Benchmarks.format_results(regressions)}")
+    sys.exit(1 if regressions else 0)
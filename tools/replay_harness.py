@@ -0,0 +1,1107 @@
+#<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>
+#
+#   TRACKING ENGINE REPLAY HARNESS
+#
+#   Run the 5-sec loop (_polling_loop_5_sec_device), the zone selection and the
+#   interval calculations offline against a recorded or synthetic day of
+#   FamShr location data and iOS App state changes.
+#
+#   Everything outside of iCloud3 is replaced:
+#       - Clock: time.time, dt_util.now and dt_util.utcnow return the replay time.
+#               The 5-sec loop is called for every 5-secs of replay time without
+#               waiting so a day is replayed much faster than real time.
+#       - Gb.hass: A stub with the zone and iOS App entity states, the state change
+#               listener, services, bus and event loop calls.
+#       - iCloud: The PyiCloud FamilySharing object uses a session that returns
+#               the scenario's location for each device at the replay time.
+#       - Waze: The route calculator returns the straight line distance times a
+#               road factor and a fixed speed.
+#       - DeviceUpdatePool: max_workers=0, the device updates are run inline.
+#       - WazeRouteFanout: max_workers=0, the Waze routes are requested inline.
+#
+#   The number of iCloud calls, Waze calls, sensor writes, 5-sec loop passes and
+#   the CPU and wall time of the replay are reported. These are used to compare
+#   the effect of a change on the tracking engine.
+#
+#   This is a development tool. It is not in the support package and is never
+#   imported by iCloud3. Run it from the Home Assistant configuration directory
+#   in the Home Assistant Python environment.
+#
+#   Usage:
+#       Scenario = SyntheticScenario(device_cnt=4, zone_cnt=10, hours=24, seed=1)
+#       Scenario = RecordedScenario('/config/icloud3_replay.jsonl')
+#       report   = ReplayHarness(Scenario).run()
+#
+#       python -m custom_components.icloud3.tools.replay_harness --devices 4 --zones 10
+#
+#   Recorded scenario file (one json record per line):
+#       {"type": "zone", "zone": "home", "fname": "Home", "latitude": 27.63, "longitude": -80.39, "radius": 100}
+#       {"type": "device", "devicename": "gary_iphone", "fname": "Gary", "famshr_name": "Gary-iPhone",
+#                           "iosapp_devicename": "gary_iphone_app"}
+#       {"type": "famshr", "secs": 1767600000, "devicename": "gary_iphone", "latitude": 27.63,
+#                           "longitude": -80.39, "gps_accuracy": 15}
+#       {"type": "iosapp", "secs": 1767600300, "devicename": "gary_iphone", "trigger": "Geographic Region Exited",
+#                           "state": "not_home", "latitude": 27.64, "longitude": -80.38, "gps_accuracy": 10}
+#
+#<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>
+
+from custom_components.icloud3.global_variables           import GlobalVariables as Gb
+from custom_components.icloud3.const                      import (HOME, NOT_HOME, ZONE,
+                                                                  DEVICE_TRACKER, TRIGGER, BATTERY_LEVEL, BATTERY_STATUS,
+                                                                  GEOGRAPHIC_REGION_ENTERED, GEOGRAPHIC_REGION_EXITED,
+                                                                  SIGNIFICANT_LOC_CHANGE,
+                                                                  ID, NAME, LOCATION, RADIUS, PASSIVE, FRIENDLY_NAME,
+                                                                  LATITUDE, LONGITUDE, GPS_ACCURACY, ALTITUDE, VERT_ACCURACY,
+                                                                  DEFAULT_PROFILE_CONF, DEFAULT_TRACKING_CONF, DEFAULT_GENERAL_CONF,
+                                                                  DEFAULT_DEVICE_CONF,
+                                                                  CONF_USERNAME, CONF_DATA_SOURCE, CONF_DEVICES,
+                                                                  CONF_LOG_LEVEL, CONF_WAZE_USED, CONF_WAZE_HISTORY_DATABASE_USED,
+                                                                  CONF_IC3_DEVICENAME, CONF_FNAME, CONF_DEVICE_TYPE, CONF_UNIQUE_ID,
+                                                                  CONF_EVLOG_DISPLAY_ORDER, CONF_FAMSHR_DEVICENAME, CONF_RAW_MODEL,
+                                                                  CONF_MODEL, CONF_MODEL_DISPLAY_NAME, CONF_IOSAPP_DEVICE,
+                                                                  CONF_TRACK_FROM_ZONES, )
+from custom_components.icloud3.helpers.messaging          import (log_info_msg, log_exception, _trace, _traceha, )
+from custom_components.icloud3.helpers.dist_util          import (calc_distance_km, )
+from custom_components.icloud3.helpers                    import entity_io
+from custom_components.icloud3.support                    import start_ic3
+from custom_components.icloud3.support                    import config_file
+from custom_components.icloud3.support                    import iosapp_interface
+from custom_components.icloud3.support                    import iosapp_state_listener
+from custom_components.icloud3.support.event_log          import EventLog
+from custom_components.icloud3.support.device_update_pool import DeviceUpdatePool
+from custom_components.icloud3.support.waze_route_fanout  import WazeRouteFanout
+from custom_components.icloud3.support.pyicloud_ic3       import PyiCloud_FamilySharing
+from custom_components.icloud3.device                     import iCloud3_Device
+
+import homeassistant.util.dt as dt_util
+from datetime               import datetime, timezone
+import asyncio
+import bisect
+import copy
+import json
+import math
+import os
+import random
+import tempfile
+import time
+
+REPLAY_START_SECS       = 1767571200        # 2026-01-05 00:00:00 UTC (a Monday)
+REPLAY_LOOP_SECS        = 5
+REPLAY_HOME_GPS         = (27.638, -80.397)
+REPLAY_ROAD_FACTOR      = 1.3               # Road distance / straight line distance
+REPLAY_SPEED_KMH        = 45
+REPLAY_MIN_TRAVEL_SECS  = 300
+REPLAY_EXIT_DELAY_SECS  = 120               # iOS App Region Exited after leaving the zone
+REPLAY_SIG_LOC_SECS     = 600               # iOS App Significant Location Change while moving
+REPLAY_GPS_ACCURACY     = 15
+
+
+#<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>
+#
+#   SCENARIOS
+#
+#<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>
+class ReplayScenario(object):
+    '''
+    The zones, devices and location data replayed by the harness
+
+        zones - [{'zone', 'fname', 'latitude', 'longitude', 'radius'}], home is first
+        devices - [{'devicename', 'fname', 'device_type', 'famshr_name', 'device_id',
+                    'raw_model', 'model_display_name', 'iosapp_devicename'}]
+        iosapp_events - [(secs, devicename, trigger, state, latitude, longitude, gps_accuracy)]
+                    sorted by secs
+    '''
+
+    def __init__(self):
+        self.zones          = []
+        self.devices        = []
+        self.iosapp_events  = []
+        self.start_secs     = REPLAY_START_SECS
+        self.end_secs       = REPLAY_START_SECS
+
+    def __repr__(self):
+        return (f"<{self.__class__.__name__}: Devices-{len(self.devices)}, "
+                f"Zones-{len(self.zones)}, Hours-{self.hours}>")
+
+    @property
+    def hours(self):
+        return round((self.end_secs - self.start_secs) / 3600, 2)
+
+    def famshr_location(self, devicename, secs):
+        '''
+        Return:
+            (latitude, longitude, gps_accuracy, location secs) of the device's FamShr
+            location at the replay time, None if there is no location
+        '''
+        return None
+
+    @staticmethod
+    def _device_fields(devicename, fname, famshr_name, device_id, iosapp_devicename,
+                        device_type='iPhone', raw_model='iPhone15,2',
+                        model_display_name='iPhone 14 Pro'):
+        return {'devicename': devicename,
+                'fname': fname,
+                'device_type': device_type,
+                'famshr_name': famshr_name,
+                'device_id': device_id,
+                'raw_model': raw_model,
+                'model_display_name': model_display_name,
+                'iosapp_devicename': iosapp_devicename, }
+
+
+#<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>
+class SyntheticScenario(ReplayScenario):
+    '''
+    Generate the zones around Home and a daily itinerary for each device:
+    leave Home in the morning, go to a work zone, stop at another zone on some
+    days and return Home in the evening. The location is interpolated along a
+    straight line between the zones. Every 3rd device does not use the iOS App.
+    '''
+
+    def __init__(self, device_cnt=4, zone_cnt=10, hours=24, seed=1,
+                        start_secs=REPLAY_START_SECS, home_gps=REPLAY_HOME_GPS):
+        super().__init__()
+
+        self.rng        = random.Random(seed)
+        self.start_secs = start_secs
+        self.end_secs   = start_secs + int(hours * 3600)
+
+        self.zones      = self._create_zones(zone_cnt, home_gps)
+        self.devices    = self._create_devices(device_cnt)
+        self.legs_by_devicename = {}        # {devicename: [(depart_secs, arrive_secs, from_zone, to_zone)]}
+        self.depart_secs_by_devicename = {} # {devicename: [depart_secs]} for bisect
+        self.loc_age_secs_by_devicename = {}
+
+        for device in self.devices:
+            devicename = device['devicename']
+            self.legs_by_devicename[devicename] = self._create_itinerary()
+            self.depart_secs_by_devicename[devicename] = \
+                    [leg[0] for leg in self.legs_by_devicename[devicename]]
+            self.loc_age_secs_by_devicename[devicename] = self.rng.randint(5, 90)
+
+        self.iosapp_events = self._create_iosapp_events()
+
+#--------------------------------------------------------------------
+    def _create_zones(self, zone_cnt, home_gps):
+        home_lat, home_long = home_gps
+        zones = [{'zone': HOME, 'fname': 'Home', 'latitude': home_lat,
+                    'longitude': home_long, 'radius': 100}]
+
+        for zone_no in range(1, zone_cnt + 1):
+            dist_km = self.rng.uniform(2, 25)
+            bearing = self.rng.uniform(0, 2 * math.pi)
+            zones.append({  'zone': f"replay_zone_{zone_no}",
+                            'fname': f"Zone{zone_no}",
+                            'latitude': round(home_lat + dist_km * math.cos(bearing) / 111.0, 6),
+                            'longitude': round(home_long + dist_km * math.sin(bearing)
+                                            / (111.0 * math.cos(math.radians(home_lat))), 6),
+                            'radius': self.rng.choice([100, 150, 200, 250])})
+
+        return zones
+
+    def _create_devices(self, device_cnt):
+        devices = []
+        for device_no in range(1, device_cnt + 1):
+            devicename = f"replay_phone_{device_no}"
+            iosapp_devicename = f"{devicename}_app" if device_no % 3 != 0 else None
+            devices.append(self._device_fields(devicename, f"Phone{device_no}",
+                                                f"Replay-iPhone-{device_no}",
+                                                f"replay_device_id_{device_no:03}",
+                                                iosapp_devicename))
+
+        return devices
+
+#--------------------------------------------------------------------
+    @staticmethod
+    def _travel_secs(from_zone, to_zone):
+        dist_km = calc_distance_km( (from_zone['latitude'], from_zone['longitude']),
+                                    (to_zone['latitude'], to_zone['longitude']))
+        travel_secs = dist_km * REPLAY_ROAD_FACTOR / REPLAY_SPEED_KMH * 3600
+
+        return max(REPLAY_MIN_TRAVEL_SECS, int(travel_secs))
+
+    def _add_leg(self, legs, depart_secs, from_zone, to_zone):
+        arrive_secs = depart_secs + self._travel_secs(from_zone, to_zone)
+        legs.append((depart_secs, arrive_secs, from_zone, to_zone))
+
+        return arrive_secs
+
+    def _create_itinerary(self):
+        '''
+        Return:
+            [(depart_secs, arrive_secs, from_zone, to_zone)] for each day of the replay
+        '''
+        home_zone  = self.zones[0]
+        away_zones = self.zones[1:]
+        if away_zones == []:
+            return []
+
+        legs = []
+        work_zone = self.rng.choice(away_zones)
+        day_cnt = math.ceil((self.end_secs - self.start_secs) / 86400)
+        for day_no in range(day_cnt):
+            day_start_secs = self.start_secs + day_no * 86400
+
+            depart_secs = day_start_secs + self.rng.randint(7 * 3600, 9 * 3600)
+            self._add_leg(legs, depart_secs, home_zone, work_zone)
+
+            depart_secs = day_start_secs + self.rng.randint(16 * 3600, 18 * 3600)
+            if len(away_zones) > 1 and self.rng.random() < .5:
+                errand_zone = self.rng.choice([zone for zone in away_zones if zone is not work_zone])
+                arrive_secs = self._add_leg(legs, depart_secs, work_zone, errand_zone)
+                depart_secs = arrive_secs + self.rng.randint(30 * 60, 90 * 60)
+                self._add_leg(legs, depart_secs, errand_zone, home_zone)
+            else:
+                self._add_leg(legs, depart_secs, work_zone, home_zone)
+
+        return legs
+
+#--------------------------------------------------------------------
+    def location_at(self, devicename, secs):
+        '''
+        Return:
+            (latitude, longitude) of the device at the time
+        '''
+        legs = self.legs_by_devicename.get(devicename, [])
+        leg_idx = bisect.bisect_right(self.depart_secs_by_devicename.get(devicename, []), secs) - 1
+        if leg_idx < 0:
+            home_zone = self.zones[0]
+            return (home_zone['latitude'], home_zone['longitude'])
+
+        depart_secs, arrive_secs, from_zone, to_zone = legs[leg_idx]
+        if secs >= arrive_secs:
+            return (to_zone['latitude'], to_zone['longitude'])
+
+        pct = (secs - depart_secs) / (arrive_secs - depart_secs)
+        return (round(from_zone['latitude'] + (to_zone['latitude'] - from_zone['latitude']) * pct, 6),
+                round(from_zone['longitude'] + (to_zone['longitude'] - from_zone['longitude']) * pct, 6))
+
+    def famshr_location(self, devicename, secs):
+        loc_secs = secs - self.loc_age_secs_by_devicename.get(devicename, 0)
+        latitude, longitude = self.location_at(devicename, loc_secs)
+
+        return (latitude, longitude, REPLAY_GPS_ACCURACY, loc_secs)
+
+#--------------------------------------------------------------------
+    @staticmethod
+    def _zone_state(zone):
+        return HOME if zone['zone'] == HOME else zone['fname']
+
+    def _create_iosapp_events(self):
+        '''
+        Region Exited after leaving a zone, a Significant Location Change while
+        moving and Region Entered when arriving at a zone
+        '''
+        iosapp_events = []
+        for device in self.devices:
+            devicename = device['devicename']
+            if device['iosapp_devicename'] is None:
+                continue
+
+            for depart_secs, arrive_secs, from_zone, to_zone in self.legs_by_devicename[devicename]:
+                event_secs = depart_secs + REPLAY_EXIT_DELAY_SECS
+                if event_secs < arrive_secs:
+                    iosapp_events.append((event_secs, devicename, GEOGRAPHIC_REGION_EXITED, NOT_HOME,
+                                        *self.location_at(devicename, event_secs), REPLAY_GPS_ACCURACY))
+
+                for event_secs in range(event_secs + REPLAY_SIG_LOC_SECS, arrive_secs, REPLAY_SIG_LOC_SECS):
+                    iosapp_events.append((event_secs, devicename, SIGNIFICANT_LOC_CHANGE, NOT_HOME,
+                                        *self.location_at(devicename, event_secs), REPLAY_GPS_ACCURACY))
+
+                iosapp_events.append((arrive_secs, devicename, GEOGRAPHIC_REGION_ENTERED,
+                                    self._zone_state(to_zone),
+                                    to_zone['latitude'], to_zone['longitude'], REPLAY_GPS_ACCURACY))
+
+        return sorted([iosapp_event for iosapp_event in iosapp_events
+                                    if iosapp_event[0] < self.end_secs],
+                        key=lambda iosapp_event: iosapp_event[0])
+
+
+#<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>
+class RecordedScenario(ReplayScenario):
+    '''
+    Load a recorded zone, device, FamShr location and iOS App trigger stream from
+    a json lines file. See the file format at the top of this module.
+    '''
+
+    def __init__(self, filename):
+        super().__init__()
+
+        self.filename = filename
+        self.famshr_locations_by_devicename = {}    # {devicename: [(secs, lat, long, gps_accuracy)]}
+        self.famshr_secs_by_devicename      = {}    # {devicename: [secs]} for bisect
+
+        all_secs = []
+        with open(filename, 'r', encoding='utf8') as f:
+            for recd in f:
+                recd = recd.strip()
+                if recd == '' or recd.startswith('#'):
+                    continue
+
+                recd = json.loads(recd)
+                recd_type = recd.get('type')
+                if recd_type == 'zone':
+                    zone = {'zone': recd['zone'],
+                            'fname': recd.get('fname', recd['zone'].title()),
+                            'latitude': recd['latitude'],
+                            'longitude': recd['longitude'],
+                            'radius': recd.get('radius', 100)}
+                    if zone['zone'] == HOME:
+                        self.zones.insert(0, zone)
+                    else:
+                        self.zones.append(zone)
+
+                elif recd_type == 'device':
+                    devicename = recd['devicename']
+                    self.devices.append(self._device_fields(devicename,
+                                            recd.get('fname', devicename.title()),
+                                            recd.get('famshr_name', devicename),
+                                            recd.get('device_id', f"replay_{devicename}"),
+                                            recd.get('iosapp_devicename'),
+                                            device_type=recd.get('device_type', 'iPhone'),
+                                            raw_model=recd.get('raw_model', 'iPhone15,2')))
+
+                elif recd_type == 'famshr':
+                    all_secs.append(recd['secs'])
+                    self.famshr_locations_by_devicename.setdefault(recd['devicename'], []).append(
+                            (recd['secs'], recd['latitude'], recd['longitude'],
+                                recd.get('gps_accuracy', REPLAY_GPS_ACCURACY)))
+
+                elif recd_type == 'iosapp':
+                    all_secs.append(recd['secs'])
+                    self.iosapp_events.append((recd['secs'], recd['devicename'],
+                                            recd['trigger'], recd.get('state', NOT_HOME),
+                                            recd['latitude'], recd['longitude'],
+                                            recd.get('gps_accuracy', REPLAY_GPS_ACCURACY)))
+
+        for devicename, famshr_locations in self.famshr_locations_by_devicename.items():
+            famshr_locations.sort()
+            self.famshr_secs_by_devicename[devicename] = [location[0] for location in famshr_locations]
+
+        self.iosapp_events.sort(key=lambda iosapp_event: iosapp_event[0])
+
+        if all_secs:
+            self.start_secs = int(min(all_secs))
+            self.end_secs   = int(max(all_secs)) + REPLAY_LOOP_SECS
+
+#--------------------------------------------------------------------
+    def famshr_location(self, devicename, secs):
+        famshr_secs = self.famshr_secs_by_devicename.get(devicename, [])
+        location_idx = bisect.bisect_right(famshr_secs, secs) - 1
+        if location_idx < 0:
+            return None
+
+        loc_secs, latitude, longitude, gps_accuracy = \
+                self.famshr_locations_by_devicename[devicename][location_idx]
+
+        return (latitude, longitude, gps_accuracy, loc_secs)
+
+
+#<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>
+#
+#   CLOCK, HOME ASSISTANT, ICLOUD AND WAZE STUBS
+#
+#<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>
+class ReplayClock(object):
+    '''
+    Replace time.time, dt_util.now and dt_util.utcnow with the replay time. The
+    time zone is set to UTC so the local time strings match the replay times.
+    time.perf_counter and time.process_time are not changed and still measure
+    the real time the replay takes.
+    '''
+
+    def __init__(self, start_secs):
+        self.secs        = start_secs
+        self._originals  = []
+
+    def time(self):
+        return float(self.secs)
+
+    def now(self, time_zone=None):
+        return datetime.fromtimestamp(self.secs, timezone.utc)
+
+    def utcnow(self):
+        return datetime.fromtimestamp(self.secs, timezone.utc)
+
+    def utc_datetime(self, secs=None):
+        return datetime.fromtimestamp(self.secs if secs is None else secs, timezone.utc)
+
+    def set_secs(self, secs):
+        self.secs = secs
+
+    def install(self):
+        self._originals = [ (time, 'time', time.time),
+                            (dt_util, 'now', dt_util.now),
+                            (dt_util, 'utcnow', dt_util.utcnow), ]
+        self._original_tz = os.environ.get('TZ')
+
+        os.environ['TZ'] = 'UTC'
+        time.tzset()
+        time.time      = self.time
+        dt_util.now    = self.now
+        dt_util.utcnow = self.utcnow
+
+    def uninstall(self):
+        for module, attr, original in self._originals:
+            setattr(module, attr, original)
+        self._originals = []
+
+        if self._original_tz is None:
+            os.environ.pop('TZ', None)
+        else:
+            os.environ['TZ'] = self._original_tz
+        time.tzset()
+
+
+#<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>
+class StubState(object):
+    def __init__(self, entity_id, state, attributes, last_changed):
+        self.entity_id    = entity_id
+        self.state        = state
+        self.attributes   = attributes or {}
+        self.last_changed = last_changed
+        self.last_updated = last_changed
+
+    def __repr__(self):
+        return f"<StubState: {self.entity_id}={self.state}>"
+
+
+class StubEvent(object):
+    def __init__(self, data):
+        self.data = data
+
+
+class StubStates(object):
+    '''
+    hass.states with the state change listeners used by the iOS App state listener
+    '''
+
+    def __init__(self, Clock):
+        self.Clock      = Clock
+        self.State_by_entity_id = {}
+        self.listeners_by_entity_id = {}    # {entity_id: [callback functions]}
+        self.set_cnt    = 0
+
+    def get(self, entity_id):
+        return self.State_by_entity_id.get(entity_id)
+
+    def entity_ids(self, domain=None):
+        return [entity_id for entity_id in self.State_by_entity_id
+                            if domain is None or entity_id.startswith(f"{domain}.")]
+
+    def set(self, entity_id, new_state, attributes=None, force_update=False, **kwargs):
+        '''
+        Set the state and call the state change listeners for the entity
+        '''
+        self.set_cnt += 1
+        OldState = self.State_by_entity_id.get(entity_id)
+        NewState = StubState(entity_id, new_state, copy.copy(attributes),
+                                self.Clock.utc_datetime())
+        self.State_by_entity_id[entity_id] = NewState
+
+        for listener in self.listeners_by_entity_id.get(entity_id, []):
+            listener(StubEvent({'entity_id': entity_id,
+                                'old_state': OldState,
+                                'new_state': NewState}))
+
+    async_set = set
+
+    def track_state_change_event(self, hass, entity_ids, listener):
+        for entity_id in entity_ids:
+            self.listeners_by_entity_id.setdefault(entity_id, []).append(listener)
+
+        def _unsubscribe():
+            for entity_id in entity_ids:
+                if listener in self.listeners_by_entity_id.get(entity_id, []):
+                    self.listeners_by_entity_id[entity_id].remove(listener)
+
+        return _unsubscribe
+
+
+class StubServices(object):
+    def __init__(self):
+        self.calls = []                     # [(domain, service, service_data)]
+
+    def call(self, domain, service, service_data=None, *args, **kwargs):
+        self.calls.append((domain, service, service_data))
+
+    async def async_call(self, domain, service, service_data=None, *args, **kwargs):
+        self.call(domain, service, service_data)
+
+    def has_service(self, domain, service):
+        return True
+
+    def async_services(self):
+        return {}
+
+
+class StubBus(object):
+    def async_listen_once(self, event_type, listener):
+        return lambda: None
+
+    def async_listen(self, event_type, listener):
+        return lambda: None
+
+    listen = async_listen
+
+    def async_fire(self, event_type, event_data=None):
+        pass
+
+    fire = async_fire
+
+
+class StubLoop(object):
+    '''
+    The HA event loop. Callbacks are run right away, coroutines are closed
+    without being run.
+    '''
+
+    def create_task(self, coroutine):
+        _close_coroutine(coroutine)
+
+    def call_soon_threadsafe(self, callback, *args):
+        callback(*args)
+
+    def call_later(self, delay, callback, *args):
+        return None
+
+
+class StubConfig(object):
+    def __init__(self, config_directory, latitude, longitude):
+        self.config_dir = config_directory
+        self.latitude   = latitude
+        self.longitude  = longitude
+        self.time_zone  = 'UTC'
+        self.country    = 'US'
+
+    def path(self, *path):
+        return os.path.join(self.config_dir, *path)
+
+
+class StubHass(object):
+    def __init__(self, Clock, config_directory, latitude, longitude):
+        self.states     = StubStates(Clock)
+        self.services   = StubServices()
+        self.bus        = StubBus()
+        self.loop       = StubLoop()
+        self.config     = StubConfig(config_directory, latitude, longitude)
+        self.data       = {}
+
+    def add_job(self, target, *args):
+        if asyncio.iscoroutine(target):
+            _close_coroutine(target)
+        else:
+            target(*args)
+
+    def async_add_job(self, target, *args):
+        self.add_job(target, *args)
+
+    def async_create_task(self, coroutine, *args, **kwargs):
+        _close_coroutine(coroutine)
+
+    def create_task(self, coroutine, *args, **kwargs):
+        _close_coroutine(coroutine)
+
+    def async_add_executor_job(self, target, *args):
+        target(*args)
+        return _CompletedAwaitable()
+
+
+class StubSensor(object):
+    def async_update_sensor(self):
+        pass
+
+
+class _CompletedAwaitable(object):
+    def __await__(self):
+        return iter([])
+
+
+def _close_coroutine(coroutine):
+    if asyncio.iscoroutine(coroutine):
+        coroutine.close()
+
+
+#<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>
+class ReplayResponse(object):
+    def __init__(self, response_data):
+        self.response_data = response_data
+        self.status_code   = 200
+        self.ok            = True
+
+    def json(self):
+        return self.response_data
+
+
+class ReplaySession(object):
+    '''
+    The PyiCloud session. A FamShr refreshClient request returns the scenario's
+    location of every device at the replay time.
+    '''
+
+    def __init__(self, Scenario, Clock):
+        self.Scenario      = Scenario
+        self.Clock         = Clock
+        self.refresh_cnt   = 0
+        self.post_cnt      = 0
+
+    def post(self, url, params=None, data=None, **kwargs):
+        self.post_cnt += 1
+        if url.endswith('/refreshClient') is False:
+            return ReplayResponse({})
+
+        self.refresh_cnt += 1
+        return ReplayResponse({'content': [self._famshr_device_info(device)
+                                            for device in self.Scenario.devices]})
+
+    def _famshr_device_info(self, device):
+        device_info = { ID: device['device_id'],
+                        NAME: device['famshr_name'],
+                        'deviceDisplayName': device['model_display_name'],
+                        'rawDeviceModel': device['raw_model'],
+                        'modelDisplayName': device['device_type'],
+                        'deviceClass': device['device_type'],
+                        'deviceStatus': '200',
+                        'batteryLevel': .80,
+                        'batteryStatus': 'NotCharging',
+                        LOCATION: None, }
+
+        location = self.Scenario.famshr_location(device['devicename'], self.Clock.secs)
+        if location:
+            latitude, longitude, gps_accuracy, loc_secs = location
+            device_info[LOCATION] = {   LATITUDE: latitude,
+                                        LONGITUDE: longitude,
+                                        'horizontalAccuracy': gps_accuracy,
+                                        'verticalAccuracy': 0,
+                                        ALTITUDE: 0,
+                                        'timeStamp': int(loc_secs * 1000),
+                                        'positionType': 'GPS',
+                                        'isOld': False,
+                                        'isInaccurate': False,
+                                        'locationFinished': True,
+                                        'floorLevel': 0, }
+
+        return device_info
+
+
+class ReplayPyiCloud(object):
+    '''
+    The PyiCloudService object with the FamShr service using the replay session
+    '''
+
+    def __init__(self, Session):
+        self.Session         = Session
+        self.RawData_by_device_id        = {}
+        self.RawData_by_device_id_famshr = {}
+        self.RawData_by_device_id_fmf    = {}
+        self.requires_2fa    = False
+        self.new_2fa_code_already_requested_flag = False
+        self.called_from     = 'replay'
+        self.init_step_needed = []
+        self.FindMyFriends   = None
+        self.FamilySharing   = None
+        self.FamilySharing   = PyiCloud_FamilySharing(self, 'https://replay.icloud.com',
+                                                        Session, {}, with_family=True)
+
+
+#<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>
+class ReplayWazeRouteCalc(object):
+    '''
+    The Waze route calculator. The route distance is the straight line distance
+    times the road factor at a fixed speed.
+    '''
+
+    def __init__(self):
+        self.calc_route_cnt = 0
+
+    def calc_route_info(self, from_lat, from_long, to_lat, to_long, log_results_flag=True):
+        self.calc_route_cnt += 1
+        route_dist_km = calc_distance_km((from_lat, from_long), (to_lat, to_long)) * REPLAY_ROAD_FACTOR
+        route_time    = route_dist_km / REPLAY_SPEED_KMH * 60
+
+        return route_time, route_dist_km
+
+    def close(self):
+        pass
+
+    def log_request_stats(self):
+        pass
+
+
+#<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>
+#
+#   REPLAY HARNESS
+#
+#<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>
+class ReplayHarness(object):
+
+    def __init__(self, Scenario, waze_used=True, log_level='info'):
+        self.Scenario   = Scenario
+        self.waze_used  = waze_used
+        self.log_level  = log_level
+        self.Clock      = ReplayClock(Scenario.start_secs)
+        self.Session    = ReplaySession(Scenario, self.Clock)
+        self.WazeRouteCalc = ReplayWazeRouteCalc()
+        self.config_directory = None
+        self.iosapp_event_idx = 0
+        self.setup_icloud_refresh_cnt = 0
+        self._patches   = []                # [(object, attribute, original value)]
+        self.counts     = {}
+        self.report     = {}
+
+    def __repr__(self):
+        return f"<ReplayHarness: {self.Scenario}>"
+
+#--------------------------------------------------------------------
+    def run(self):
+        '''
+        Set up iCloud3 with the scenario's zones and devices and run the 5-sec
+        loop for every 5-secs of the scenario
+
+        Return:
+            The replay report dictionary
+        '''
+        try:
+            self.setup()
+
+            started_cpu_secs  = time.process_time()
+            started_wall_secs = time.perf_counter()
+            pass_cnt = 0
+
+            for loop_secs in range(self.Scenario.start_secs, self.Scenario.end_secs, REPLAY_LOOP_SECS):
+                self.Clock.set_secs(loop_secs)
+                self._post_iosapp_events(loop_secs)
+
+                Gb.iCloud3._polling_loop_5_sec_device(self.Clock.utc_datetime())
+                pass_cnt += 1
+
+            self._build_report(pass_cnt,
+                                time.process_time() - started_cpu_secs,
+                                time.perf_counter() - started_wall_secs)
+
+        except Exception as err:
+            log_exception(err)
+
+        finally:
+            self.teardown()
+
+        return self.report
+
+#--------------------------------------------------------------------
+    def _patch(self, obj, attr, value):
+        self._patches.append((obj, attr, getattr(obj, attr)))
+        setattr(obj, attr, value)
+
+    def _count_calls(self, counter, function):
+        def counted_function(*args, **kwargs):
+            self.counts[counter] += 1
+            return function(*args, **kwargs)
+
+        return counted_function
+
+#--------------------------------------------------------------------
+    def setup(self):
+        '''
+        Set up the stubs and the iCloud3 configuration, zones and devices in the
+        same order as the initial load (the configuration file, then the
+        start_ic3_control stages). The zone change listener is not set up, the
+        zones do not change during a replay.
+        '''
+        from custom_components.icloud3.icloud3_main import iCloud3
+
+        self.config_directory = tempfile.mkdtemp(prefix='icloud3_replay_')
+        home_zone = self.Scenario.zones[0]
+
+        self.Clock.install()
+        Gb.hass = StubHass(self.Clock, self.config_directory,
+                            home_zone['latitude'], home_zone['longitude'])
+        Gb.EvLog = EventLog(Gb.hass)
+        Gb.EvLogSensor = StubSensor()
+        Gb.time_zone_offset_seconds = 0
+
+        self._setup_configuration()
+        self._setup_entity_states()
+
+        self._patch(entity_io, 'get_entity_registry_data', self._get_entity_registry_data)
+        self._patch(iosapp_interface, 'get_entity_registry_mobile_app_devices',
+                                    self._get_entity_registry_mobile_app_devices)
+        self._patch(iosapp_interface, 'get_mobile_app_notifications',
+                                    self._get_mobile_app_notifications)
+        self._patch(iosapp_state_listener, 'track_state_change_event',
+                                    Gb.hass.states.track_state_change_event)
+
+        self.counts = {'sensor_writes': 0, 'device_tracker_writes': 0}
+        self._patch(iCloud3_Device, 'write_ha_sensors_state',
+                    self._count_calls('sensor_writes', iCloud3_Device.write_ha_sensors_state))
+        self._patch(iCloud3_Device, 'write_ha_sensor_state',
+                    self._count_calls('sensor_writes', iCloud3_Device.write_ha_sensor_state))
+        self._patch(iCloud3_Device, 'write_ha_device_tracker_state',
+                    self._count_calls('device_tracker_writes', iCloud3_Device.write_ha_device_tracker_state))
+
+        Gb.start_icloud3_inprocess_flag = True
+        Gb.initial_icloud3_loading_flag = True
+        Gb.iCloud3 = iCloud3()
+        Gb.DeviceUpdatePool = DeviceUpdatePool(max_workers=0)
+        Gb.WazeRouteFanout  = WazeRouteFanout(max_workers=0)
+
+        # Load the configuration file
+        config_file.count_device_tracking_methods_configured()
+
+        # Stage 1 - The zone display_as is set when the zones are created on the initial load
+        start_ic3.initialize_global_variables()
+        start_ic3.set_global_variables_from_conf_parameters(evlog_msg=False)
+        start_ic3.define_tracking_control_fields()
+
+        # Stage 2 - Zones (and the zone spatial index) and Waze
+        start_ic3.create_Zones_object()
+        start_ic3.create_Waze_object()
+        Gb.Waze.WazeRouteCalc = self.WazeRouteCalc
+        Gb.WazeHist.load_track_from_zone_table()
+
+        # Stage 3
+        start_ic3.create_Devices_object()
+
+        # Stage 4
+        Gb.PyiCloud = ReplayPyiCloud(self.Session)
+        start_ic3.setup_tracked_devices_for_famshr()
+        start_ic3.set_device_tracking_method_famshr_fmf()
+        start_ic3.setup_tracked_devices_for_iosapp()
+
+        # Stage 5
+        start_ic3.identify_tracked_monitored_devices()
+        start_ic3.setup_trackable_devices()
+        iosapp_state_listener.subscribe_to_iosapp_state_changes()
+
+        Gb.initial_icloud3_loading_flag = False
+        Gb.start_icloud3_inprocess_flag = False
+
+        # Only count what is done after the setup
+        for counter in self.counts:
+            self.counts[counter] = 0
+        self.setup_icloud_refresh_cnt = self.Session.refresh_cnt
+        self.WazeRouteCalc.calc_route_cnt = 0
+        Gb.hass.services.calls = []
+
+#--------------------------------------------------------------------
+    def _setup_configuration(self):
+        Gb.conf_profile  = DEFAULT_PROFILE_CONF.copy()
+        Gb.conf_general  = copy.deepcopy(DEFAULT_GENERAL_CONF)
+        Gb.conf_tracking = copy.deepcopy(DEFAULT_TRACKING_CONF)
+
+        Gb.conf_general[CONF_LOG_LEVEL] = self.log_level
+        Gb.conf_general[CONF_WAZE_USED] = self.waze_used
+        Gb.conf_general[CONF_WAZE_HISTORY_DATABASE_USED] = False
+        Gb.conf_tracking[CONF_USERNAME] = 'replay@icloud3.local'
+        Gb.conf_tracking[CONF_DATA_SOURCE] = 'icloud,iosapp'
+
+        Gb.conf_devices = []
+        for evlog_display_order, device in enumerate(self.Scenario.devices, start=1):
+            conf_device = copy.deepcopy(DEFAULT_DEVICE_CONF)
+            conf_device.update({CONF_IC3_DEVICENAME: device['devicename'],
+                                CONF_FNAME: device['fname'],
+                                CONF_DEVICE_TYPE: device['device_type'],
+                                CONF_UNIQUE_ID: device['devicename'],
+                                CONF_EVLOG_DISPLAY_ORDER: evlog_display_order,
+                                CONF_FAMSHR_DEVICENAME: device['famshr_name'],
+                                CONF_RAW_MODEL: device['raw_model'],
+                                CONF_MODEL: device['device_type'],
+                                CONF_MODEL_DISPLAY_NAME: device['model_display_name'],
+                                CONF_IOSAPP_DEVICE: device['iosapp_devicename'] or 'None',
+                                CONF_TRACK_FROM_ZONES: [HOME], })
+            Gb.conf_devices.append(conf_device)
+
+        Gb.conf_tracking[CONF_DEVICES] = Gb.conf_devices
+        Gb.conf_data = {'tracking': Gb.conf_tracking, 'general': Gb.conf_general}
+
+        start_ic3.set_icloud_username_password()
+        start_ic3.initialize_directory_filenames()
+        os.makedirs(Gb.ha_storage_icloud3, exist_ok=True)
+
+#--------------------------------------------------------------------
+    def _setup_entity_states(self):
+        '''
+        Set the zone entities and the starting state of the iOS App entities
+        '''
+        for zone in self.Scenario.zones:
+            Gb.hass.states.set(f"zone.{zone['zone']}", 'zoning',
+                                {LATITUDE: zone['latitude'],
+                                LONGITUDE: zone['longitude'],
+                                RADIUS: zone['radius'],
+                                PASSIVE: False,
+                                FRIENDLY_NAME: zone['fname']})
+
+        home_zone = self.Scenario.zones[0]
+        for device in self.Scenario.devices:
+            if device['iosapp_devicename']:
+                self._set_iosapp_states(device['iosapp_devicename'], 'Initial', HOME,
+                                        home_zone['latitude'], home_zone['longitude'],
+                                        REPLAY_GPS_ACCURACY)
+
+    @staticmethod
+    def _set_iosapp_states(iosapp_devicename, trigger, state, latitude, longitude, gps_accuracy):
+        '''
+        Set the iOS App trigger and device_tracker entities. The device_tracker is
+        set last, the same as the iOS App does.
+        '''
+        Gb.hass.states.set(f"sensor.{iosapp_devicename}_last_update_trigger", trigger)
+        Gb.hass.states.set(f"{DEVICE_TRACKER}.{iosapp_devicename}", state,
+                            {LATITUDE: latitude,
+                            LONGITUDE: longitude,
+                            GPS_ACCURACY: gps_accuracy,
+                            ALTITUDE: 0,
+                            VERT_ACCURACY: 0,
+                            BATTERY_LEVEL: 80,
+                            BATTERY_STATUS: 'Not Charging'})
+
+    def _post_iosapp_events(self, loop_secs):
+        '''
+        Set the iOS App entity states of all events up to the loop time. The state
+        change listener starts the Device update.
+        '''
+        iosapp_events = self.Scenario.iosapp_events
+        while (self.iosapp_event_idx < len(iosapp_events)
+                and iosapp_events[self.iosapp_event_idx][0] <= loop_secs):
+            event_secs, devicename, trigger, state, latitude, longitude, gps_accuracy = \
+                    iosapp_events[self.iosapp_event_idx]
+            self.iosapp_event_idx += 1
+
+            iosapp_devicename = self._iosapp_devicename(devicename)
+            if iosapp_devicename:
+                self.Clock.set_secs(event_secs)
+                self._set_iosapp_states(iosapp_devicename, trigger, state,
+                                        latitude, longitude, gps_accuracy)
+
+        self.Clock.set_secs(loop_secs)
+
+    def _iosapp_devicename(self, devicename):
+        for device in self.Scenario.devices:
+            if device['devicename'] == devicename:
+                return device['iosapp_devicename']
+
+        return None
+
+#--------------------------------------------------------------------
+    def _get_entity_registry_data(self, platform=None, domain=None):
+        '''
+        The entity registry has the scenario's zones. The Home zone is added at
+        the end of the zone list the same as entity_io.get_entity_registry_data.
+        '''
+        if platform != ZONE:
+            return [], {}
+
+        zones = [zone['zone'] for zone in self.Scenario.zones if zone['zone'] != HOME]
+        zone_entity_data = {f"zone.{zone}": {ID: zone, 'unique_id': zone, 'original_name': zone}
+                                for zone in zones}
+
+        return zones + [HOME], zone_entity_data
+
+    def _get_entity_registry_mobile_app_devices(self):
+        iosapp_devices = [device for device in self.Scenario.devices if device['iosapp_devicename']]
+
+        iosapp_id_by_iosapp_devicename = {device['iosapp_devicename']: f"mobile_app_{device['device_id']}"
+                                                for device in iosapp_devices}
+        iosapp_devicename_by_iosapp_id = {v: k for k, v in iosapp_id_by_iosapp_devicename.items()}
+        device_info_by_iosapp_devicename = {device['iosapp_devicename']:
+                                                f"{device['fname']} ({device['raw_model']})"
+                                                for device in iosapp_devices}
+        device_model_info_by_iosapp_devicename = {device['iosapp_devicename']:
+                                                [device['raw_model'], device['device_type'],
+                                                device['model_display_name']]
+                                                for device in iosapp_devices}
+        last_updt_trig_by_iosapp_devicename = {device['iosapp_devicename']:
+                                                f"{device['iosapp_devicename']}_last_update_trigger"
+                                                for device in iosapp_devices}
+        notify_iosapp_devicenames = self._get_mobile_app_notifications()
+        battery_level_sensors_by_iosapp_devicename = {device['iosapp_devicename']:
+                                                f"{device['iosapp_devicename']}_battery_level"
+                                                for device in iosapp_devices}
+        battery_state_sensors_by_iosapp_devicename = {device['iosapp_devicename']:
+                                                f"{device['iosapp_devicename']}_battery_state"
+                                                for device in iosapp_devices}
+
+        return [iosapp_id_by_iosapp_devicename,
+                iosapp_devicename_by_iosapp_id,
+                device_info_by_iosapp_devicename,
+                device_model_info_by_iosapp_devicename,
+                last_updt_trig_by_iosapp_devicename,
+                notify_iosapp_devicenames,
+                battery_level_sensors_by_iosapp_devicename,
+                battery_state_sensors_by_iosapp_devicename]
+
+    def _get_mobile_app_notifications(self):
+        return [f"mobile_app_{device['iosapp_devicename']}"
+                        for device in self.Scenario.devices if device['iosapp_devicename']]
+
+#--------------------------------------------------------------------
+    def teardown(self):
+        for obj, attr, original in reversed(self._patches):
+            setattr(obj, attr, original)
+        self._patches = []
+
+        iosapp_state_listener.unsubscribe_from_iosapp_state_changes()
+        self.Clock.uninstall()
+
+#--------------------------------------------------------------------
+    def _build_report(self, pass_cnt, cpu_secs, wall_secs):
+        simulated_secs = self.Scenario.end_secs - self.Scenario.start_secs
+
+        self.report = {
+                'scenario': repr(self.Scenario),
+                'devices': len(self.Scenario.devices),
+                'zones': len(self.Scenario.zones),
+                'simulated_hours': round(simulated_secs / 3600, 2),
+                'loop_passes': pass_cnt,
+                'iosapp_events': self.iosapp_event_idx,
+                'icloud_calls': self.Session.refresh_cnt - self.setup_icloud_refresh_cnt,
+                'waze_calls': self.WazeRouteCalc.calc_route_cnt,
+                'sensor_writes': self.counts['sensor_writes'],
+                'device_tracker_writes': self.counts['device_tracker_writes'],
+                'ha_service_calls': len(Gb.hass.services.calls),
+                'cpu_secs': round(cpu_secs, 3),
+                'wall_secs': round(wall_secs, 3),
+                'speedup': round(simulated_secs / wall_secs, 1) if wall_secs > 0 else 0,
+                'loop_p95_msecs': Gb.LoopStats.loop_p95_msecs if Gb.LoopStats else 0, }
+
+        return self.report
+
+    def format_report(self):
+        return ', '.join([f"{item}-{value}" for item, value in self.report.items()])
+
+    def log_report(self):
+        log_info_msg(f"Replay Harness > {self.format_report()}")
+
+
+#<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>
+def run_replay(device_cnt=4, zone_cnt=10, hours=24, seed=1, recorded_filename=None,
+                waze_used=True):
+    '''
+    Replay a recorded file or a synthetic day and return the report
+    '''
+    if recorded_filename:
+        Scenario = RecordedScenario(recorded_filename)
+    else:
+        Scenario = SyntheticScenario(device_cnt=device_cnt, zone_cnt=zone_cnt,
+                                        hours=hours, seed=seed)
+
+    Harness = ReplayHarness(Scenario, waze_used=waze_used)
+    Harness.run()
+    Harness.log_report()
+
+    return Harness.report
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Replay a day of iCloud3 tracking')
+    parser.add_argument('--devices', type=int, default=4)
+    parser.add_argument('--zones', type=int, default=10)
+    parser.add_argument('--hours', type=float, default=24)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--recorded', default=None, help='Recorded json lines file')
+    parser.add_argument('--no-waze', action='store_true')
+    args = parser.parse_args()
+
+    report = run_replay(args.devices, args.zones, args.hours, args.seed,
+                        args.recorded, waze_used=(args.no_waze is False))
+    print(json.dumps(report, indent=4))
@@ -24,11 +24,12 @@ from .const             import (HOME, NOT_HOME, STATIONARY, HIGH_INTEGER,
                                 LATITUDE, LONGITUDE, RADIUS, PASSIVE,
                                 )
 
-from .helpers.common    import (instr, is_statzone, format_gps, )
+from .helpers.common    import (instr, is_statzone, format_gps, round_to_zero, )
 from .helpers.messaging import (post_event, post_error_msg, post_monitor_msg,
                                 log_exception, log_rawdata,_trace, _traceha, )
 from .helpers.time_util import (time_now_secs, datetime_now, secs_to_time,  format_time_age, )
-from .helpers.dist_util import (calc_distance_m, calc_distance_km, format_dist_km, )
+from .helpers.dist_util import (calc_distance_m, calc_distance_km, format_dist_km,
+                                calc_gps_bounding_box, is_within_distance, )
 
 from   homeassistant.util.location import distance
 
@@ -83,6 +84,8 @@ class iCloud3_Zone(object):
         self.unique_id  = zone_data.get('unique_id', zone.lower())
 
         self.dist_time_history = []        #Entries are a list - [lat, long, distance, travel time]
+        self._bounding_box     = None
+        self._bounding_box_key = None      # (latitude, longitude, radius) the bounding box was set up for
 
         self.setup_zone_display_name()
 
@@ -148,15 +151,34 @@ class iCloud3_Zone(object):
     def radius_km(self):
         return round(self.radius_m/1000, 4)
 
-    # Calculate distance in meters
+    # Calculate distance in meters, use the distance already calculated in this 5-sec loop pass
     def distance_m(self, to_latitude, to_longitude):
+        if Gb.ZoneDistanceCache is not None:
+            return Gb.ZoneDistanceCache.distance_m(self, to_latitude, to_longitude)
+
         to_gps = (to_latitude, to_longitude)
         return calc_distance_m(self.gps, to_gps)
 
     # Calculate distance in kilometers
     def distance_km(self, to_latitude, to_longitude):
-        to_gps = (to_latitude, to_longitude)
-        return calc_distance_km(self.gps, to_gps)
+        return round_to_zero(self.distance_m(to_latitude, to_longitude)/1000)
+
+    # Lat/long box around the zone, set up again if the zone moved or the radius changed
+    @property
+    def bounding_box(self):
+        bounding_box_key = (self.latitude, self.longitude, self.radius_m)
+        if self._bounding_box_key != bounding_box_key:
+            self._bounding_box     = calc_gps_bounding_box(self.gps, self.radius_m)
+            self._bounding_box_key = bounding_box_key
+
+        return self._bounding_box
+
+    # Is the location in the zone (or within radius_m of the zone center)
+    def is_location_in_zone(self, latitude, longitude, radius_m=None):
+        if radius_m is None:
+            return is_within_distance(self.gps, (latitude, longitude), self.radius_m, self.bounding_box)
+
+        return is_within_distance(self.gps, (latitude, longitude), radius_m)
 
     # Return the DeviceFmZone obj from the devicename and this zone
     @property
@@ -344,15 +366,20 @@ class iCloud3_StationaryZone(iCloud3_Zone):
             longitude = self.Device.loc_data_longitude
 
             # Make sure stationary zone is not being moved to another zone's location unless it a
-            # Stationary Zone
-            for Zone in Gb.Zones:
+            # Stationary Zone. Only the zones near the location (zone spatial index) are checked.
+            min_dist_from_zone_m = self.min_dist_from_zone_km * 1000
+            if Gb.ZoneIndex is None:
+                NearZones = Gb.Zones
+            else:
+                NearZones = Gb.ZoneIndex.zones_near(latitude, longitude, min_dist_from_zone_m)
+
+            for Zone in NearZones:
                 if Zone.radius_m <= 1:
                     continue
 
-                zone_dist_km = Zone.distance_km(latitude, longitude)
-
                 if is_statzone(Zone.zone) is False:
-                    if zone_dist_km < self.min_dist_from_zone_km:   #self.inzone_radius:
+                    if Zone.is_location_in_zone(latitude, longitude, min_dist_from_zone_m):
+                        zone_dist_km = Zone.distance_km(latitude, longitude)
                         event_msg =(f"Move into stationary zone cancelled > "
                                     f"Too close to zone-{Zone.display_as}, "
                                     f"DistFmZone-{format_dist_km(zone_dist_km)}")
@@ -372,7 +399,8 @@ class iCloud3_StationaryZone(iCloud3_Zone):
             self.radius_m              = self.inzone_radius
             self.passive               = False
 
-            Gb.hass.states.async_set(f"zone.{self.zone}", 0, self.away_attrs, force_update=True)
+            Gb.StatZoneStateWriter.queue_zone_state(self, self.away_attrs)
+            Gb.ZoneSelectCache.zones_changed()
 
             # Set Stationary Zone at new location
             self.Device.loc_data_zone      = self.zone
@@ -405,7 +433,8 @@ class iCloud3_StationaryZone(iCloud3_Zone):
         self.radius_m = 1
 
         self.base_attrs[LATITUDE] += 20
-        Gb.hass.states.async_set(f"zone.{self.zone}", 0, self.base_attrs, force_update=True)
+        Gb.StatZoneStateWriter.queue_zone_state(self, self.base_attrs)
+        Gb.ZoneSelectCache.zones_changed()
 
         event_msg =(f"Reset Stationary Zone Location > {self.zone}, "
                     f"Moved back to Base Location-{format_gps(self.base_latitude, self.base_longitude, 1)}")